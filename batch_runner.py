@@ -0,0 +1,289 @@
+# batch_runner.py
+#
+# Bulk plan evaluation: reads a file of client profiles, shards them across a
+# process pool and streams one result row per profile to an output file.
+#
+# Usage:
+#     python batch_runner.py profiles.csv results.jsonl [--workers 4] [--chunk-size 500]
+#
+# Input: CSV with one profile per row, JSON Lines, a JSON list of plans in the
+# legacy export format ({"profile": {...}, "insurance": {...}, ...}), or a .plan
+# file as main.py now exports (one or many plans; their metadata is evaluated).
+# Output: .csv or .jsonl, chosen by the output file extension.
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
+from plan_format import PLAN_FILE_EXTENSION
+from plan_format import read_plans as read_plan_file
+from simulation_pipeline import CapitalStrategyInput, FinancialInputs, ProfileInput, SimulationPipeline
+
+DEFAULT_CHUNK_SIZE = 500
+
+RESULT_FIELDS = [
+    "id",
+    "lifetime_healthcare_cost",
+    "capital_shift",
+    "retirement_depletion_age",
+    "retirement_status",
+    "recommendation_code",
+    "drawdown_option",
+    "error",
+]
+
+# Plan JSON / CSV column names that differ from the pipeline input fields
+PLAN_FIELD_ALIASES = {
+    "type": "insurance_type",
+    "monthly_income": "monthly_gross_income",
+    "debt_monthly": "monthly_debt",
+    "family_history": "family_history_user",
+}
+
+# Plan JSON sections flattened into one record (the exported premium/oop are not model inputs)
+PLAN_SECTIONS = ("profile", "insurance", "financials", "capital_strategy", "retirement")
+IGNORED_PLAN_FIELDS = {"premium", "oop"}
+
+_pipeline = None
+
+
+def _init_worker(assumptions):
+    global _pipeline
+    _pipeline = SimulationPipeline(assumptions)
+
+
+def _flatten_plan(plan):
+    # Nested plan JSON -> flat record; flat CSV rows pass through unchanged
+    if not any(isinstance(plan.get(section), dict) for section in PLAN_SECTIONS):
+        return dict(plan)
+    record = {k: v for k, v in plan.items() if k not in PLAN_SECTIONS}
+    for section in PLAN_SECTIONS:
+        record.update(plan.get(section) or {})
+    return record
+
+
+def _coerce(value, default):
+    # CSV cells arrive as strings; convert them to the type of the dataclass default
+    if not isinstance(value, str):
+        return value
+    value = value.strip()
+    if value == "":
+        return None
+    if isinstance(default, list):
+        return [item.strip() for item in value.split(";") if item.strip()]
+    if isinstance(default, bool):
+        return value.lower() in ("1", "true", "yes")
+    if isinstance(default, (int, float)) or default is None:
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        return int(number) if number.is_integer() and not isinstance(default, float) else number
+    return value
+
+
+def _build_input(cls, record):
+    values = {}
+    for f in fields(cls):
+        if f.name in record:
+            default = f.default_factory() if callable(f.default_factory) else f.default
+            value = _coerce(record[f.name], default)
+            if value is not None:
+                values[f.name] = value
+    return cls(**values)
+
+
+def plan_to_inputs(plan):
+    """
+    Maps one exported plan (or flat CSV row) to pipeline inputs.
+
+    Returns:
+    - Tuple of (ProfileInput, FinancialInputs, CapitalStrategyInput)
+    """
+    record = {}
+    for key, value in _flatten_plan(plan).items():
+        if key not in IGNORED_PLAN_FIELDS:
+            record[PLAN_FIELD_ALIASES.get(key, key)] = value
+    return (
+        _build_input(ProfileInput, record),
+        _build_input(FinancialInputs, record),
+        _build_input(CapitalStrategyInput, record),
+    )
+
+
+def evaluate_plan(plan, pipeline):
+    """
+    Runs one plan and returns its result row (errors are reported in the row, not raised).
+    """
+    row = {"id": plan.get("id", plan.get("client_id"))}
+    try:
+        results = pipeline.run(*plan_to_inputs(plan))
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+    row.update({
+        "lifetime_healthcare_cost": round(results.metrics["lifetime_healthcare_cost"], 2),
+        "capital_shift": round(results.metrics["capital_shift"], 2),
+        "retirement_depletion_age": results.metrics["retirement_depletion_age"],
+        "retirement_status": results.metrics["retirement_status"],
+        "recommendation_code": results.recommendation_code,
+        "drawdown_option": results.drawdown_option,
+    })
+    return row
+
+
+def evaluate_chunk(plans):
+    """
+    Worker entry point: evaluates a list of plans with the process-wide pipeline.
+    """
+    pipeline = _pipeline or SimulationPipeline()
+    return [evaluate_plan(plan, pipeline) for plan in plans]
+
+
+def read_plans(path):
+    """
+    Yields plans from a .csv, .jsonl, .json or .plan file without loading CSV/JSONL files fully.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == "." + PLAN_FILE_EXTENSION:
+        # Binary plan archive: every plan's metadata sections, as in the legacy JSON export
+        yield from (plan["metadata"] for plan in read_plan_file(path))
+        return
+    with open(path, newline="") as f:
+        if ext == ".csv":
+            yield from csv.DictReader(f)
+        elif ext == ".jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif ext == ".json":
+            data = json.load(f)
+            yield from (data if isinstance(data, list) else [data])
+        else:
+            raise ValueError(f"Unsupported input format: {ext}. Expected .csv, .jsonl, .json or .{PLAN_FILE_EXTENSION}")
+
+
+def _chunks(plans, chunk_size):
+    chunk = []
+    for index, plan in enumerate(plans):
+        if plan.get("id") in (None, "") and plan.get("client_id") in (None, ""):
+            plan = {**plan, "id": index}
+        chunk.append(plan)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _ResultWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.csv = os.path.splitext(path)[1].lower() == ".csv"
+        if self.csv:
+            self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+            self.writer.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            if self.csv:
+                self.writer.writerow(row)
+            else:
+                self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def run_batch(input_path, output_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, assumptions=None,
+              progress=None):
+    """
+    Evaluates every plan in `input_path` and streams results to `output_path` in input order.
+
+    Parameters:
+    - workers: number of worker processes (default: CPU count); 1 runs in-process
+    - chunk_size: plans sent to a worker per task
+    - assumptions: ModelAssumptions shared by every worker
+    - progress: optional callable(profiles_done, elapsed_seconds) called after each chunk
+
+    Returns:
+    - Dict with "profiles", "errors", "seconds", "profiles_per_second", "workers" and "chunk_size"
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    errors = 0
+    writer = _ResultWriter(output_path)
+    start = time.perf_counter()
+
+    def record(rows):
+        nonlocal done, errors
+        writer.write(rows)
+        done += len(rows)
+        errors += sum(1 for row in rows if row.get("error"))
+        if progress:
+            progress(done, time.perf_counter() - start)
+
+    try:
+        chunks = _chunks(read_plans(input_path), chunk_size)
+        if workers == 1:
+            _init_worker(assumptions)
+            for chunk in chunks:
+                record(evaluate_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(assumptions,)) as executor:
+                # Keep a bounded number of chunks in flight so huge files stream in order
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(evaluate_chunk, chunk))
+                    if len(pending) >= workers * 2:
+                        record(pending.popleft().result())
+                while pending:
+                    record(pending.popleft().result())
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "profiles": done,
+        "errors": errors,
+        "seconds": seconds,
+        "profiles_per_second": done / seconds if seconds > 0 else 0.0,
+        "workers": workers,
+        "chunk_size": chunk_size,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a file of client profiles in parallel.")
+    parser.add_argument("input", help="profiles file (.csv, .jsonl, .json or .plan)")
+    parser.add_argument("output", help="results file (.csv or .jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="profiles per task")
+    args = parser.parse_args(argv)
+
+    def progress(done, elapsed):
+        print(f"\r{done:,} profiles ({done / elapsed:,.0f}/s)", end="", file=sys.stderr)
+
+    stats = run_batch(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size,
+                      progress=progress)
+    print(file=sys.stderr)
+    print(
+        f"{stats['profiles']:,} profiles in {stats['seconds']:.2f}s "
+        f"({stats['profiles_per_second']:,.0f} profiles/s, {stats['workers']} workers, "
+        f"chunk size {stats['chunk_size']}, {stats['errors']} errors)"
+    )
+    return 0 if stats["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
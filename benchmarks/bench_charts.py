@@ -0,0 +1,97 @@
+# bench_charts.py
+#
+# Step 4 projection chart across N Streamlit reruns: a new pyplot figure per
+# rerun that is never closed (the previous st.pyplot pattern) versus
+# chart_service.render_chart, with unchanged data and with new data on every
+# rerun. Reports time per rerun, figures left open in pyplot and traced memory
+# growth.
+#
+# Usage:
+#     python benchmarks/bench_charts.py [--reruns 50] [--years 60]
+
+import argparse
+import io
+import itertools
+import os
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_service import SAVEFIG_OPTIONS, render_chart  # noqa: E402
+from projection_cache import ProjectionCache  # noqa: E402
+
+
+def chart_data(years, seed=0):
+    rng = np.random.default_rng(seed)
+    ages = list(range(40, 40 + years))
+    series = {name: rng.uniform(1_000, 90_000, years).tolist()
+              for name in ("household", "premiums", "oop", "income", "savings", "proj_401k")}
+    return {"ages": ages, "pension": [0 if age < 66 else 20_000 for age in ages], **series}
+
+
+def pyplot_rerun(data):
+    # Previous step 4 code: a pyplot figure per rerun, encoded by st.pyplot and never closed
+    fig, axs = plt.subplots(1, 3, figsize=(24, 5))
+    ages = data["ages"]
+    axs[0].bar(ages, data["household"], label="Household")
+    axs[0].bar(ages, data["premiums"], bottom=np.array(data["household"]), label="Premiums")
+    axs[0].bar(ages, data["oop"], bottom=np.array(data["household"]) + np.array(data["premiums"]), label="OOP")
+    axs[1].bar(ages, data["income"], label="Total Income")
+    axs[1].bar(ages, data["pension"], label="Pension Overlay", alpha=0.3)
+    axs[2].bar(ages, data["savings"], label="Savings")
+    axs[2].bar(ages, data["proj_401k"], bottom=np.array(data["savings"]), label="401(k)")
+    for ax in axs:
+        ax.legend()
+        ax.grid(True)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", **SAVEFIG_OPTIONS)
+    return buffer.getvalue()
+
+
+def run(label, rerun, reruns):
+    # Timed pass, then a traced pass (tracemalloc slows allocation-heavy code too much to time under it)
+    plt.close("all")
+    start = time.perf_counter()
+    for _ in range(reruns):
+        rerun()
+    elapsed = time.perf_counter() - start
+
+    plt.close("all")
+    tracemalloc.start()
+    for _ in range(reruns):
+        rerun()
+    growth, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24} {elapsed / reruns * 1000:>10.1f} {len(plt.get_fignums()):>12} {growth / 1024 / 1024:>12.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chart rendering across reruns: pyplot vs chart_service.")
+    parser.add_argument("--reruns", type=int, default=50, help="reruns with unchanged data")
+    parser.add_argument("--years", type=int, default=60, help="projection horizon")
+    args = parser.parse_args(argv)
+
+    data = chart_data(args.years)
+    print(f"projection_bars, {args.years} years, {args.reruns} reruns")
+    print(f"{'renderer':<24} {'ms / rerun':>10} {'open figures':>12} {'growth (MiB)':>12}")
+    run("pyplot, never closed", lambda: pyplot_rerun(data), args.reruns)
+    # Shared by both passes: only the first timed rerun renders, every later rerun is a cache hit
+    cache = ProjectionCache()
+    run("chart_service", lambda: render_chart("projection_bars", cache=cache, **data), args.reruns)
+    # New data on every rerun: each call renders, and only the encoded bytes stay in the bounded cache
+    seeds = itertools.count(1)
+    miss_cache = ProjectionCache()
+    run("chart_service, misses", lambda: render_chart("projection_bars", cache=miss_cache,
+                                                       **chart_data(args.years, next(seeds))), args.reruns)
+
+
+if __name__ == "__main__":
+    main()
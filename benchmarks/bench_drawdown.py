@@ -0,0 +1,89 @@
+# bench_drawdown.py
+#
+# Compares the original per-year retirement drawdown loop against the
+# vectorized drawdown kernel at 1, 1k and 100k households.
+#
+# Usage:
+#     python benchmarks/bench_drawdown.py [--full]
+#
+# Without --full the legacy loop is timed on at most 10,000 households and its
+# 100k figure is extrapolated from the per-household rate.
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drawdown_engine import drawdown_batch  # noqa: E402
+
+LEGACY_SAMPLE_LIMIT = 10_000
+RETIREMENT_YEARS = 21
+
+
+def legacy_drawdown(deficit_values, capital, income):
+    # Original loop from step_4 / step_5
+    current_capital = capital
+    used_capital, remaining_capital, unfunded_gap = [], [], []
+    for deficit in deficit_values:
+        uncovered = max(deficit - income, 0)
+        used = min(uncovered, current_capital)
+        gap = max(uncovered - used, 0)
+        current_capital -= used
+        used_capital.append(used)
+        remaining_capital.append(max(current_capital, 0))
+        unfunded_gap.append(gap)
+    return used_capital, remaining_capital, unfunded_gap
+
+
+def make_households(n, seed=0):
+    rng = np.random.default_rng(seed)
+    deficits = rng.uniform(0, 60_000, (n, RETIREMENT_YEARS)) * (rng.random((n, RETIREMENT_YEARS)) > 0.3)
+    capital = rng.uniform(0, 800_000, n)
+    income = rng.uniform(0, 30_000, n)
+    return deficits, capital, income
+
+
+def check_parity(deficits, capital, income):
+    result = drawdown_batch(deficits, capital, income)
+    for row in range(len(deficits)):
+        expected = legacy_drawdown(deficits[row].tolist(), capital[row], income[row])
+        for name, values in zip(("used", "remaining", "gap"), expected):
+            if not np.allclose(values, result[name][row]):
+                raise AssertionError(f"Mismatch in {name} for household {row}")
+
+
+def time_legacy(deficits, capital, income, limit=LEGACY_SAMPLE_LIMIT):
+    n = min(len(deficits), limit)
+    rows = deficits[:n].tolist()
+    start = time.perf_counter()
+    for row in range(n):
+        legacy_drawdown(rows[row], capital[row], income[row])
+    elapsed = time.perf_counter() - start
+    return elapsed * len(deficits) / n, n < len(deficits)
+
+
+def time_vectorized(deficits, capital, income):
+    start = time.perf_counter()
+    drawdown_batch(deficits, capital, income)
+    return time.perf_counter() - start
+
+
+def main(full=False):
+    limit = sys.maxsize if full else LEGACY_SAMPLE_LIMIT
+    check_parity(*make_households(500, seed=1))
+    print(f"{'households':>10} {'legacy (s)':>14} {'vectorized (s)':>16} {'speedup':>10}")
+    for n in (1, 1_000, 100_000):
+        households = make_households(n)
+        legacy, extrapolated = time_legacy(*households, limit=limit)
+        vectorized = time_vectorized(*households)
+        marker = "*" if extrapolated else " "
+        print(f"{n:>10} {legacy:>13.4f}{marker} {vectorized:>16.4f} {legacy / vectorized:>9.0f}x")
+    if not full:
+        print("* extrapolated from the first 10,000 households (use --full to time every household)")
+
+
+if __name__ == "__main__":
+    main(full="--full" in sys.argv[1:])
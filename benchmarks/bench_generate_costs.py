@@ -0,0 +1,106 @@
+# bench_generate_costs.py
+#
+# Compares the original per-age generate_costs loop against the vectorized
+# cost engine at 1, 1k and 100k profiles.
+#
+# Usage:
+#     python benchmarks/bench_generate_costs.py [--full]
+#
+# Without --full the legacy loop is timed on at most 1,000 profiles and its
+# 100k figure is extrapolated from the per-profile rate.
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cost_engine import cost_table, encode_profiles, generate_cost_arrays  # noqa: E402
+
+LEGACY_SAMPLE_LIMIT = 1000
+
+
+def legacy_generate_costs(profile, expense_inflation=0.05):
+    # Original row-by-row implementation (debug prints removed)
+    ages = list(range(profile["age"], 86))
+    cost_data = []
+    for age in ages:
+        insurance_type = profile.get("insurance_type", "None")
+        if profile.get("health_status") == "chronic":
+            chronic_inflation = expense_inflation + 0.02
+            years_since_start = age - profile["age"]
+            total_cost = 6500 * ((1 + chronic_inflation) ** years_since_start)
+            oop = total_cost * (0.15 if insurance_type == "Employer" else 0.2 if insurance_type == "Marketplace" else 0.5)
+            base_premium = 1500 if insurance_type == "Employer" else 1800 if insurance_type == "Marketplace" else 0
+            premium = base_premium * ((1 + chronic_inflation) ** years_since_start)
+        else:
+            total_cost = 2000 + (age - profile["age"]) * 100
+            if insurance_type == "Employer":
+                oop = total_cost * 0.15
+                premium = 1500 + (age - profile["age"]) * 40
+            elif insurance_type == "Marketplace":
+                oop = total_cost * 0.2
+                premium = 1800 + (age - profile["age"]) * 60
+            else:
+                oop = total_cost * 0.5
+                premium = 0
+        cost_data.append({"Age": age, "Healthcare Cost": total_cost, "OOP": oop, "Premium": premium})
+    return pd.DataFrame(cost_data)
+
+
+def make_profiles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    statuses = np.array(["healthy", "chronic", "high_risk"])
+    insurance = np.array(["Employer", "Marketplace", "None"])
+    return [
+        {"age": int(a), "health_status": str(h), "insurance_type": str(i)}
+        for a, h, i in zip(
+            rng.integers(18, 80, n), rng.choice(statuses, n), rng.choice(insurance, n)
+        )
+    ]
+
+
+def check_parity(profiles):
+    arrays = generate_cost_arrays(*encode_profiles(profiles))
+    for row, profile in enumerate(profiles):
+        expected = legacy_generate_costs(profile)
+        actual = cost_table(arrays, row)
+        for col in expected.columns:
+            if not np.allclose(expected[col].to_numpy(float), actual[col].to_numpy(float)):
+                raise AssertionError(f"Mismatch in {col} for profile {profile}")
+
+
+def time_legacy(profiles, limit=LEGACY_SAMPLE_LIMIT):
+    sample = profiles[:limit]
+    start = time.perf_counter()
+    for profile in sample:
+        legacy_generate_costs(profile)
+    elapsed = time.perf_counter() - start
+    return elapsed * len(profiles) / len(sample), len(sample) < len(profiles)
+
+
+def time_vectorized(profiles):
+    start = time.perf_counter()
+    generate_cost_arrays(*encode_profiles(profiles))
+    return time.perf_counter() - start
+
+
+def main(full=False):
+    limit = sys.maxsize if full else LEGACY_SAMPLE_LIMIT
+    check_parity(make_profiles(200, seed=1))
+    print(f"{'profiles':>10} {'legacy (s)':>14} {'vectorized (s)':>16} {'speedup':>10}")
+    for n in (1, 1_000, 100_000):
+        profiles = make_profiles(n)
+        legacy, extrapolated = time_legacy(profiles, limit)
+        vectorized = time_vectorized(profiles)
+        marker = "*" if extrapolated else " "
+        print(f"{n:>10} {legacy:>13.4f}{marker} {vectorized:>16.4f} {legacy / vectorized:>9.0f}x")
+    if not full:
+        print("* extrapolated from the first 1,000 profiles (use --full to time every profile)")
+
+
+if __name__ == "__main__":
+    main(full="--full" in sys.argv[1:])
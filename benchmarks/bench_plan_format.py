@@ -0,0 +1,78 @@
+# bench_plan_format.py
+#
+# Size and load time of N saved plans: the pretty-printed JSON export (projections
+# as lists, as recommendation_engine writes DataFrames) versus one binary plan file.
+#
+# Usage:
+#     python benchmarks/bench_plan_format.py [--plans 1000] [--years 60]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_format import dumps_plans, loads_plans, make_plan  # noqa: E402
+
+from bench_projection_store import SESSION_PROJECTIONS  # noqa: E402
+
+
+def make_plans(n_plans, years, seed=0):
+    rng = np.random.default_rng(seed)
+    plans = []
+    for i in range(n_plans):
+        metadata = {
+            "profile": {"age": int(rng.integers(25, 65)), "health_status": "healthy", "family_status": "single"},
+            "insurance": {"type": "Employer-based", "premium": float(rng.uniform(1000, 8000)), "oop": 2500.0},
+            "financials": {"monthly_income": 6000.0, "monthly_expenses": 4000.0, "savings_balance": 20000.0},
+            "retirement": {"pension_user": 0, "pension_partner": 0},
+        }
+        projections = {name: rng.uniform(0, 100_000, years) for name in SESSION_PROJECTIONS}
+        plans.append(make_plan(metadata, projections, start_age=metadata["profile"]["age"]))
+    return plans
+
+
+def json_export(plans):
+    return json.dumps([
+        {**plan["metadata"], "projections": {name: values.tolist() for name, values in plan["projections"].items()}}
+        for plan in plans
+    ], indent=2).encode("utf-8")
+
+
+def best_time(func, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan file size and load time: JSON vs binary plan format.")
+    parser.add_argument("--plans", type=int, default=1000, help="plans per file")
+    parser.add_argument("--years", type=int, default=60, help="projection horizon")
+    args = parser.parse_args(argv)
+
+    plans = make_plans(args.plans, args.years)
+    json_bytes = json_export(plans)
+    plan_bytes = dumps_plans(plans)
+
+    rows = [
+        ("JSON (indent=2)", len(json_bytes), best_time(lambda: json_export(plans)), best_time(lambda: json.loads(json_bytes))),
+        ("plan format", len(plan_bytes), best_time(lambda: dumps_plans(plans)), best_time(lambda: loads_plans(plan_bytes))),
+    ]
+    print(f"{args.plans:,} plans x {len(SESSION_PROJECTIONS)} projections x {args.years} years")
+    print(f"{'format':<18} {'size (KiB)':>12} {'write (ms)':>11} {'load (ms)':>10}")
+    for name, size, write, load in rows:
+        print(f"{name:<18} {size / 1024:>12,.0f} {write * 1000:>11.1f} {load * 1000:>10.1f}")
+    (_, json_size, _, json_load), (_, plan_size, _, plan_load) = rows
+    print(f"plan format: {json_size / plan_size:.1f}x smaller, {json_load / plan_load:.1f}x faster to load")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# bench_projection_store.py
+#
+# Per-session memory of the yearly projections: one Python list per
+# session_state key versus the columnar projection store.
+#
+# Usage:
+#     python benchmarks/bench_projection_store.py [--years 60] [--sessions 1000]
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from projection_store import put_projection, session_memory_report  # noqa: E402
+
+# Keys the steps write for one session
+SESSION_PROJECTIONS = (
+    "premiums", "oop", "household_proj", "debt_proj", "ltc_proj", "income_proj", "income_proj_partner",
+    "savings_proj", "proj_401k", "proj_401k_partner", "surplus",
+)
+
+
+def make_session(years, seed=0):
+    rng = np.random.default_rng(seed)
+    session = {}
+    for name in SESSION_PROJECTIONS:
+        put_projection(session, name, rng.uniform(0, 100_000, years), start_age=40)
+    return session
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Projection memory per session.")
+    parser.add_argument("--years", type=int, default=60, help="projection horizon")
+    parser.add_argument("--sessions", type=int, default=1000, help="concurrent sessions to extrapolate to")
+    args = parser.parse_args(argv)
+
+    report = session_memory_report(make_session(args.years))
+    print(f"{'projection':<22} {'lists (B)':>11} {'store (B)':>11}")
+    for name, sizes in report["columns"].items():
+        print(f"{name:<22} {sizes['list_bytes']:>11,} {sizes['store_bytes']:>11,}")
+    before, after = report["list_bytes"], report["store_bytes"]
+    print(f"{'per session':<22} {before:>11,} {after:>11,}  ({before / after:.1f}x smaller)")
+    print(f"{args.sessions:,} sessions: {before * args.sessions / 2**20:,.1f} MiB -> {after * args.sessions / 2**20:,.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
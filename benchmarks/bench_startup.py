@@ -0,0 +1,132 @@
+# bench_startup.py
+#
+# Cold-start import cost of the Streamlit app, from `python -X importtime` in a
+# fresh interpreter per stage, with the time split by top-level package:
+#   - "main": the modules main.py imports at module level (everything that loads
+#     before the access gate and the Welcome tab render), read from main.py itself
+#   - "step tabs": the six step modules. main.py imports them inside the tab
+#     blocks, off the module-level path, but Streamlit runs every tab body on
+#     each rerun, so all six still load on the first run past the access gate;
+#     only their import cost before the gate is deferred, not per tab.
+#
+# The "main" stage is checked against STARTUP_BUDGET_SECONDS; the exit code is 1
+# when it is over budget or imports NumPy, pandas or matplotlib. --save writes the
+# report to results/startup.json.
+#
+# Usage:
+#     python benchmarks/bench_startup.py [--repeats 5] [--top 15] [--save]
+
+import argparse
+import ast
+import json
+import os
+import platform
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+STARTUP_BUDGET_SECONDS = 0.6
+# Packages main.py must not import before the gate; they belong to the step tabs
+DEFERRED_PACKAGES = ("numpy", "pandas", "matplotlib")
+STEP_MODULES = tuple(f"step_{i}" for i in range(1, 7))
+
+
+def main_imports(path=os.path.join(ROOT, "main.py")):
+    """
+    Modules imported at module level of main.py (imports nested in blocks run after the gate).
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return modules
+
+
+def _importtime(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # One leading space, then two per nesting level
+        yield int(self_us), int(cumulative_us), name.strip(), (len(name) - len(name.lstrip()) - 1) // 2
+
+
+def import_time(modules):
+    """
+    Runs `python -X importtime -c "import ..."` from the repo root; modules the bare
+    interpreter already imports at startup (site, encodings, ...) are left out.
+
+    Returns:
+    - Tuple of (dict of top-level package -> own import time in seconds, total seconds)
+    """
+    startup = {name for _, _, name, _ in _importtime("pass")}
+    packages = {}
+    total = 0.0
+    for self_us, cumulative_us, name, depth in _importtime("import " + ", ".join(modules)):
+        if name in startup:
+            continue
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + self_us / 1e6
+        if depth == 0:
+            total += cumulative_us / 1e6
+    return packages, total
+
+
+def measure(modules, repeats):
+    # Best of `repeats` runs, as a warm disk cache is the common case on a restarted container
+    runs = [import_time(modules) for _ in range(repeats)]
+    return min(runs, key=lambda run: run[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time report for the app's cold start.")
+    parser.add_argument("--repeats", type=int, default=5, help="fresh interpreters per stage")
+    parser.add_argument("--top", type=int, default=15, help="packages listed per stage")
+    parser.add_argument("--save", action="store_true", help="write results/startup.json")
+    args = parser.parse_args(argv)
+
+    stages = {"main": main_imports(), "step tabs": list(STEP_MODULES)}
+    report = {
+        "budget_seconds": STARTUP_BUDGET_SECONDS,
+        "python": platform.python_version(),
+        "stages": {},
+    }
+    for stage, modules in stages.items():
+        packages, total = measure(modules, args.repeats)
+        report["stages"][stage] = {
+            "modules": modules,
+            "total_seconds": round(total, 4),
+            "packages": {name: round(seconds, 4) for name, seconds in sorted(packages.items(), key=lambda item: -item[1])},
+        }
+        print(f"{stage}: {total * 1000:,.0f} ms ({', '.join(modules)})")
+        for name, seconds in list(report["stages"][stage]["packages"].items())[:args.top]:
+            print(f"    {name:<28} {seconds * 1000:>8,.1f} ms")
+
+    main_stage = report["stages"]["main"]
+    deferred = [name for name in DEFERRED_PACKAGES if name in main_stage["packages"]]
+    over_budget = main_stage["total_seconds"] > STARTUP_BUDGET_SECONDS
+    print(f"main budget: {main_stage['total_seconds'] * 1000:,.0f} / {STARTUP_BUDGET_SECONDS * 1000:,.0f} ms"
+          f" ({'over' if over_budget else 'ok'})")
+    if deferred:
+        print(f"main imports deferred packages: {', '.join(deferred)}")
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(os.path.join(RESULTS_DIR, "startup.json"), "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print("Report saved to benchmarks/results/startup.json")
+    return 1 if over_budget or deferred else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# load_test.py
+#
+# Load test for simulation_service: N keep-alive connections each send
+# POST /v1/simulate requests back to back, with randomized profiles. Reports
+# latency percentiles, requests per second and response status counts.
+#
+# Usage:
+#     python benchmarks/load_test.py --spawn [--workers 4]          # start a local service on a free port
+#     python benchmarks/load_test.py --url http://127.0.0.1:8502    # test a running service
+#     python benchmarks/load_test.py --spawn --concurrency 64 --requests 5000
+#     python benchmarks/load_test.py --spawn --max-batch-size 1    # no batching, for comparison
+#     python benchmarks/load_test.py --spawn --max-queue 8         # backpressure: expect 503s
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds a spawned service gets to exit cleanly before it is killed
+SHUTDOWN_TIMEOUT = 10
+
+HEALTH_STATUSES = ("healthy", "chronic", "high_risk")
+INSURANCE_TYPES = ("Employer-based", "Marketplace / Self-insured", "None")
+
+
+def make_payloads(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        json.dumps({
+            "profile": {
+                "age": int(rng.integers(25, 64)),
+                "health_status": HEALTH_STATUSES[rng.integers(len(HEALTH_STATUSES))],
+                "family_status": "family" if rng.random() < 0.5 else "single",
+                "insurance_type": INSURANCE_TYPES[rng.integers(len(INSURANCE_TYPES))],
+            },
+            "financials": {
+                "monthly_gross_income": float(rng.uniform(3_000, 15_000)),
+                "savings_balance": float(rng.uniform(0, 200_000)),
+            },
+        }).encode("utf-8")
+        for _ in range(n)
+    ]
+
+
+async def _post(reader, writer, host, path, body):
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, payloads, next_index, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            index = next(next_index, None)
+            if index is None:
+                break
+            start = time.perf_counter()
+            status = await _post(reader, writer, host, "/v1/simulate", payloads[index % len(payloads)])
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(url, concurrency, requests, payloads):
+    """
+    Sends `requests` simulate requests over `concurrency` connections.
+
+    Returns:
+    - Dict with latency percentiles (ms), requests per second and status counts
+    """
+    parts = urlsplit(url)
+    latencies = []
+    statuses = Counter()
+    next_index = iter(range(requests))
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(parts.hostname, parts.port or 80, payloads, next_index, latencies, statuses)
+        for _ in range(concurrency)
+    ])
+    seconds = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "seconds": seconds,
+        "requests_per_second": len(latencies) / seconds,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p90_ms": float(np.percentile(latencies_ms, 90)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def spawn_service(options):
+    """
+    Starts simulation_service.py on a free local port, passing `options` ({"--workers": 4, ...}) on.
+
+    Returns:
+    - Tuple of (process, url)
+    """
+    command = [sys.executable, os.path.join(ROOT, "simulation_service.py"), "--port", "0"]
+    for option, value in options.items():
+        if value is not None:
+            command += [option, str(value)]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if "listening on" not in line:
+        process.kill()
+        raise RuntimeError(f"Simulation service did not start: {line!r}")
+    return process, line.split()[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the simulation service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8502", help="service base URL")
+    parser.add_argument("--spawn", action="store_true", help="start a local service for the test")
+    parser.add_argument("--workers", type=int, default=None, help="service worker processes with --spawn")
+    parser.add_argument("--max-batch-size", type=int, default=None, help="service batch size with --spawn")
+    parser.add_argument("--max-queue", type=int, default=None, help="service queue bound with --spawn")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent connections")
+    parser.add_argument("--requests", type=int, default=2000, help="total requests")
+    parser.add_argument("--warmup", type=int, default=100, help="requests sent before measuring")
+    args = parser.parse_args(argv)
+
+    service_options = {"--workers": args.workers, "--max-batch-size": args.max_batch_size, "--max-queue": args.max_queue}
+    process, url = spawn_service(service_options) if args.spawn else (None, args.url)
+    try:
+        payloads = make_payloads(min(args.requests, 1000))
+        if args.warmup:
+            asyncio.run(run_load(url, min(args.concurrency, args.warmup), args.warmup, payloads))
+        stats = asyncio.run(run_load(url, args.concurrency, args.requests, payloads))
+    finally:
+        if process:
+            # SIGINT lets the service shut its worker pool down before exiting
+            process.send_signal(signal.SIGINT)
+            try:
+                process.wait(timeout=SHUTDOWN_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    print(f"{stats['requests']:,} requests over {args.concurrency} connections to {url}")
+    print(f"throughput: {stats['requests_per_second']:,.0f} requests/s ({stats['seconds']:.2f}s)")
+    print(f"latency:    p50 {stats['p50_ms']:.1f} ms, p90 {stats['p90_ms']:.1f} ms, "
+          f"p99 {stats['p99_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
+    print(f"statuses:   {', '.join(f'{status}: {count:,}' for status, count in stats['statuses'].items())}")
+    return 0 if set(stats["statuses"]) == {200} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
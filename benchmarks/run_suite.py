@@ -0,0 +1,377 @@
+# run_suite.py
+#
+# Benchmark suite for the model entry points, with stored results for
+# regression comparison.
+#
+# Usage:
+#     python benchmarks/run_suite.py                 # compare against the stored baseline
+#     python benchmarks/run_suite.py --save          # record a new baseline
+#     python benchmarks/run_suite.py -k drawdown     # only cases whose name contains "drawdown"
+#     python benchmarks/run_suite.py --threshold 0.5 # fail when a case is >50% slower than baseline
+#
+# Each case is timed timeit-style: the loop count is calibrated so one repeat
+# takes at least MIN_REPEAT_SECONDS, and the best per-call time over the repeats
+# is compared with the baseline. The latest run is always written to
+# results/latest.json; --save also writes it to results/baseline.json.
+# Exit code is 1 when any case regresses past the threshold or raises.
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from capital_optimizer import optimize_capital_strategy  # noqa: E402
+from family_risk_module import evaluate_family_risk  # noqa: E402
+from health_event_simulator import simulate_health_events  # noqa: E402
+from insurance_cost_model import get_insurance_costs  # noqa: E402
+from insurance_module import get_insurance_costs_over_time  # noqa: E402
+from ltc_module import LTC_SETTINGS, simulate_ltc_paths  # noqa: E402
+from monthly_cashflow_engine import simulate_monthly_cashflow  # noqa: E402
+from projection_engine import household_paths  # noqa: E402
+from projection_model import compute_retirement_drawdown  # noqa: E402
+from recommendation_rules import score_plans  # noqa: E402
+from scenario_engine import DEFAULT_OVERRIDES, compare_scenarios  # noqa: E402
+from simulation_pipeline import IncrementalSimulationPipeline, SimulationPipeline  # noqa: E402
+from simulator_core import (  # noqa: E402
+    generate_costs,
+    simulate_capital_allocation,
+    simulate_full_investment_strategy,
+    simulate_investment_strategy,
+)
+
+# Entry points that read st.session_state run in bare mode; silence the missing-context warnings
+for _logger in ("streamlit.runtime.scriptrunner_utils.script_run_context", "streamlit.runtime.state.session_state_proxy"):
+    logging.getLogger(_logger).setLevel(logging.ERROR)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_THRESHOLD = 1.0
+MIN_REPEAT_SECONDS = 0.1
+REPEATS = 7
+
+# Parameter grid shared by the cases; each case uses the axes relevant to it
+PARAMS = {
+    "age": (25, 45, 64),
+    "household_size": (1, 4),
+    "horizon": (20, 60),
+    "households": (1, 1000),
+}
+
+
+def _family(household_size):
+    return "single" if household_size == 1 else "family"
+
+
+def _dependents(household_size):
+    # Household = user, partner, then dependents
+    n = max(household_size - 2, 0)
+    return [4 + 3 * i for i in range(n)], ["healthy"] * n
+
+
+# --- Case setups: each returns a zero-argument callable ---
+def setup_generate_costs(age):
+    profile = {"age": age, "health_status": "chronic", "insurance_type": "Employer"}
+    return lambda: generate_costs(profile, {})
+
+
+def setup_get_insurance_costs(age, household_size, horizon):
+    return lambda: get_insurance_costs(
+        "Employer", "high_risk", _family(household_size), user_age=age, years_to_simulate=horizon
+    )
+
+
+def setup_get_insurance_costs_over_time(age, household_size, horizon):
+    profile = {"age": age, "family_status": _family(household_size), "insurance_type": "ESI",
+               "health_status": "high_risk"}
+    return lambda: get_insurance_costs_over_time(profile, horizon)
+
+
+def _cost_df(age):
+    return generate_costs({"age": age, "health_status": "chronic", "insurance_type": "Marketplace"}, {})
+
+
+def setup_simulate_investment_strategy(age):
+    cost_df = _cost_df(age)
+    return lambda: simulate_investment_strategy(cost_df)
+
+
+def setup_simulate_capital_allocation(age):
+    cost_df = _cost_df(age)
+    allocation = {"short_term": 20, "mid_term": 30, "long_term": 50}
+    return lambda: simulate_capital_allocation(cost_df, allocation, 20000, 500, "Savings", 20)
+
+
+def setup_simulate_full_investment_strategy(household_size, horizon):
+    profile = {"simulation_years": horizon, "family_status": _family(household_size), "start_401k_user": 10000,
+               "start_401k_partner": 5000}
+    allocations = {"short_term": 0.2, "mid_term": 0.3, "long_term": 0.5}
+    return lambda: simulate_full_investment_strategy(
+        profile, 90000, 0.15, 0.02, allocations, 0.02, 0.05, 0.07, 6000, 3000, 0.05, 4000, 2000
+    )
+
+
+def setup_household_paths(households, horizon):
+    # Step 2 income, savings and 401(k) projections for a batch of random households
+    rng = np.random.default_rng(0)
+    batch = {
+        "age": rng.integers(25, 64, households), "partner_age": rng.integers(25, 64, households),
+        "family": rng.random(households) < 0.5, "inflation": 0.03,
+        "net_income": rng.uniform(3_000, 12_000, households), "income_growth": 0.02,
+        "partner_net_income": rng.uniform(0, 8_000, households), "partner_income_growth": 0.02,
+        "savings_start": rng.uniform(0, 100_000, households), "savings_growth": 0.03,
+        "savings_contribution": rng.uniform(0, 12_000, households),
+        "start_401k": rng.uniform(0, 200_000, households), "growth_401k": 0.05,
+        "contribution_401k": rng.uniform(0, 20_000, households),
+        "partner_start_401k": rng.uniform(0, 100_000, households), "partner_growth_401k": 0.05,
+        "partner_contribution_401k": rng.uniform(0, 15_000, households),
+    }
+    return lambda: household_paths(batch, horizon)
+
+
+def setup_monthly_cashflow(households, horizon):
+    # Monthly cash flow of random scenarios with a January deductible and lump-sum contributions
+    rng = np.random.default_rng(0)
+    growth = 1.03 ** np.arange(horizon)
+    streams = {
+        name: np.outer(rng.uniform(low, high, households), growth)
+        for name, low, high in (("income", 40_000, 150_000), ("household", 30_000, 90_000), ("premiums", 0, 12_000),
+                                ("oop", 0, 8_000), ("debt", 0, 18_000), ("contributions", 0, 12_000))
+    }
+    timings = {"oop": "start", "contributions": "start", "premiums": "quarterly"}
+    return lambda: simulate_monthly_cashflow(streams, timings, opening_cash=5_000)
+
+
+def setup_simulate_health_events(age, horizon):
+    # Step 6 stress test: 10,000 chronic lives drawn over the horizon
+    return lambda: simulate_health_events(age, "chronic", horizon, n_lives=10_000, cost_inflation=0.05, seed=0)
+
+
+def setup_simulate_ltc_paths(age, horizon):
+    # LTC stress test: 10,000 paths spread over the Step 1 care settings
+    settings = np.random.default_rng(0).choice(list(LTC_SETTINGS), 10_000)
+    return lambda: simulate_ltc_paths(age, horizon, settings, inflation=0.05, seed=0)
+
+
+def setup_compute_retirement_drawdown(horizon):
+    rng = np.random.default_rng(0)
+    chart_ages = list(range(65, 65 + horizon))
+    deficits = rng.uniform(0, 40000, horizon).tolist()
+    savings = [150000.0] * 30
+    proj_401k = [400000.0] * 30
+    return lambda: compute_retirement_drawdown(chart_ages, deficits, savings, proj_401k, 20, 12000, 300000)
+
+
+def setup_evaluate_family_risk(age, household_size):
+    dep_ages, dep_statuses = _dependents(household_size)
+    profile = {"age": age, "health_status": "high_risk", "family_status": _family(household_size),
+               "partner_age": age - 2 if household_size > 1 else None, "partner_health_status": "chronic",
+               "dependent_ages": dep_ages, "dependent_health_statuses": dep_statuses}
+    return lambda: evaluate_family_risk(profile)
+
+
+def setup_six_step_flow(age, household_size):
+    dep_ages, dep_statuses = _dependents(household_size)
+    profile = {"age": age, "gender": "female", "health_status": "chronic", "family_status": _family(household_size),
+               "insurance_type": "Marketplace / Self-insured", "partner_age": age + 1 if household_size > 1 else None,
+               "partner_health_status": "healthy" if household_size > 1 else None,
+               "dependent_ages": dep_ages, "dependent_health_statuses": dep_statuses}
+    pipeline = SimulationPipeline()
+    return lambda: pipeline.run(profile)
+
+
+def setup_incremental_rerun(age, household_size):
+    # One slider change (401(k) growth) per call, as on a Streamlit rerun
+    profile = {"age": age, "health_status": "chronic", "family_status": _family(household_size),
+               "insurance_type": "Marketplace / Self-insured", "partner_age": age + 1 if household_size > 1 else None,
+               "partner_health_status": "healthy" if household_size > 1 else None}
+    pipeline = IncrementalSimulationPipeline()
+    rates = itertools.cycle((0.04, 0.05, 0.06))
+    return lambda: pipeline.run(profile, {"growth_401k": next(rates)})
+
+
+def setup_scenario_sweep(age, household_size):
+    # Step 6 multi-scenario comparison over the default override grid
+    profile = {"age": age, "health_status": "chronic", "family_status": _family(household_size),
+               "insurance_type": "Marketplace / Self-insured", "partner_age": age + 1 if household_size > 1 else None,
+               "partner_health_status": "healthy" if household_size > 1 else None}
+    return lambda: compare_scenarios(profile, overrides=DEFAULT_OVERRIDES)
+
+
+def setup_score_plans():
+    # Recommendation rules over a batch of 100,000 random client plans
+    rng = np.random.default_rng(0)
+    n_plans = 100_000
+    plans = {
+        "age": rng.integers(20, 70, n_plans), "family_history": rng.random(n_plans) < 0.3,
+        "health_status": rng.choice(["healthy", "chronic", "high_risk"], n_plans),
+        "insurance_type": rng.choice(["None", "Employer", "Marketplace"], n_plans),
+        "available_cash": rng.normal(500, 800, n_plans), "savings_balance": rng.normal(20_000, 30_000, n_plans),
+        "surplus": rng.normal(0, 10_000, n_plans), "capital_shift": rng.uniform(0, 20_000, n_plans),
+        "max_risk": rng.random(n_plans), "average_healthcare_pct": rng.uniform(2, 15, n_plans),
+    }
+    return lambda: score_plans(plans)
+
+
+def setup_optimize_capital_strategy(age, horizon):
+    # Step 6 optimization mode: coarse grid plus refinement over allocation, contribution and savings share
+    costs = 7000 * 1.05 ** np.arange(min(horizon, 85 - age + 1))
+    return lambda: optimize_capital_strategy(costs, available_cash=1500, savings_balance=80_000, min_reserve=19_320)
+
+
+# name -> (setup, parameter axes)
+CASES = {
+    "generate_costs": (setup_generate_costs, ("age",)),
+    "get_insurance_costs": (setup_get_insurance_costs, ("age", "household_size", "horizon")),
+    "get_insurance_costs_over_time": (setup_get_insurance_costs_over_time, ("age", "household_size", "horizon")),
+    "simulate_investment_strategy": (setup_simulate_investment_strategy, ("age",)),
+    "simulate_capital_allocation": (setup_simulate_capital_allocation, ("age",)),
+    "simulate_full_investment_strategy": (setup_simulate_full_investment_strategy, ("household_size", "horizon")),
+    "household_paths": (setup_household_paths, ("households", "horizon")),
+    "monthly_cashflow": (setup_monthly_cashflow, ("households", "horizon")),
+    "simulate_health_events": (setup_simulate_health_events, ("age", "horizon")),
+    "simulate_ltc_paths": (setup_simulate_ltc_paths, ("age", "horizon")),
+    "compute_retirement_drawdown": (setup_compute_retirement_drawdown, ("horizon",)),
+    "evaluate_family_risk": (setup_evaluate_family_risk, ("age", "household_size")),
+    "six_step_flow": (setup_six_step_flow, ("age", "household_size")),
+    "incremental_rerun": (setup_incremental_rerun, ("age", "household_size")),
+    "scenario_sweep": (setup_scenario_sweep, ("age", "household_size")),
+    "score_plans": (setup_score_plans, ()),
+    "optimize_capital_strategy": (setup_optimize_capital_strategy, ("age", "horizon")),
+}
+
+
+def iter_cases(name_filter=None):
+    """
+    Yields (case_id, setup, params) for every case and parameter combination.
+    """
+    for name, (setup, axes) in CASES.items():
+        for values in itertools.product(*(PARAMS[axis] for axis in axes)):
+            params = dict(zip(axes, values))
+            case_id = name + "".join(f"[{axis}={value}]" for axis, value in params.items())
+            if name_filter and name_filter not in case_id:
+                continue
+            yield case_id, setup, params
+
+
+def time_call(func, repeats=REPEATS, min_repeat_seconds=MIN_REPEAT_SECONDS):
+    """
+    Best and median seconds per call over `repeats` calibrated repeats.
+    """
+    func()  # warm-up (imports, caches, first-call allocation)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_repeat_seconds:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_repeat_seconds / elapsed) + 1)
+    samples = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {"best": min(samples), "median": float(np.median(samples)), "loops": number}
+
+
+def run_suite(name_filter=None, repeats=REPEATS):
+    results = {}
+    for case_id, setup, params in iter_cases(name_filter):
+        try:
+            results[case_id] = time_call(setup(**params), repeats=repeats)
+        except Exception as e:
+            results[case_id] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"machine": machine_info(), "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints a comparison table and returns the ids of cases that regressed or failed.
+    """
+    failures = []
+    print(f"{'case':<72} {'best (ms)':>11} {'baseline':>11} {'ratio':>7}")
+    for case_id, result in results.items():
+        if "error" in result:
+            print(f"{case_id:<72} {'ERROR':>11}  {result['error']}")
+            failures.append(case_id)
+            continue
+        best_ms = result["best"] * 1000
+        base = (baseline or {}).get(case_id)
+        if not base or "best" not in base:
+            print(f"{case_id:<72} {best_ms:>11.4f} {'-':>11} {'-':>7}")
+            continue
+        ratio = result["best"] / base["best"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  SLOWER"
+            failures.append(case_id)
+        print(f"{case_id:<72} {best_ms:>11.4f} {base['best'] * 1000:>11.4f} {ratio:>6.2f}x{flag}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the model entry points.")
+    parser.add_argument("-k", dest="name_filter", default=None, help="only run cases whose id contains this text")
+    parser.add_argument("--save", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown versus baseline before failing (1.0 = twice as slow)")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed repeats per case")
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"), help="baseline file")
+    args = parser.parse_args(argv)
+
+    stored = load_results(args.baseline)
+    if stored and stored.get("machine") != machine_info():
+        print("Note: baseline was recorded on a different machine; ratios are indicative only.")
+
+    results = run_suite(args.name_filter, repeats=args.repeats)
+    save_results(os.path.join(RESULTS_DIR, "latest.json"), results)
+    failures = compare(results, stored and stored["results"], args.threshold)
+
+    if args.save:
+        baseline = dict(stored["results"]) if stored and args.name_filter else {}
+        baseline.update({case_id: r for case_id, r in results.items() if "error" not in r})
+        save_results(args.baseline, baseline)
+        print(f"Baseline saved to {os.path.relpath(args.baseline, ROOT)}")
+        return 0
+
+    if failures:
+        print(f"{len(failures)} case(s) failed or regressed more than {args.threshold:.0%}: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# capital_optimizer.py
+#
+# Optimization mode for the Step 6 capital care fund: instead of guessing the
+# short/mid/long split, the monthly contribution and the share of savings, search
+# for the combination that best covers projected healthcare costs.
+#
+# Every candidate runs the simulate_investment_strategy fund model (contribute,
+# grow at the blended rate, pay the year's healthcare cost) at once as one row of
+# a (candidates x years) array, so a coarse grid plus a finer grid around its best
+# point covers tens of thousands of candidates in well under a second.
+
+import numpy as np
+
+from monte_carlo_engine import BUCKETS, DEFAULT_MEAN_RATES, simulate_capital_fund_paths
+from telemetry import instrument
+
+OBJECTIVES = ("min_unfunded", "max_remaining")
+
+DEFAULT_ALLOCATION_STEP = 10
+DEFAULT_CONTRIBUTION_STEPS = 21
+DEFAULT_SAVINGS_STEPS = 21
+DEFAULT_RESERVE_MONTHS = 3
+
+
+def allocation_grid(step=DEFAULT_ALLOCATION_STEP):
+    """
+    Every short/mid/long percentage split in multiples of `step` that sums to 100.
+
+    Returns:
+    - NumPy array of shape (splits, 3), columns in BUCKETS order
+    """
+    levels = np.arange(0, 101, step)
+    short, mid = np.meshgrid(levels, levels, indexing="ij")
+    keep = short + mid <= 100
+    return np.column_stack([short[keep], mid[keep], 100 - short[keep] - mid[keep]]).astype(float)
+
+
+@instrument()
+def evaluate_capital_candidates(healthcare_costs, allocations, monthly_contribution, savings_pct, savings_balance,
+                                rates=None, start_capital=0.0):
+    """
+    Vectorized objective: runs the capital care fund for every candidate.
+
+    Parameters:
+    - healthcare_costs: per-year healthcare costs paid from the fund (current age through 85)
+    - allocations: (candidates x 3) short/mid/long percentages
+    - monthly_contribution: per-candidate monthly contribution from income
+    - savings_pct: per-candidate percentage of savings moved into the fund in year 1
+    - savings_balance: current savings
+    - rates: dict of bucket -> annual growth rate (DEFAULT_MEAN_RATES for missing buckets)
+    - start_capital: one-off year 1 amount added to every candidate (e.g. Option 2 savings)
+
+    Returns:
+    - Dict of per-candidate arrays: "unfunded" (total costs the fund could not cover),
+      "remaining" (fund balance in the last year), "depletion_index" (first year with an
+      unfunded cost, -1 if none) and "committed" (savings moved plus total contributions)
+    """
+    costs = np.asarray(healthcare_costs, dtype=float)
+    allocations = np.asarray(allocations, dtype=float)
+    rates = {**DEFAULT_MEAN_RATES, **(rates or {})}
+    blended_growth = allocations @ np.array([rates[bucket] for bucket in BUCKETS]) / 100
+
+    n_years = len(costs)
+    if n_years == 0:
+        # Past the last simulated age: nothing is paid in, nothing is spent
+        zeros = np.zeros(len(blended_growth))
+        return {"unfunded": zeros, "remaining": zeros.copy(), "depletion_index": np.full(len(zeros), -1),
+                "committed": zeros.copy()}
+
+    annual = np.broadcast_to(np.asarray(monthly_contribution, dtype=float) * 12, blended_growth.shape)
+    start = np.asarray(savings_pct, dtype=float) / 100 * savings_balance + start_capital
+    # The year 1 lump sum enters as part of the first year's contribution
+    contributions = np.repeat(annual[:, None], n_years, axis=1)
+    contributions[:, 0] += start
+    returns = np.broadcast_to(blended_growth[:, None], contributions.shape)
+    paths = simulate_capital_fund_paths(returns, costs, contributions)
+
+    # Ignore float residue on large balances
+    short = paths["unfunded"] > 1e-6 * np.maximum(costs, 1.0)
+    return {
+        "unfunded": paths["unfunded"].sum(axis=1),
+        "remaining": paths["fund_balance"][:, -1],
+        "depletion_index": np.where(short.any(axis=1), short.argmax(axis=1), -1),
+        "committed": contributions.sum(axis=1),
+    }
+
+
+def _rank(metrics, objective):
+    # Best candidate first; ties on the objective go to the plan that commits the least money
+    unfunded = np.round(metrics["unfunded"], 2)
+    remaining = np.round(metrics["remaining"], 2)
+    if objective == "min_unfunded":
+        return np.lexsort((-remaining, metrics["committed"], unfunded))
+    return np.lexsort((metrics["committed"], unfunded, -remaining))
+
+
+def _within_limits(allocations, allocation_limits):
+    # Drops splits that put more than the allowed percentage in a bucket
+    if not allocation_limits:
+        return allocations
+    caps = np.array([allocation_limits.get(bucket, 100) for bucket in BUCKETS], dtype=float)
+    return allocations[(allocations <= caps).all(axis=1)]
+
+
+def _candidates(allocations, contributions, savings_pcts):
+    # Cartesian product of the three search axes, one row per candidate
+    a, c, s = np.meshgrid(np.arange(len(allocations)), contributions, savings_pcts, indexing="ij")
+    return allocations[a.ravel()], c.ravel(), s.ravel()
+
+
+def _search_axis(low, high, steps, center=None, width=None):
+    # Evenly spaced levels on [low, high], optionally narrowed to center +/- width (center always included)
+    if center is None:
+        return np.unique(np.linspace(low, high, steps).round())
+    levels = np.linspace(max(low, center - width), min(high, center + width), steps).round()
+    return np.unique(np.append(levels, center))
+
+
+@instrument()
+def optimize_capital_strategy(healthcare_costs, available_cash, savings_balance, min_reserve=0.0,
+                              objective="min_unfunded", rates=None, start_capital=0.0, allocation_limits=None,
+                              allocation_step=DEFAULT_ALLOCATION_STEP, contribution_steps=DEFAULT_CONTRIBUTION_STEPS,
+                              savings_steps=DEFAULT_SAVINGS_STEPS, refine=True):
+    """
+    Grid search for the allocation and contributions that best fund projected healthcare costs.
+
+    Parameters:
+    - healthcare_costs: per-year healthcare costs paid from the fund
+    - available_cash: free monthly cash; caps the monthly contribution
+    - savings_balance: current savings
+    - min_reserve: emergency reserve that must stay in savings; caps the share of savings used
+    - objective: "min_unfunded" (smallest unfunded cost, then least money committed) or
+      "max_remaining" (largest fund left at the end of the projection)
+    - rates: dict of bucket -> annual growth rate
+    - start_capital: one-off year 1 amount (e.g. Option 2 savings)
+    - allocation_limits: dict of bucket -> maximum percent (e.g. {"long_term": 50} to cap market exposure)
+    - refine: re-search a finer grid around the best coarse candidate
+
+    Returns:
+    - Dict with the best "allocation" (bucket -> percent), "monthly_contribution", "savings_pct",
+      its "unfunded", "remaining" and "depletion_index", and "evaluated" (candidates tried)
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}'; expected one of {', '.join(OBJECTIVES)}")
+
+    max_contribution = max(int(available_cash), 0)
+    max_savings_pct = 0.0
+    if savings_balance > 0:
+        max_savings_pct = float(np.clip((savings_balance - min_reserve) / savings_balance * 100, 0, 100))
+    max_savings_pct = np.floor(max_savings_pct)
+
+    def search(allocations, contributions, savings_pcts):
+        candidates = _candidates(allocations, contributions, savings_pcts)
+        metrics = evaluate_capital_candidates(healthcare_costs, *candidates, savings_balance,
+                                              rates=rates, start_capital=start_capital)
+        best = _rank(metrics, objective)[0]
+        return tuple(axis[best] for axis in candidates), {k: v[best] for k, v in metrics.items()}, len(candidates[0])
+
+    contributions = _search_axis(0, max_contribution, contribution_steps)
+    savings_pcts = _search_axis(0, max_savings_pct, savings_steps)
+    allocations = _within_limits(allocation_grid(allocation_step), allocation_limits)
+    if not len(allocations):
+        raise ValueError("No allocation satisfies the allocation limits")
+    best, metrics, evaluated = search(allocations, contributions, savings_pcts)
+
+    if refine:
+        # One finer pass: half-size allocation steps and a contribution / savings grid spanning one coarse step either side
+        allocation, contribution, savings_pct = best
+        nearby = allocation_grid(max(allocation_step // 2, 1))
+        nearby = _within_limits(nearby[np.abs(nearby - allocation).max(axis=1) <= allocation_step], allocation_limits)
+        nearby = np.unique(np.vstack([nearby, allocation]), axis=0)
+        contribution_width = max(np.diff(contributions).max(initial=0), 1)
+        savings_width = max(np.diff(savings_pcts).max(initial=0), 1)
+        fine_best, fine_metrics, fine_evaluated = search(
+            nearby,
+            _search_axis(0, max_contribution, min(int(2 * contribution_width) + 1, contribution_steps),
+                         contribution, contribution_width),
+            _search_axis(0, max_savings_pct, min(int(2 * savings_width) + 1, savings_steps), savings_pct, savings_width),
+        )
+        evaluated += fine_evaluated
+        # The fine grid contains the coarse best, so it can only match or improve on it
+        best, metrics = fine_best, fine_metrics
+
+    allocation, contribution, savings_pct = best
+    return {
+        "allocation": {bucket: float(pct) for bucket, pct in zip(BUCKETS, allocation)},
+        "monthly_contribution": int(contribution),
+        "savings_pct": int(savings_pct),
+        "unfunded": float(metrics["unfunded"]),
+        "remaining": float(metrics["remaining"]),
+        "depletion_index": int(metrics["depletion_index"]),
+        "objective": objective,
+        "evaluated": evaluated,
+    }
@@ -0,0 +1,210 @@
+# chart_service.py
+#
+# Renders the step charts from their plotted data and caches the encoded image
+# bytes, keyed by a hash of (chart, format, data), in a bounded LRU cache shared
+# by every rerun and session. Identical inputs are drawn once; after that a
+# rerun only sends the cached PNG/SVG.
+#
+# Figures are built on matplotlib.figure.Figure directly rather than through
+# pyplot, so no figure is ever registered with pyplot's figure manager, and each
+# one is cleared right after it is saved. Memory therefore stays flat no matter
+# how many reruns a session goes through.
+
+import io
+
+import streamlit as st
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+from projection_cache import ProjectionCache
+from telemetry import instrument
+
+# Bump whenever a renderer's styling changes so stale images are never served
+CHART_VERSION = 1
+
+CHART_FORMATS = ("png", "svg")
+# Same output as st.pyplot
+SAVEFIG_OPTIONS = {"bbox_inches": "tight", "dpi": 200}
+
+CHART_CACHE_MAX_ENTRIES = 256
+CHART_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+def _format_thousands(x, _):
+    return f"{int(round(x / 1000))}"
+
+
+# --- Renderers: plotted data in, Figure out ---
+def _health_risk_pies(year1_risk, lifetime_risk):
+    # Step 3: Year 1 vs lifetime average health risk
+    labels = ["Health Risk", ""]
+    colors = ["#FF9999", "#DDDDDD"]
+    sizes1 = [year1_risk, 1 - year1_risk]
+    sizes2 = [lifetime_risk, 1 - lifetime_risk]
+
+    fig = Figure(figsize=(10, 5))
+    ax1, ax2 = fig.subplots(1, 2)
+    ax1.pie(
+        sizes1,
+        labels=labels,
+        colors=colors,
+        autopct=lambda pct: f"{pct:.0f}%" if pct == round(sizes1[0]*100) else "",
+        startangle=90
+    )
+    ax1.axis("equal")
+    ax1.set_title("Year 1 Health Risk", fontsize=14, fontweight="bold")
+
+    ax2.pie(
+        sizes2,
+        labels=labels,
+        colors=colors,
+        autopct=lambda pct: f"{pct:.0f}%" if 50 < pct < 100 else "",
+        startangle=90
+    )
+    ax2.axis("equal")
+    ax2.set_title("Lifetime Average Risk", fontsize=14, fontweight="bold")
+    return fig
+
+
+def _projection_bars(ages, household, premiums, oop, income, pension, savings, proj_401k):
+    # Step 4: expenditures, income and savings + 401(k), side by side
+    fig = Figure(figsize=(24, 5))
+    axs = fig.subplots(1, 3)
+
+    # Annual Expenditures (stacked)
+    axs[0].bar(ages, household, label='Household')
+    axs[0].bar(ages, premiums, bottom=household, label='Premiums')
+    bottom_oop = [h + p for h, p in zip(household, premiums)]
+    axs[0].bar(ages, oop, bottom=bottom_oop, label='OOP')
+    axs[0].set_title("Annual Expenditures Projection")
+    axs[0].set_xlabel("Age")
+    axs[0].legend()
+    axs[0].grid(True)
+    axs[0].yaxis.set_major_formatter(FuncFormatter(_format_thousands))
+    axs[0].set_ylabel("Amount ($,000)")
+
+    # Annual Income (Total Income with the pension overlay)
+    axs[1].bar(ages, income, label="Total Income")
+    axs[1].bar(ages, pension, label="Pension Overlay", alpha=0.3)
+    axs[1].set_title("Annual Income Projection")
+    axs[1].set_xlabel("Age")
+    axs[1].yaxis.set_major_formatter(FuncFormatter(_format_thousands))
+    axs[1].legend()
+    axs[1].grid(True)
+    axs[1].set_ylabel("Amount ($,000)")
+
+    # Savings and 401(k)
+    axs[2].bar(ages, savings, label="Savings")
+    axs[2].bar(ages, proj_401k, bottom=savings, label="401(k)")
+    axs[2].set_title("Savings and 401(k) Projection")
+    axs[2].set_xlabel("Age")
+    axs[2].set_ylabel("Amount ($,000)")
+    axs[2].yaxis.set_major_formatter(FuncFormatter(_format_thousands))
+    axs[2].legend()
+    axs[2].grid(True)
+    axs[2].axhline(0, color='black', linewidth=0.8)
+    return fig
+
+
+def _income_sources_pie(labels, values):
+    # Step 4: retirement income sources (callers drop zero sources)
+    fig = Figure(figsize=(1.8, 1.8))
+    ax = fig.subplots()
+    ax.pie(
+        values,
+        labels=labels,
+        autopct=lambda pct: f"{pct:.1f}%" if pct > 2 else '',
+        startangle=90,
+        textprops={'fontsize': 7}
+    )
+    ax.axis('equal')
+    return fig
+
+
+def _share_pie(share, text, color):
+    # Step 5: one share of a whole, with `text` printed on the share's wedge only
+    fig = Figure(figsize=(1.5, 1.5))
+    ax = fig.subplots()
+    _, texts, autotexts = ax.pie(
+        [share, 1 - share],
+        labels=["", ""],
+        autopct=lambda pct: "",
+        startangle=90,
+        colors=[color, "#f0f0f0"],
+        textprops={'fontsize': 6, 'weight': 'bold'}
+    )
+    for txt in texts:
+        txt.set_text("")
+    for i, autotxt in enumerate(autotexts):
+        autotxt.set_text(text if i == 0 else "")
+    ax.axis("equal")
+    return fig
+
+
+def _capital_fund_vs_costs(ages, fund_values, healthcare_costs):
+    # Step 6: projected Capital Care Fund vs annual healthcare costs
+    bar_width = 0.4
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    ax.bar([a - bar_width/2 for a in ages], fund_values, width=bar_width, label="Capital Care Fund", color="#2a7cba")
+    ax.bar([a + bar_width/2 for a in ages], healthcare_costs, width=bar_width, label="Annual Healthcare Costs",
+           color="#ba2a2a")
+    ax.set_title("Capital Fund vs. Annual Healthcare Costs")
+    ax.set_xlabel("Age")
+    ax.set_ylabel("Dollars ($)")
+    ax.legend()
+    ax.grid(alpha=0.3)
+    return fig
+
+
+CHARTS = {
+    "health_risk_pies": _health_risk_pies,
+    "projection_bars": _projection_bars,
+    "income_sources_pie": _income_sources_pie,
+    "share_pie": _share_pie,
+    "capital_fund_vs_costs": _capital_fund_vs_costs,
+}
+
+# Process-wide cache of encoded charts
+CHART_CACHE = ProjectionCache(max_entries=CHART_CACHE_MAX_ENTRIES, max_bytes=CHART_CACHE_MAX_BYTES)
+
+
+def _savefig(fig, fmt):
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=fmt, **SAVEFIG_OPTIONS)
+    finally:
+        # Drop the artists now rather than whenever the figure is collected
+        fig.clear()
+    return buffer.getvalue()
+
+
+@instrument()
+def render_chart(name, fmt="png", cache=CHART_CACHE, **data):
+    """
+    Returns the encoded image of a chart, rendering it only on a cache miss.
+
+    Parameters:
+    - name: key of CHARTS
+    - fmt: "png" or "svg"
+    - cache: ProjectionCache holding the encoded images (default CHART_CACHE)
+    - data: keyword arguments of the renderer; lists, scalars and arrays are hashed by value
+
+    Returns:
+    - Image bytes
+    """
+    if name not in CHARTS:
+        raise ValueError(f"Unknown chart: {name}")
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    return cache.get_or_compute(
+        f"chart.{name}.v{CHART_VERSION}", (fmt, data), lambda: _savefig(CHARTS[name](**data), fmt)
+    )
+
+
+def show_chart(name, fmt="png", **data):
+    """
+    Displays a cached chart in place of st.pyplot, stretched to the container width.
+    """
+    image = render_chart(name, fmt=fmt, **data)
+    st.image(image.decode("utf-8") if fmt == "svg" else image, width="stretch")
@@ -0,0 +1,112 @@
+# cost_engine.py
+
+import numpy as np
+import pandas as pd
+
+from pricing_engine import PRICING
+from telemetry import instrument
+
+# Code tables used to index the per-insurance parameter arrays below
+INSURANCE_CODES = {label: i for i, label in enumerate(PRICING.cost_model_insurance)}
+HEALTH_CODES = {"healthy": 0, "chronic": 1, "high_risk": 2}
+
+# Share of total healthcare cost paid out-of-pocket, by insurance code
+OOP_SHARE = PRICING.cost_model["oop_share"]
+
+# Linear (non-chronic) premium model: base + slope * years since start
+BASE_PREMIUM = PRICING.cost_model["base_premium"]
+PREMIUM_SLOPE = PRICING.cost_model["premium_slope"]
+
+# Chronic premium model: base premium inflated at the chronic rate
+CHRONIC_BASE_PREMIUM = PRICING.cost_model["chronic_base_premium"]
+
+BASE_COST = PRICING.cost_model["base_cost"]
+COST_SLOPE = PRICING.cost_model["cost_slope"]
+CHRONIC_BASE_COST = PRICING.cost_model["chronic_base_cost"]
+CHRONIC_INFLATION_SPREAD = PRICING.cost_model["chronic_inflation_spread"]
+MAX_AGE = 85
+
+
+def encode_profiles(profiles):
+    """
+    Converts a list of profile dicts into the code arrays used by generate_cost_arrays.
+
+    Unknown insurance types fall back to "None" (uninsured), matching generate_costs.
+
+    Returns:
+    - Tuple of (start_ages, health_codes, insurance_codes) as NumPy arrays
+    """
+    start_ages = np.array([p["age"] for p in profiles], dtype=np.int64)
+    health_codes = np.array(
+        [HEALTH_CODES.get(p.get("health_status"), 0) for p in profiles], dtype=np.int64
+    )
+    insurance_codes = np.array(
+        [INSURANCE_CODES.get(p.get("insurance_type", "None"), INSURANCE_CODES["None"]) for p in profiles], dtype=np.int64
+    )
+    return start_ages, health_codes, insurance_codes
+
+
+@instrument()
+def generate_cost_arrays(start_ages, health_codes, insurance_codes, expense_inflation=0.05, max_age=MAX_AGE):
+    """
+    Computes the lifetime cost table for a batch of profiles at once.
+
+    Every output is a 2-D (profile x age) array aligned on years since each
+    profile's start age. Cells past `max_age` are zero and flagged False in "mask".
+
+    Parameters:
+    - start_ages: array of starting ages, one per profile
+    - health_codes: array of HEALTH_CODES values
+    - insurance_codes: array of INSURANCE_CODES values
+    - expense_inflation: scalar or per-profile array of healthcare inflation rates
+    - max_age: last simulated age (inclusive)
+
+    Returns:
+    - Dict with "Age", "Healthcare Cost", "OOP", "Premium" and "mask" arrays
+    """
+    start_ages = np.asarray(start_ages, dtype=np.int64)
+    health_codes = np.asarray(health_codes, dtype=np.int64)
+    insurance_codes = np.asarray(insurance_codes, dtype=np.int64)
+    inflation = np.broadcast_to(np.asarray(expense_inflation, dtype=float), start_ages.shape)
+
+    n_years = max(0, int(max_age - start_ages.min()) + 1) if start_ages.size else 0
+    years = np.arange(n_years)
+    ages = start_ages[:, None] + years[None, :]
+    mask = ages <= max_age
+
+    chronic = (health_codes == HEALTH_CODES["chronic"])[:, None]
+    oop_share = OOP_SHARE[insurance_codes][:, None]
+
+    # Chronic branch: compounded growth at expense inflation + spread
+    growth = (1 + inflation + CHRONIC_INFLATION_SPREAD)[:, None] ** years[None, :]
+    chronic_cost = CHRONIC_BASE_COST * growth
+    chronic_premium = CHRONIC_BASE_PREMIUM[insurance_codes][:, None] * growth
+
+    # Non-chronic branch: linear growth with years since start
+    linear_cost = BASE_COST + COST_SLOPE * years[None, :]
+    linear_premium = BASE_PREMIUM[insurance_codes][:, None] + PREMIUM_SLOPE[insurance_codes][:, None] * years[None, :]
+
+    total_cost = np.where(chronic, chronic_cost, linear_cost) * mask
+    premium = np.where(chronic, chronic_premium, linear_premium) * mask
+    oop = total_cost * oop_share
+
+    return {
+        "Age": ages,
+        "Healthcare Cost": total_cost,
+        "OOP": oop,
+        "Premium": premium,
+        "mask": mask,
+    }
+
+
+def cost_table(cost_arrays, row=0):
+    """
+    Builds the per-age DataFrame returned by generate_costs for one profile of a batch.
+    """
+    mask = cost_arrays["mask"][row]
+    return pd.DataFrame({
+        "Age": cost_arrays["Age"][row][mask],
+        "Healthcare Cost": cost_arrays["Healthcare Cost"][row][mask],
+        "OOP": cost_arrays["OOP"][row][mask],
+        "Premium": cost_arrays["Premium"][row][mask],
+    })
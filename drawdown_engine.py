@@ -0,0 +1,91 @@
+# drawdown_engine.py
+#
+# Vectorized retirement drawdown. Each household pays its yearly uncovered
+# deficit from one pool of capital until the pool runs out. Because capital
+# only ever decreases, the amount drawn by year t is min(cumulative deficit, capital),
+# so the whole schedule follows from a cumulative sum and a clip, with no loop over years.
+
+import numpy as np
+
+from telemetry import instrument
+
+RETIREMENT_AGE = 65
+
+# Gaps within this fraction of the deficits drawn so far are cumsum/diff rounding, not a shortfall
+GAP_TOLERANCE = 1e-9
+
+
+def retirement_deficits(ages, surplus, retirement_age=RETIREMENT_AGE):
+    """
+    Post-retirement ages and the yearly deficit (negative surplus) at each of them.
+
+    Returns:
+    - Tuple of (chart_ages, deficit_values) as lists
+    """
+    chart_ages = []
+    deficit_values = []
+    for age, value in zip(ages, surplus):
+        if age >= retirement_age:
+            chart_ages.append(age)
+            deficit_values.append(-value if value < 0 else 0)
+    return chart_ages, deficit_values
+
+
+@instrument()
+def drawdown_batch(deficits, capital, income=0.0):
+    """
+    Draws each household's yearly deficits from its starting capital.
+
+    Parameters:
+    - deficits: array (households x years), or (years,) for a single household
+    - capital: starting capital per household, scalar or (households,); negative values count as zero
+    - income: guaranteed income per year (pension, Social Security) netted off each deficit,
+      scalar, (households,) or (households x years)
+
+    Returns:
+    - Dict of arrays shaped like `deficits`: "used", "remaining", "gap";
+      and per household: "total_used", "capital_left" (capital minus total drawn) and
+      "depletion_index" (first year with no capital left, -1 if never)
+    """
+    deficits = np.asarray(deficits, dtype=float)
+    single = deficits.ndim == 1
+    deficits = np.atleast_2d(deficits)
+    capital = np.maximum(np.asarray(capital, dtype=float).reshape(-1, 1), 0.0)
+    income = np.asarray(income, dtype=float)
+    if income.ndim == 1:
+        income = income.reshape(-1, 1)
+
+    uncovered = np.maximum(deficits - income, 0.0)
+    uncovered_to_date = np.cumsum(uncovered, axis=1)
+    drawn_to_date = np.minimum(uncovered_to_date, capital)
+    used = np.diff(drawn_to_date, axis=1, prepend=0.0)
+    remaining = capital - drawn_to_date
+    gap = np.maximum(uncovered - used, 0.0)
+    gap[gap <= GAP_TOLERANCE * np.maximum(uncovered_to_date, 1.0)] = 0.0
+
+    if deficits.shape[1]:
+        depleted = remaining <= 0
+        depletion_index = np.where(depleted.any(axis=1), depleted.argmax(axis=1), -1)
+        total_used = drawn_to_date[:, -1]
+    else:
+        depletion_index = np.full(len(deficits), -1)
+        total_used = np.zeros(len(deficits))
+
+    result = {
+        "used": used,
+        "remaining": remaining,
+        "gap": gap,
+        "total_used": total_used,
+        "capital_left": capital[:, 0] - total_used,
+        "depletion_index": depletion_index,
+    }
+    if single:
+        result = {key: value[0] for key, value in result.items()}
+    return result
+
+
+def depletion_ages(chart_ages, depletion_index):
+    """
+    Maps depletion indices from drawdown_batch to ages (None where capital never runs out).
+    """
+    return [chart_ages[i] if i >= 0 else None for i in np.atleast_1d(depletion_index)]
@@ -1,37 +1,116 @@
 import streamlit as st
 
-from projected_health_risk import get_risk_trajectory
+import numpy as np
+
+from risk_tables import gather_age_trajectories
+from telemetry import instrument
+
+HIGH_RISK_THRESHOLD = 0.9
 
-def evaluate_family_risk(user_profile):
-    risks = {}
 
-    # User
-    risks["user"] = get_risk_trajectory(user_profile["age"], user_profile["health_status"])
+def get_family_members(user_profile):
+    """
+    Lists the household members whose risk is evaluated.
+
+    Returns:
+    - List of (name, age, health_status) tuples: user first, then partner and dependents
+    """
+    members = [("user", user_profile["age"], user_profile["health_status"])]
 
     # Partner
     if user_profile.get("family_status") == "family" and user_profile.get("partner_age") is not None:
         partner_status = user_profile.get("partner_health_status", "healthy")
-        risks["partner"] = get_risk_trajectory(user_profile["partner_age"], partner_status)
+        members.append(("partner", user_profile["partner_age"], partner_status))
 
     # Dependents
     dep_ages = user_profile.get("dependent_ages", [])
     dep_healths = user_profile.get("dependent_health_statuses", [])
     for i, (age, status) in enumerate(zip(dep_ages, dep_healths)):
-        risks[f"dependent_{i+1}"] = get_risk_trajectory(age, status)
+        members.append((f"dependent_{i+1}", age, status))
+    return members
+
 
-    # Average risk per year
-    trajectory_length = len(next(iter(risks.values())))
-    avg_risk_by_year = [
-        sum(r[year] for r in risks.values() if len(r) > year) / len(risks)
-        for year in range(trajectory_length)
-    ]
+@instrument()
+def evaluate_family_risk_batch(user_profiles, threshold=HIGH_RISK_THRESHOLD):
+    """
+    Evaluates the risk outlook of many households at once.
 
-    high_risk_flags = [name for name, r in risks.items() if max(r) >= 0.9]
+    Every member's trajectory is stacked into one padded years x members array aligned on
+    calendar year (row t is t years from now for everyone), with a mask marking the years each
+    member has a trajectory for (through age 85). Members of a family are contiguous columns,
+    so each per-family reduction is a single reduceat with no loop over years or members.
+
+    Parameters:
+    - user_profiles: list of profile dicts (see get_family_members)
+    - threshold: peak risk at or above which a member is flagged high-risk
+
+    Returns:
+    - Dict with:
+      - "avg_family_risk", "max_family_risk": float arrays (families x years), mean and max over the
+        members with a trajectory that year, NaN once no member has one
+      - "members_covered": int array (families x years)
+      - "horizon": years until the last member's trajectory ends, per family
+      - "family_index", "member_names", "trajectories" (members x years), "lengths", "high_risk":
+        one entry per member
+    """
+    names, family_index, ages, statuses = [], [], [], []
+    for family, profile in enumerate(user_profiles):
+        for name, age, status in get_family_members(profile):
+            names.append(name)
+            family_index.append(family)
+            ages.append(age)
+            statuses.append(status)
+
+    trajectories, lengths = gather_age_trajectories(ages, statuses)
+    family_index = np.asarray(family_index, dtype=np.intp)
+    n_years = trajectories.shape[1]
+    valid = np.arange(n_years)[:, None] < lengths[None, :]
+    # Risks are never negative, so zero padding leaves every per-year max unchanged
+    masked = np.where(valid, trajectories.T, np.float32(0.0))
+
+    if names:
+        # Every family has at least the user, so each family's columns start a non-empty run
+        starts = np.flatnonzero(np.r_[True, family_index[1:] != family_index[:-1]])
+        sums = np.add.reduceat(masked, starts, axis=1, dtype=np.float64).T
+        peaks = np.maximum.reduceat(masked, starts, axis=1).T
+        covered = np.add.reduceat(valid.view(np.int8), starts, axis=1, dtype=np.int32).T
+        horizon = np.maximum.reduceat(lengths, starts)
+    else:
+        sums = peaks = np.empty((0, n_years))
+        covered = np.empty((0, n_years), dtype=np.int32)
+        horizon = np.empty(0, dtype=np.intp)
+
+    has_members = covered > 0
+    return {
+        "avg_family_risk": np.where(has_members, sums / np.maximum(covered, 1), np.nan),
+        "max_family_risk": np.where(has_members, peaks, np.nan),
+        "members_covered": covered,
+        "horizon": horizon,
+        "family_index": family_index,
+        "member_names": names,
+        "trajectories": trajectories,
+        "lengths": lengths,
+        "high_risk": masked.max(axis=0, initial=0.0) >= threshold,
+    }
+
+
+@instrument()
+def evaluate_family_risk(user_profile):
+    """
+    Risk outlook for one household: per-member trajectories, the per-year family mean and max
+    (aligned on calendar year, until the last member's trajectory ends) and the high-risk members.
+    """
+    batch = evaluate_family_risk_batch([user_profile])
+    horizon = int(batch["horizon"][0])
+    names = batch["member_names"]
 
     return {
-        "individual_trajectories": risks,
-        "avg_family_risk": avg_risk_by_year,
-        "high_risk_members": high_risk_flags
+        "individual_trajectories": {
+            name: batch["trajectories"][i, :batch["lengths"][i]] for i, name in enumerate(names)
+        },
+        "avg_family_risk": batch["avg_family_risk"][0, :horizon].tolist(),
+        "max_family_risk": batch["max_family_risk"][0, :horizon].tolist(),
+        "high_risk_members": [name for name, flagged in zip(names, batch["high_risk"]) if flagged]
     }
 
 def get_family_risk_summary(user_profile, dependents=None, partner_age=None, partner_health_status=None):
@@ -0,0 +1,204 @@
+# health_event_simulator.py
+#
+# Stochastic health events for many simulated lives at once. Each life can be
+# diagnosed with cancer (initial treatment, continuing care and, for some,
+# end-of-life care), develop a chronic condition that costs the per-patient
+# amount every year after onset, or undergo gastric bypass surgery. Yearly
+# incidence depends on age and health status; event costs come from
+# cost_library, with its Medicare discounts from the Medicare age, and are
+# converted to out-of-pocket amounts.
+#
+# Every draw is made for the whole (lives x years) grid up front, and an
+# event's later years (continuing care, chronic years after onset) follow from
+# the first-event year with broadcast comparisons, so nothing loops over lives
+# or years. The resulting OOP paths can be summarized per age (mean, P90, P99)
+# or run through the capital care fund to stress-test it.
+
+import numpy as np
+
+from cost_library import HEALTHCARE_COSTS, get_cost
+from monte_carlo_engine import simulate_capital_fund_paths
+from pricing_engine import PRICING
+from telemetry import instrument
+
+HEALTH_STATUSES = ("healthy", "chronic", "high_risk")
+
+# Annual incidence per life from each age up to the next entry (approximate, per person-year)
+CANCER_INCIDENCE_BY_AGE = ((0, 0.001), (40, 0.0025), (50, 0.006), (60, 0.012), (70, 0.018), (80, 0.022))  # SEER
+CHRONIC_ONSET_BY_AGE = ((0, 0.01), (45, 0.03), (65, 0.05))  # CDC prevalence growth by age
+GASTRIC_BYPASS_BY_AGE = ((0, 0.0), (18, 0.001), (65, 0.0002))  # ASMBS procedures per adult
+
+# Incidence multipliers by health status; chronic and high-risk lives start with a chronic condition
+STATUS_MULTIPLIERS = {
+    "cancer": {"healthy": 1.0, "chronic": 1.3, "high_risk": 2.0},
+    "gastric_bypass": {"healthy": 0.1, "chronic": 1.0, "high_risk": 4.0},
+}
+CHRONIC_AT_START = ("chronic", "high_risk")
+
+# Cancer course after diagnosis: continuing care for up to this many years, and the share of
+# diagnoses (about 1 - 5-year relative survival, SEER) that end in end-of-life care within them
+CANCER_CONTINUING_YEARS = 4
+CANCER_FATALITY = 0.32
+
+# Share of an event's full cost paid out of pocket; cancer uses the NCI OOP estimates
+DEFAULT_OOP_SHARE = 0.20
+EVENT_OOP_SHARES = {
+    ("cancer", "initial"): HEALTHCARE_COSTS["cancer"]["oop_initial"] / HEALTHCARE_COSTS["cancer"]["initial"],
+    ("cancer", "end_of_life"): HEALTHCARE_COSTS["cancer"]["oop_eol"] / HEALTHCARE_COSTS["cancer"]["end_of_life"],
+}
+
+# (category, field) of every costed event, as stored in cost_library
+EVENTS = {
+    "cancer_initial": ("cancer", "initial"),
+    "cancer_continuing": ("cancer", "continuing"),
+    "cancer_end_of_life": ("cancer", "end_of_life"),
+    "chronic": ("chronic", "per_patient"),
+    "gastric_bypass": ("surgery", "gastric_bypass"),
+}
+
+OOP_PERCENTILES = (90, 99)
+
+
+def _event_oop(event, medicare):
+    # OOP cost of one event in today's dollars, with the Medicare discount where `medicare` is True
+    category, field = EVENTS[event]
+    share = EVENT_OOP_SHARES.get((category, field), DEFAULT_OOP_SHARE)
+    return np.where(medicare, get_cost(category, field, "medicare"), get_cost(category, field)) * share
+
+
+def _incidence(table, ages):
+    # Annual incidence at each age from an ((age, rate), ...) table
+    starts, rates = zip(*table)
+    return np.asarray(rates)[np.searchsorted(starts, ages, side="right") - 1]
+
+
+def _first_year(happens):
+    # Index of the first True per life, or the horizon when there is none
+    if not happens.shape[1]:
+        return np.zeros(len(happens), dtype=int)
+    return np.where(happens.any(axis=1), happens.argmax(axis=1), happens.shape[1])
+
+
+@instrument()
+def simulate_health_events(start_ages, health_statuses, n_years, n_lives=None, cost_inflation=0.0,
+                           base_oop=0.0, seed=None):
+    """
+    Draws health events and their out-of-pocket costs for many lives.
+
+    Parameters:
+    - start_ages: age at year 0, scalar or one per life
+    - health_statuses: "healthy", "chronic" or "high_risk", one status or one per life
+    - n_years: projection length
+    - n_lives: number of lives when start_ages and health_statuses are scalars
+    - cost_inflation: yearly growth of event costs
+    - base_oop: routine OOP paid every year alive on top of the events, scalar or per year, as
+      given (e.g. the deterministic, already inflated OOP curve)
+    - seed: int seed for a reproducible run
+
+    Returns:
+    - Dict with (lives x years) "oop" and "alive" arrays, and "event_counts": dict of event
+      name -> lives incurring it in each year
+    """
+    ages_at_start = np.atleast_1d(np.asarray(start_ages, dtype=float))
+    statuses = np.atleast_1d(np.asarray(health_statuses, dtype=object))
+    n_lives = n_lives or max(len(ages_at_start), len(statuses))
+    unknown = set(statuses) - set(HEALTH_STATUSES)
+    if unknown:
+        raise ValueError(f"Unknown health statuses: {', '.join(sorted(map(str, unknown)))}")
+    ages_at_start = np.broadcast_to(ages_at_start, (n_lives,))
+    status_names, status_index = np.unique(np.broadcast_to(statuses, (n_lives,)), return_inverse=True)
+
+    rng = np.random.default_rng(seed)
+    years = np.arange(n_years)
+    ages = ages_at_start[:, None] + years
+    medicare = ages >= PRICING.medicare_age
+
+    def draw(table, event=None):
+        # (lives x years) Bernoulli draws at the age- and status-specific rate
+        rates = _incidence(table, ages)
+        if event is not None:
+            multipliers = np.array([STATUS_MULTIPLIERS[event][status] for status in status_names])
+            rates = rates * multipliers[status_index][:, None]
+        return rng.random((n_lives, n_years)) < rates
+
+    # --- Cancer: diagnosis, continuing care, end of life ---
+    diagnosis = _first_year(draw(CANCER_INCIDENCE_BY_AGE, "cancer"))
+    fatal = rng.random(n_lives) < CANCER_FATALITY
+    death = np.where(fatal, diagnosis + rng.integers(1, CANCER_CONTINUING_YEARS + 2, n_lives), n_years)
+    since_diagnosis = years - diagnosis[:, None]
+    alive = years < death[:, None]
+    events = {
+        "cancer_initial": since_diagnosis == 0,
+        "cancer_continuing": (since_diagnosis >= 1) & (since_diagnosis <= CANCER_CONTINUING_YEARS) & alive,
+        "cancer_end_of_life": years == death[:, None],
+    }
+
+    # --- Chronic condition: from year 0 for chronic / high-risk lives, else from onset ---
+    chronic_at_start = np.isin(status_names, CHRONIC_AT_START)[status_index]
+    onset = np.where(chronic_at_start, 0, _first_year(draw(CHRONIC_ONSET_BY_AGE)))
+    events["chronic"] = (years >= onset[:, None]) & alive
+
+    # --- Gastric bypass: at most once ---
+    surgery = _first_year(draw(GASTRIC_BYPASS_BY_AGE, "gastric_bypass"))
+    events["gastric_bypass"] = (years == surgery[:, None]) & alive
+
+    event_oop = np.zeros((n_lives, n_years))
+    for event, happens in events.items():
+        event_oop += np.where(happens, _event_oop(event, medicare), 0.0)
+    oop = np.where(alive, np.broadcast_to(np.asarray(base_oop, dtype=float), (n_years,)), 0.0)
+    oop += event_oop * (1 + cost_inflation) ** years
+
+    return {
+        "oop": oop,
+        "alive": alive,
+        "event_counts": {event: happens.sum(axis=0) for event, happens in events.items()},
+    }
+
+
+def summarize_oop(oop, start_age, percentiles=OOP_PERCENTILES):
+    """
+    Distribution of annual OOP across lives for each age.
+
+    Returns:
+    - Dict with "ages", "mean" and one "p<percentile>" list per percentile
+    """
+    oop = np.asarray(oop, dtype=float)
+    summary = {"ages": list(range(int(start_age), int(start_age) + oop.shape[1])), "mean": oop.mean(axis=0).tolist()}
+    for percentile, band in zip(percentiles, np.percentile(oop, percentiles, axis=0)):
+        summary[f"p{percentile}"] = band.tolist()
+    return summary
+
+
+@instrument()
+def stress_test_capital_fund(oop, annual_contribution, growth_rate, start_value=0.0):
+    """
+    Runs the capital care fund against every simulated life's OOP costs.
+
+    Parameters:
+    - oop: (lives x years) OOP paths from simulate_health_events
+    - annual_contribution: yearly contribution to the fund
+    - growth_rate: fund growth per year
+    - start_value: fund value at the start
+
+    Returns:
+    - Dict with the overall "depletion_probability" (share of lives with a cost the fund could
+      not cover), "depletion_probability_by_year", and the "mean" and "p<percentile>" lifetime
+      unfunded OOP
+    """
+    oop = np.asarray(oop, dtype=float)
+    if oop.shape[1]:
+        unfunded_by_year = simulate_capital_fund_paths(
+            np.full(oop.shape, growth_rate), oop, annual_contribution, start_value
+        )["unfunded"]
+    else:
+        unfunded_by_year = np.zeros(oop.shape)
+    short = unfunded_by_year > 0
+    unfunded = unfunded_by_year.sum(axis=1)
+    result = {
+        "depletion_probability": float(short.any(axis=1).mean()),
+        "depletion_probability_by_year": np.cumsum(short, axis=1).astype(bool).mean(axis=0),
+        "mean": float(unfunded.mean()),
+    }
+    for percentile in OOP_PERCENTILES:
+        result[f"p{percentile}"] = float(np.percentile(unfunded, percentile))
+    return result
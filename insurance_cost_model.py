@@ -1,5 +1,126 @@
+import numpy as np
 import pandas as pd
 
+from pricing_engine import PRICING
+from telemetry import instrument
+
+# === Enum codes used to index the pricing tables ===
+INSURANCE_TYPE_CODES = PRICING.plan_premium.index["insurance"]
+HEALTH_STATUS_CODES = PRICING.plan_premium.index["health"]
+FAMILY_STATUS_CODES = PRICING.plan_premium.index["family"]
+
+# High-risk households are priced as high-risk for this many years, then as chronic
+HIGH_RISK_YEARS = PRICING.high_risk_years
+
+# Restored validated fallback logic for uninsured users (based on PMC10314135)
+UNINSURED_LIFETIME_OOP = PRICING.uninsured_lifetime_oop.values
+
+# Annual premium and OOP tables indexed by [insurance code, health code, family code].
+# The uninsured row carries no premium; its OOP is spread from UNINSURED_LIFETIME_OOP.
+PREMIUM_TABLE = PRICING.plan_premium.values
+OOP_TABLE = PRICING.plan_oop.values
+
+
+def _insurance_code(insurance_type):
+    # Fallback to Marketplace for anything that is neither uninsured nor employer
+    if insurance_type == "uninsured":
+        return INSURANCE_TYPE_CODES["uninsured"]
+    if insurance_type.lower() == "employer":
+        return INSURANCE_TYPE_CODES["Employer"]
+    return INSURANCE_TYPE_CODES["Marketplace"]
+
+
+def _encode_column(values, encoder):
+    # Encode each distinct value once, then broadcast back through the inverse index
+    uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    codes = np.array([encoder(u) for u in uniques], dtype=float)
+    return codes[inverse.reshape(-1)]
+
+
+def encode_households(households):
+    """
+    Encodes household records into the integer code arrays used by the pricing tables.
+
+    Parameters:
+    - households: list of dicts or a DataFrame with "insurance_type", "health_status"
+      and "family_status" fields
+
+    Returns:
+    - Tuple of (insurance_codes, health_codes, family_codes) as NumPy arrays
+    """
+    if isinstance(households, pd.DataFrame):
+        columns = {name: households[name].to_numpy() for name in ("insurance_type", "health_status", "family_status")}
+    else:
+        households = list(households)
+        columns = {
+            name: [h.get(name) for h in households]
+            for name in ("insurance_type", "health_status", "family_status")
+        }
+
+    insurance_codes = _encode_column(columns["insurance_type"], _insurance_code).astype(np.int64)
+    # Unknown health statuses are priced as healthy, as in get_insurance_costs
+    health_codes = _encode_column(columns["health_status"], lambda v: HEALTH_STATUS_CODES.get(v, 0)).astype(np.int64)
+    family_codes = _encode_column(columns["family_status"], lambda v: FAMILY_STATUS_CODES.get(v, np.nan))
+
+    unknown = np.isnan(family_codes) & (insurance_codes != INSURANCE_TYPE_CODES["uninsured"])
+    if unknown.any():
+        bad = sorted(set(np.asarray(columns["family_status"], dtype=object)[unknown].astype(str)))
+        raise ValueError(f"Unknown family_status value(s): {', '.join(bad)}")
+    family_codes = np.nan_to_num(family_codes).astype(np.int64)
+    return insurance_codes, health_codes, family_codes
+
+
+def get_insurance_costs_from_codes(insurance_codes, health_codes, family_codes, years_to_simulate=60) -> tuple:
+    """
+    Prices pre-encoded households with a single table gather.
+
+    Returns:
+    - Tuple of (premium_matrix, oop_matrix), each shaped (household x year)
+    """
+    insurance_codes = np.asarray(insurance_codes, dtype=np.int64)
+    health_codes = np.asarray(health_codes, dtype=np.int64)
+    family_codes = np.asarray(family_codes, dtype=np.int64)
+    years = np.arange(years_to_simulate)
+
+    uninsured = insurance_codes == INSURANCE_TYPE_CODES["uninsured"]
+    # High-risk insured households revert to chronic pricing after HIGH_RISK_YEARS
+    reverts = (health_codes == HEALTH_STATUS_CODES["high_risk"]) & ~uninsured
+    yearly_health = np.where(
+        reverts[:, None] & (years[None, :] >= HIGH_RISK_YEARS),
+        HEALTH_STATUS_CODES["chronic"],
+        health_codes[:, None],
+    )
+
+    # Gather on the flattened tables with one precomputed cell index per (household, year)
+    n_health, n_family = PREMIUM_TABLE.shape[1:]
+    cell = (insurance_codes[:, None] * n_health + yearly_health) * n_family + family_codes[:, None]
+    premium = PREMIUM_TABLE.ravel().take(cell)
+    oop = OOP_TABLE.ravel().take(cell)
+
+    if uninsured.any() and years_to_simulate > 0:
+        annual_oop = UNINSURED_LIFETIME_OOP[health_codes[uninsured]] / years_to_simulate
+        oop[uninsured] = annual_oop[:, None]
+
+    return premium, oop
+
+
+@instrument()
+def get_insurance_costs_batch(households, years_to_simulate=60) -> tuple:
+    """
+    Returns dense premium and OOP matrices for a whole census of households in one call.
+
+    Parameters:
+    - households: list of dicts or a DataFrame with "insurance_type", "health_status"
+      and "family_status" fields (same values accepted by get_insurance_costs)
+    - years_to_simulate: Number of years to return (default 60)
+
+    Returns:
+    - Tuple of (premium_matrix, oop_matrix), each shaped (household x year)
+    """
+    return get_insurance_costs_from_codes(*encode_households(households), years_to_simulate=years_to_simulate)
+
+
+@instrument()
 def get_insurance_costs(
     insurance_type: str,
     health_status: str,
@@ -20,64 +141,14 @@ def get_insurance_costs(
     Returns:
     - Tuple of (premium_list, oop_list), each with length `years`
     """
+    insurance_code = _insurance_code(insurance_type)
+    health_code = HEALTH_STATUS_CODES.get(health_status, 0)
+    if insurance_code == INSURANCE_TYPE_CODES["uninsured"]:
+        family_code = 0  # Uninsured pricing does not depend on family status
+    else:
+        family_code = FAMILY_STATUS_CODES[family_status]
 
-    # === Restored validated fallback logic for uninsured users (based on PMC10314135) ===
-    if insurance_type == "uninsured":
-        lifetime_oop_map = {
-            "healthy": 75000,
-            "chronic": 459000,
-            "high_risk": 472000,
-        }
-        annual_oop = lifetime_oop_map.get(health_status, 75000) / years_to_simulate
-        return [0] * years_to_simulate, [annual_oop] * years_to_simulate
-
-    # Define cost mappings for ESI and ACA separately
-    cost_structure = {
-        "Employer": {
-            "premium": {
-                "healthy": {"single": 1541, "family": 3082},
-                "chronic": {"single": 1920, "family": 3840},
-                "high_risk": {"single": 2400, "family": 4800},
-            },
-            "oop": {
-                "healthy": {"single": 2200, "family": 4400},
-                "chronic": {"single": 2600, "family": 5200},
-                "high_risk": {"single": 3100, "family": 6200},
-            }
-        },
-        "Marketplace": {
-            "premium": {
-                "healthy": {"single": 5100, "family": 10200},
-                "chronic": {"single": 5800, "family": 11600},
-                "high_risk": {"single": 6800, "family": 13600},
-            },
-            "oop": {
-                "healthy": {"single": 4500, "family": 9000},
-                "chronic": {"single": 5200, "family": 10400},
-                "high_risk": {"single": 6500, "family": 13000},
-            }
-        }
-    }
-
-    # Fallback to Employer if not specified
-    insurance_key = "Employer" if insurance_type.lower() == "employer" else "Marketplace"
-
-    premium_lookup = cost_structure[insurance_key]["premium"]
-    oop_lookup = cost_structure[insurance_key]["oop"]
-
-    if health_status == "chronic":
-        chronic_years = years_to_simulate  # chronic persists for life
-        premium = [premium_lookup["chronic"][family_status]] * chronic_years
-        oop = [oop_lookup["chronic"][family_status]] * chronic_years
-    elif health_status == "high_risk":
-        high_risk_years = min(10, years_to_simulate)
-        remaining_years = years_to_simulate - high_risk_years
-        premium = [premium_lookup["high_risk"][family_status]] * high_risk_years
-        premium += [premium_lookup["chronic"][family_status]] * remaining_years
-        oop = [oop_lookup["high_risk"][family_status]] * high_risk_years
-        oop += [oop_lookup["chronic"][family_status]] * remaining_years
-    else:  # healthy
-        premium = [premium_lookup["healthy"][family_status]] * years_to_simulate
-        oop = [oop_lookup["healthy"][family_status]] * years_to_simulate
-
-    return premium, oop
+    premium, oop = get_insurance_costs_from_codes(
+        [insurance_code], [health_code], [family_code], years_to_simulate=years_to_simulate
+    )
+    return premium[0].tolist(), oop[0].tolist()
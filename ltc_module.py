@@ -0,0 +1,150 @@
+# ltc_module.py
+#
+# Long-term care costs for the three Step 1 settings. Whether care is needed,
+# the age it starts and how long the stay lasts are distributions rather than a
+# fixed start age:
+#   - need: share of people who ever use the setting
+#   - onset age: normal
+#   - stay duration: lognormal (many short stays, a long tail of multi-year ones)
+#
+# The expected share of each year of age spent in care is built once at import
+# (a convolution of the onset and duration distributions on a monthly grid), so
+# the deterministic LTC projection for any number of scenarios is a table
+# lookup. simulate_ltc_paths draws individual onset / duration paths for stress
+# tests; their average converges to the same table.
+
+import math
+
+import numpy as np
+
+from telemetry import instrument
+
+LTC_NONE = "None"
+
+# Setting -> default monthly cost, lifetime need, onset age (mean, sd) and stay in years (mean, sigma)
+# (Genworth cost survey; HHS/ACL: ~70% of people turning 65 need some care, ~35% a nursing home;
+# NCAL and CDC average stays of about 2 years)
+LTC_SETTINGS = {
+    LTC_NONE: {"monthly_cost": 0, "need": 0.0, "onset_age": (80, 7), "stay_years": (1.0, 1.0)},
+    "Assisted Living (Private)": {"monthly_cost": 5900, "need": 0.70, "onset_age": (79, 7), "stay_years": (1.9, 0.9)},
+    "Nursing Home (Semi-Private)": {"monthly_cost": 9277, "need": 0.35, "onset_age": (83, 7), "stay_years": (2.3, 1.1)},
+    "Nursing Home (Private)": {"monthly_cost": 10646, "need": 0.35, "onset_age": (83, 7), "stay_years": (2.3, 1.1)},
+}
+LTC_SETTING_CODES = {setting: code for code, setting in enumerate(LTC_SETTINGS)}
+LTC_MONTHLY_COSTS = {setting: values["monthly_cost"] for setting, values in LTC_SETTINGS.items()}
+
+# Care never starts before this age; the expected-share table covers ages 0..MAX_LTC_AGE
+MIN_ONSET_AGE = 50
+MAX_LTC_AGE = 120
+MONTHS_PER_YEAR = 12
+
+
+def _lognormal_params(mean, sigma):
+    # mu of a lognormal with the given mean and log-sd
+    return math.log(mean) - sigma ** 2 / 2, sigma
+
+
+def _build_care_share_table():
+    # Shape (setting, age): expected fraction of each year of age spent in care
+    months = np.arange((MAX_LTC_AGE + 1) * MONTHS_PER_YEAR)
+    table = np.zeros((len(LTC_SETTINGS), MAX_LTC_AGE + 1))
+    for setting, code in LTC_SETTING_CODES.items():
+        values = LTC_SETTINGS[setting]
+        if not values["need"]:
+            continue
+        # Onset: probability of starting in each month, no earlier than MIN_ONSET_AGE
+        mean_age, sd = values["onset_age"]
+        onset = np.exp(-0.5 * (((months + 0.5) / MONTHS_PER_YEAR - mean_age) / sd) ** 2)
+        onset[months < MIN_ONSET_AGE * MONTHS_PER_YEAR] = 0
+        onset /= onset.sum()
+        # Stay: probability that a stay lasts longer than each number of months
+        mu, sigma = _lognormal_params(*values["stay_years"])
+        lags = np.log((months + 0.5) / MONTHS_PER_YEAR)
+        staying = 0.5 * np.array([math.erfc((lag - mu) / (sigma * math.sqrt(2))) for lag in lags])
+        in_care = values["need"] * np.convolve(onset, staying)[:len(months)]
+        table[code] = in_care.reshape(-1, MONTHS_PER_YEAR).mean(axis=1)
+    table.flags.writeable = False
+    return table
+
+
+LTC_CARE_SHARE = _build_care_share_table()
+
+
+def ltc_setting_codes(settings):
+    """
+    Codes of one or more LTC settings; None and "None" mean no long-term care.
+    """
+    settings = np.atleast_1d(np.asarray(settings, dtype=object))
+    settings = np.where(np.equal(settings, None), LTC_NONE, settings)
+    unknown = set(settings) - set(LTC_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown long-term care setting: {', '.join(sorted(map(str, unknown)))}")
+    names, index = np.unique(settings, return_inverse=True)
+    return np.array([LTC_SETTING_CODES[name] for name in names])[index]
+
+
+def _annual_costs(codes, monthly_costs):
+    # Yearly cost per scenario: the given monthly cost, or the setting's default
+    if monthly_costs is None:
+        return np.array([LTC_SETTINGS[name]["monthly_cost"] for name in LTC_SETTINGS], dtype=float)[codes] * 12
+    return np.broadcast_to(np.asarray(monthly_costs, dtype=float), codes.shape) * 12
+
+
+def expected_ltc_costs(start_age, n_years, settings, monthly_costs=None, inflation=0.0):
+    """
+    Expected yearly long-term care cost for a batch of scenarios.
+
+    Parameters:
+    - start_age: age in the first projection year
+    - n_years: projection length
+    - settings: LTC_SETTINGS key, one or one per scenario
+    - monthly_costs: monthly cost today, one or one per scenario; defaults to each setting's cost
+    - inflation: yearly cost growth, one or one per scenario
+
+    Returns:
+    - Array (scenarios x years)
+    """
+    codes = ltc_setting_codes(settings)
+    ages = np.minimum(int(start_age) + np.arange(n_years), MAX_LTC_AGE)
+    growth = (1 + np.asarray(inflation, dtype=float).reshape(-1, 1)) ** np.arange(n_years)
+    return _annual_costs(codes, monthly_costs)[:, None] * LTC_CARE_SHARE[codes][:, ages] * growth
+
+
+@instrument()
+def simulate_ltc_paths(start_age, n_years, settings, n_paths=None, monthly_costs=None, inflation=0.0, seed=None):
+    """
+    Draws whether, when and for how long care is needed, per path.
+
+    Parameters:
+    - start_age, n_years, monthly_costs, inflation: as for expected_ltc_costs
+    - settings: LTC_SETTINGS key, one or one per path
+    - n_paths: number of paths when `settings` is a single setting
+    - seed: int seed for a reproducible run
+
+    Returns:
+    - Dict with (paths x years) "cost", and per path "onset_age" and "stay_years"
+      (NaN and 0 for paths that never need care)
+    """
+    codes = ltc_setting_codes(settings)
+    n_paths = n_paths or len(codes)
+    codes = np.broadcast_to(codes, (n_paths,))
+    rng = np.random.default_rng(seed)
+
+    params = np.array([
+        (values["need"], *values["onset_age"], *_lognormal_params(*values["stay_years"]))
+        for values in LTC_SETTINGS.values()
+    ])[codes]
+    need, onset_mean, onset_sd, mu, sigma = params.T
+    needs_care = rng.random(n_paths) < need
+    onset = np.maximum(onset_mean + onset_sd * rng.standard_normal(n_paths), MIN_ONSET_AGE)
+    stay = np.exp(mu + sigma * rng.standard_normal(n_paths))
+    onset = np.where(needs_care, onset, np.nan)
+    stay = np.where(needs_care, stay, 0.0)
+
+    # Fraction of each projection year spent in care: overlap of [age, age + 1) with the stay
+    ages = int(start_age) + np.arange(n_years)
+    start = np.where(needs_care, onset, np.inf)[:, None]
+    share = np.clip(np.minimum(ages + 1, start + stay[:, None]) - np.maximum(ages, start), 0.0, 1.0)
+    growth = (1 + np.asarray(inflation, dtype=float).reshape(-1, 1)) ** np.arange(n_years)
+    cost = _annual_costs(codes, monthly_costs)[:, None] * share * growth
+    return {"cost": cost, "onset_age": onset, "stay_years": stay}
@@ -1,16 +1,15 @@
 import streamlit as st
 
 
-from step_1 import run_step_1
-from step_2 import run_step_2
-from step_3 import run_step_3
-from step_4 import run_step_4
-from step_5 import run_step_5
-from step_6 import run_step_6
-
-
 import os
-from insurance_cost_model import get_insurance_costs
+from telemetry import span
+
+# The step modules, plan_format and the projection stores pull in NumPy, pandas and
+# matplotlib; they are imported where they are first used, off the module-level
+# path, so the access gate renders before any of them load. Streamlit runs every
+# tab body on each rerun, so all six steps still load on the first run past the
+# gate: this defers their import, it does not load one step per tab
+# (see benchmarks/bench_startup.py).
 
 st.set_page_config(layout="wide", page_title="Health Strategy Simulator")
 
@@ -20,6 +19,27 @@ with st.sidebar:
     code = st.text_input("Enter beta access code:", type="password")
     if code != "HSS_Beta_2025v4!":
         st.stop()
+    if st.session_state.get("debug_mode", False):
+        from chart_service import CHART_CACHE
+        from projection_cache import PROJECTION_CACHE
+        from projection_store import session_memory_report
+
+        cache_stats = PROJECTION_CACHE.stats()
+        st.caption(
+            f"Projection cache v{cache_stats['version']}: {cache_stats['entries']} entries, "
+            f"{cache_stats['hits']} hits / {cache_stats['misses']} misses"
+        )
+        chart_stats = CHART_CACHE.stats()
+        st.caption(
+            f"Chart cache: {chart_stats['entries']} charts, {chart_stats['bytes'] / 1024:,.1f} KB, "
+            f"{chart_stats['hits']} hits / {chart_stats['misses']} misses"
+        )
+        memory = session_memory_report(st.session_state)
+        if memory["columns"]:
+            st.caption(
+                f"Projection store: {memory['store_bytes'] / 1024:,.1f} KB for {len(memory['columns'])} projections "
+                f"(as lists: {memory['list_bytes'] / 1024:,.1f} KB)"
+            )
 
 logo_path = "logo_capitalcare360.png"
 if os.path.exists(logo_path):
@@ -125,9 +145,9 @@ with tab0:
     st.subheader("📁 Manage Your Plan")
     upload_download_action = st.radio("Would you like to upload or download your health plan?", ["Download My Plan", "Upload a Saved Plan", "Skip for Now"], key="upload_download_radio")
 
-    import json
-
     if upload_download_action == "Download My Plan":
+        from plan_format import PLAN_FILE_EXTENSION, dumps_plan, session_plan
+
         plan_data = {
             "profile": {
                 "age": st.session_state.get("age"),
@@ -157,14 +177,21 @@ with tab0:
                 "pension_partner": st.session_state.get("pension_partner")
             }
         }
-        json_str = json.dumps(plan_data, indent=2)
-        st.download_button("📥 Download Your Plan", data=json_str, file_name="my_health_plan.json", mime="application/json")
+        plan_bytes = dumps_plan(session_plan(st.session_state, plan_data))
+        st.download_button("📥 Download Your Plan", data=plan_bytes, file_name=f"my_health_plan.{PLAN_FILE_EXTENSION}",
+                           mime="application/octet-stream")
 
     elif upload_download_action == "Upload a Saved Plan":
-        uploaded_file = st.file_uploader("📥 Upload your saved health plan (.json)", type="json")
+        from plan_format import PLAN_FILE_EXTENSION, PLAN_SCHEMA, loads_plan, restore_projections
+
+        uploaded_file = st.file_uploader(f"📥 Upload your saved health plan (.{PLAN_FILE_EXTENSION} or .json)",
+                                         type=[PLAN_FILE_EXTENSION, "json"])
         if uploaded_file:
-            imported_data = json.load(uploaded_file)
             try:
+                plan = loads_plan(uploaded_file.getvalue())
+                imported_data = {section: {} for section in PLAN_SCHEMA}
+                imported_data.update(plan["metadata"])
+                restore_projections(st.session_state, plan)
                 st.session_state.update({
                     "age": imported_data["profile"].get("age"),
                     "gender": imported_data["profile"].get("gender"),
@@ -190,20 +217,32 @@ with tab0:
 
     st.success("Ready? Use the sidebar or click above to start Step 1.")
 
-with tab1:
+with tab1, span("step_1"):
+    from step_1 import run_step_1
+
     run_step_1(tab1)
 
-with tab2:
+with tab2, span("step_2"):
+    from step_2 import run_step_2
+
     run_step_2(tab2)
 
-with tab3:
+with tab3, span("step_3"):
+    from step_3 import run_step_3
+
     run_step_3(tab3)
 
-with tab4:
+with tab4, span("step_4"):
+    from step_4 import run_step_4
+
     run_step_4(tab4)
 
-with tab5:
+with tab5, span("step_5"):
+    from step_5 import run_step_5
+
     run_step_5(tab5)
 
-with tab6:
+with tab6, span("step_6"):
+    from step_6 import run_step_6
+
     run_step_6(tab6)
@@ -0,0 +1,237 @@
+# monte_carlo_engine.py
+
+import numpy as np
+
+from telemetry import instrument
+
+BUCKETS = ("short_term", "mid_term", "long_term")
+
+# Default annual mean returns and volatilities per investment bucket
+DEFAULT_MEAN_RATES = {"short_term": 0.02, "mid_term": 0.05, "long_term": 0.07}
+DEFAULT_VOLATILITIES = {"short_term": 0.01, "mid_term": 0.08, "long_term": 0.15}
+
+RETURN_DISTRIBUTIONS = ("normal", "lognormal", "student_t")
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Floor for a single year's return so a bucket can never go below zero
+MIN_RETURN = -0.99
+
+# Unfunded costs within this fraction of the fund / cost size are rounding, not a shortfall
+FUND_TOLERANCE = 1e-9
+
+
+def draw_return_paths(mean_rate, volatility, n_paths, n_years, distribution="normal", rng=None, dof=5):
+    """
+    Draws a (paths x years) array of annual returns for one investment bucket.
+
+    Parameters:
+    - mean_rate: expected annual return (e.g. 0.05)
+    - volatility: annual standard deviation of returns
+    - distribution: "normal", "lognormal" (on 1 + r) or "student_t" (fat tails, `dof` degrees of freedom)
+    - rng: numpy Generator; pass np.random.default_rng(seed) for reproducible paths
+
+    Returns:
+    - NumPy array of shape (n_paths, n_years)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    shape = (n_paths, n_years)
+
+    if distribution == "normal":
+        returns = mean_rate + volatility * rng.standard_normal(shape)
+    elif distribution == "lognormal":
+        # Match the mean and standard deviation of the gross return 1 + r
+        sigma2 = np.log1p((volatility / (1 + mean_rate)) ** 2)
+        mu = np.log1p(mean_rate) - sigma2 / 2
+        returns = np.expm1(mu + np.sqrt(sigma2) * rng.standard_normal(shape))
+    elif distribution == "student_t":
+        if dof <= 2:
+            raise ValueError("student_t returns need dof > 2 to have a finite volatility")
+        scale = volatility * np.sqrt((dof - 2) / dof)
+        returns = mean_rate + scale * rng.standard_t(dof, shape)
+    else:
+        raise ValueError(f"Unknown return distribution: {distribution}. Expected one of {RETURN_DISTRIBUTIONS}")
+
+    return np.maximum(returns, MIN_RETURN)
+
+
+def draw_blended_returns(allocations, mean_rates, volatilities, n_paths, n_years, distribution="normal", seed=None):
+    """
+    Draws independent return paths per bucket and blends them with the allocation weights.
+
+    Parameters:
+    - allocations: dict of bucket -> weight (e.g. {"short_term": 0.2, "mid_term": 0.3, "long_term": 0.5})
+    - mean_rates, volatilities: dicts of bucket -> annual rate
+    - seed: int seed for a reproducible run
+
+    Returns:
+    - NumPy array of blended annual returns, shape (n_paths, n_years)
+    """
+    rng = np.random.default_rng(seed)
+    blended = np.zeros((n_paths, n_years))
+    for bucket in BUCKETS:
+        weight = allocations.get(bucket, 0)
+        if weight:
+            blended += weight * draw_return_paths(
+                mean_rates.get(bucket, DEFAULT_MEAN_RATES[bucket]),
+                volatilities.get(bucket, DEFAULT_VOLATILITIES[bucket]),
+                n_paths, n_years, distribution=distribution, rng=rng,
+            )
+    return blended
+
+
+def compound_with_contributions(returns, contributions, start_value=0.0):
+    """
+    Vectorized form of `value = value * (1 + r) + contribution`, repeated every year.
+
+    Uses V_t = G_t * (V_0 + sum_{s<=t} a_s / G_s) with G_t the cumulative growth factor,
+    so every path and year is computed at once.
+
+    Parameters:
+    - returns: (paths x years) array of annual returns
+    - contributions: scalar or per-year array of end-of-year contributions
+
+    Returns:
+    - (paths x years) array of end-of-year values
+    """
+    growth = np.cumprod(1 + returns, axis=-1)
+    contributions = np.broadcast_to(np.asarray(contributions, dtype=float), growth.shape)
+    return growth * (start_value + np.cumsum(contributions / growth, axis=-1))
+
+
+def simulate_capital_fund_paths(returns, healthcare_costs, annual_contribution, start_value=0.0):
+    """
+    Runs the capital care fund for every return path at once.
+
+    Each year mirrors simulate_investment_strategy: the contribution is added, the fund
+    grows, and healthcare costs are paid from it until it runs out. Dividing by the
+    cumulative growth factor turns this into a reflected random walk, which is solved
+    with a cumulative sum and a running minimum instead of a year-by-year loop.
+
+    Returns:
+    - Dict with (paths x years) arrays "fund_balance", "capital_used" and "unfunded"
+    """
+    returns = np.asarray(returns, dtype=float)
+    costs = np.broadcast_to(np.asarray(healthcare_costs, dtype=float), returns.shape)
+
+    growth = np.cumprod(1 + returns, axis=-1)
+    prev_growth = np.concatenate([np.ones_like(growth[..., :1]), growth[..., :-1]], axis=-1)
+
+    # Discounted increments; the start value enters as an extra first-year contribution
+    increments = annual_contribution / prev_growth - costs / growth
+    increments[..., 0] += start_value
+    walk = np.cumsum(increments, axis=-1)
+    floor = np.minimum(np.minimum.accumulate(walk, axis=-1), 0.0)
+    balance = (walk - floor) * growth
+
+    prev_balance = np.concatenate([np.full_like(balance[..., :1], start_value), balance[..., :-1]], axis=-1)
+    available = (prev_balance + annual_contribution) * (1 + returns)
+    capital_used = available - balance
+    unfunded = costs - capital_used
+    # The discounted walk leaves rounding residue proportional to the fund size; zeroing
+    # everything within tolerance also clears the negative residue of covered years
+    tolerance = np.maximum(available, costs, out=available)
+    np.maximum(tolerance, 1.0, out=tolerance)
+    tolerance *= FUND_TOLERANCE
+    np.copyto(unfunded, 0.0, where=unfunded <= tolerance)
+
+    return {"fund_balance": balance, "capital_used": capital_used, "unfunded": unfunded}
+
+
+def summarize_paths(values, percentiles=DEFAULT_PERCENTILES):
+    """
+    Returns a dict of percentile -> per-year band for a (paths x years) array.
+    """
+    bands = np.percentile(values, percentiles, axis=0)
+    return {p: band for p, band in zip(percentiles, bands)}
+
+
+@instrument()
+def simulate_investment_strategy_monte_carlo(
+    healthcare_costs,
+    annual_contribution,
+    allocations,
+    mean_rates=None,
+    volatilities=None,
+    n_paths=10000,
+    distribution="normal",
+    seed=None,
+    start_value=0.0,
+    percentiles=DEFAULT_PERCENTILES,
+):
+    """
+    Monte Carlo version of simulate_investment_strategy.
+
+    Parameters:
+    - healthcare_costs: per-year healthcare costs paid from the fund
+    - annual_contribution: yearly contribution (surplus share + reallocated premium)
+    - allocations: dict of bucket -> weight
+    - mean_rates, volatilities: dicts of bucket -> annual rate (defaults per bucket if omitted)
+    - n_paths: number of simulated return paths
+    - distribution: one of RETURN_DISTRIBUTIONS
+    - seed: int seed for a reproducible run
+
+    Returns:
+    - Dict with percentile bands for "fund_balance" and "capital_used", the overall
+      "depletion_probability" and the per-year "depletion_probability_by_year"
+    """
+    costs = np.asarray(healthcare_costs, dtype=float)
+    returns = draw_blended_returns(
+        allocations, mean_rates or {}, volatilities or {}, n_paths, len(costs),
+        distribution=distribution, seed=seed,
+    )
+    paths = simulate_capital_fund_paths(returns, costs, annual_contribution, start_value=start_value)
+
+    # A path is depleted in a year when the fund could not cover that year's cost
+    short = paths["unfunded"] > 0
+    return {
+        "percentiles": tuple(percentiles),
+        "fund_balance": summarize_paths(paths["fund_balance"], percentiles),
+        "capital_used": summarize_paths(paths["capital_used"], percentiles),
+        "depletion_probability": float(short.any(axis=1).mean()) if len(costs) else 0.0,
+        "depletion_probability_by_year": np.cumsum(short, axis=1).astype(bool).mean(axis=0),
+    }
+
+
+def simulate_full_investment_strategy_monte_carlo(
+    profile,
+    net_income_annual,
+    savings_rate,
+    savings_growth,
+    capital_allocations,
+    mean_rates=None,
+    volatilities=None,
+    n_paths=10000,
+    distribution="normal",
+    seed=None,
+    percentiles=DEFAULT_PERCENTILES,
+):
+    """
+    Monte Carlo version of the short/mid/long buckets in simulate_full_investment_strategy.
+
+    Returns:
+    - Dict of bucket -> percentile bands, plus "total" for the sum of all buckets
+    """
+    years = profile.get("simulation_years", 40)
+    mean_rates = mean_rates or {}
+    volatilities = volatilities or {}
+    rng = np.random.default_rng(seed)
+
+    annual_savings = net_income_annual * savings_rate * (1 + savings_growth) ** np.arange(years)
+    total = np.zeros((n_paths, years))
+    results = {"percentiles": tuple(percentiles)}
+    for bucket in BUCKETS:
+        returns = draw_return_paths(
+            mean_rates.get(bucket, DEFAULT_MEAN_RATES[bucket]),
+            volatilities.get(bucket, DEFAULT_VOLATILITIES[bucket]),
+            n_paths, years, distribution=distribution, rng=rng,
+        )
+        values = compound_with_contributions(
+            returns,
+            annual_savings * capital_allocations.get(bucket, 0),
+            start_value=profile.get(f"start_{bucket}", 0),
+        )
+        total += values
+        results[bucket] = summarize_paths(values, percentiles)
+    results["total"] = summarize_paths(total, percentiles)
+    return results
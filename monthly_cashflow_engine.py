@@ -0,0 +1,137 @@
+# monthly_cashflow_engine.py
+#
+# Optional monthly resolution for the yearly projections. Each annual stream
+# (income, premiums, OOP, household, debt, contributions, withdrawals) is spread
+# over the 12 months of its year by a timing profile, e.g. evenly, all in
+# January (an OOP deductible, a lump-sum contribution) or quarterly. The
+# monthly net cash flow and the running cash position then show the months in
+# which a household runs short even when the year as a whole balances.
+#
+# Everything is computed on (scenarios x years x 12) arrays: streams that share
+# a timing profile are netted at annual resolution first, so the cost is one
+# broadcast per distinct timing plus one cumulative sum. Timing weights always
+# sum to 1, so rolling any stream back up to years returns its annual column.
+
+import numpy as np
+
+from telemetry import instrument
+
+MONTHS_PER_YEAR = 12
+
+# Cash coming in and going out; every stream is an annual amount >= 0
+INFLOWS = ("income", "withdrawals")
+OUTFLOWS = ("household", "premiums", "oop", "debt", "contributions")
+
+# Share of the annual amount paid in each month
+TIMINGS = {
+    "monthly": np.full(MONTHS_PER_YEAR, 1 / MONTHS_PER_YEAR),
+    "quarterly": np.tile([0.25, 0, 0], 4),
+    "start": np.eye(MONTHS_PER_YEAR)[0],
+    "end": np.eye(MONTHS_PER_YEAR)[-1],
+}
+DEFAULT_TIMING = "monthly"
+
+# Cash positions this close to zero are rounding, not a shortfall
+SHORTFALL_TOLERANCE = 0.005
+
+
+def timing_weights(timing):
+    """
+    Monthly weights of a timing profile.
+
+    Parameters:
+    - timing: key of TIMINGS, or 12 non-negative weights summing to 1
+
+    Returns:
+    - Array of 12 weights
+    """
+    if isinstance(timing, str):
+        if timing not in TIMINGS:
+            raise ValueError(f"Unknown cash flow timing: {timing}")
+        return TIMINGS[timing]
+    weights = np.asarray(timing, dtype=float)
+    if weights.shape != (MONTHS_PER_YEAR,) or (weights < 0).any() or not np.isclose(weights.sum(), 1):
+        raise ValueError("Custom timings must be 12 non-negative weights summing to 1")
+    return weights
+
+
+def monthly_flows(annual, timing=DEFAULT_TIMING):
+    """
+    Spreads annual amounts (..., years) over their months.
+
+    Returns:
+    - Array (..., years, 12)
+    """
+    return np.asarray(annual, dtype=float)[..., None] * timing_weights(timing)
+
+
+def roll_up(monthly):
+    """
+    Annual totals of monthly values (..., years, 12).
+
+    Returns:
+    - Array (..., years)
+    """
+    return np.asarray(monthly).sum(axis=-1)
+
+
+@instrument()
+def simulate_monthly_cashflow(streams, timings=None, opening_cash=0.0, carry_cash=False):
+    """
+    Monthly net cash flow, cash position and liquidity shortfalls for a batch of scenarios.
+
+    Parameters:
+    - streams: dict of INFLOWS / OUTFLOWS names -> annual amounts, (years,) or (scenarios x years);
+      streams left out are zero
+    - timings: dict of stream name -> timing (see timing_weights); unlisted streams are paid monthly
+    - opening_cash: cash on hand at the start of every year, or only at the start of the
+      projection with carry_cash; scalar or one value per scenario
+    - carry_cash: carry each year's closing cash into the next year instead of measuring
+      every year on its own
+
+    Returns:
+    - Dict with "net", "cash" and "shortfall" (scenarios x years x 12), "annual_net"
+      (scenarios x years), and per scenario "shortfall_months", "first_shortfall" (month index
+      from the start of the projection, -1 if none) and "peak_shortfall"
+    """
+    if not streams:
+        raise ValueError("No cash flow streams given")
+    unknown = set(streams) - set(INFLOWS + OUTFLOWS)
+    if unknown:
+        raise ValueError(f"Unknown cash flow streams: {', '.join(sorted(unknown))}")
+    timings = timings or {}
+    names = list(streams)
+    signed = np.broadcast_arrays(*(
+        np.atleast_2d(np.asarray(streams[name], dtype=float)) * (1 if name in INFLOWS else -1) for name in names
+    ))
+    n_scenarios, n_years = signed[0].shape
+
+    # Net the streams that share a timing at annual resolution, then spread each group once
+    groups = {}
+    for name, values in zip(names, signed):
+        weights = timing_weights(timings.get(name, DEFAULT_TIMING))
+        key = weights.tobytes()
+        annual, _ = groups.get(key, (0.0, weights))
+        groups[key] = (annual + values, weights)
+    net = np.zeros((n_scenarios, n_years, MONTHS_PER_YEAR))
+    for annual, weights in groups.values():
+        net += monthly_flows(annual, weights)
+
+    opening = np.asarray(opening_cash, dtype=float).reshape(-1, 1, 1)
+    if carry_cash:
+        cash = opening + np.cumsum(net.reshape(n_scenarios, -1), axis=1).reshape(net.shape)
+    else:
+        cash = opening + np.cumsum(net, axis=2)
+    shortfall = np.where(cash < -SHORTFALL_TOLERANCE, -cash, 0.0)
+
+    short = shortfall.reshape(n_scenarios, -1) > 0
+    first = short.argmax(axis=1) if short.size else np.zeros(n_scenarios, dtype=int)
+    return {
+        "net": net,
+        "cash": cash,
+        "shortfall": shortfall,
+        "annual_net": roll_up(net),
+        "shortfall_months": short.sum(axis=1),
+        "first_shortfall": np.where(short.any(axis=1), first, -1),
+        "peak_shortfall": shortfall.reshape(n_scenarios, -1).max(axis=1, initial=0.0),
+    }
@@ -0,0 +1,262 @@
+# plan_format.py
+#
+# Versioned plan file format. A plan is the small metadata dict the app already
+# exports (profile, insurance, financials, capital strategy, retirement) plus the
+# session's yearly projections. Files are NumPy .npz archives: the metadata of
+# every plan is one JSON member, and each projection is one (plans x years)
+# float64 member, so a file can hold any number of plans and loads without
+# parsing a number at a time. Legacy JSON plan files are still readable.
+
+import io
+import json
+import zipfile
+
+import numpy as np
+
+from projection_store import get_store, put_projection
+
+PLAN_FORMAT = "health-strategy-plan"
+PLAN_FORMAT_VERSION = 1
+PLAN_FILE_EXTENSION = "plan"
+
+META_MEMBER = "meta"
+PROJECTION_PREFIX = "proj/"
+
+NUMBER = (int, float)
+
+# Metadata sections -> field -> allowed types (None is always allowed); a section
+# mapped to None is free-form JSON (the Step 1 profile dict, the recommendation report)
+PLAN_SCHEMA = {
+    "profile": None,
+    "insurance": {"type": (str,), "premium": NUMBER, "oop": NUMBER},
+    "financials": {
+        "monthly_income": NUMBER,
+        "net_user_income": NUMBER,
+        "monthly_expenses": NUMBER,
+        "savings_balance": NUMBER,
+        "debt_monthly": NUMBER,
+    },
+    "capital_strategy": {"short_term": NUMBER, "mid_term": NUMBER, "long_term": NUMBER},
+    "retirement": {"pension_user": NUMBER, "pension_partner": NUMBER},
+    "report": None,
+}
+
+
+class PlanFormatError(ValueError):
+    """
+    Raised when a plan or plan file does not match the plan format.
+    """
+
+
+def _jsonable(value):
+    # NumPy scalars / arrays from session state become plain Python values
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def make_plan(metadata, projections=None, start_age=None):
+    """
+    Builds a plan.
+
+    Parameters:
+    - metadata: dict of section -> fields (see PLAN_SCHEMA)
+    - projections: dict of name -> yearly values, first entry at `start_age`
+    - start_age: age of the first projection year
+
+    Returns:
+    - Plan dict with "version", "metadata", "start_age" and "projections" (name -> float64 array)
+    """
+    plan = {
+        "version": PLAN_FORMAT_VERSION,
+        "metadata": _jsonable(metadata or {}),
+        "start_age": _jsonable(start_age),
+        "projections": {name: np.asarray(values, dtype=np.float64) for name, values in (projections or {}).items()},
+    }
+    validate_plan(plan)
+    return plan
+
+
+def validate_plan(plan):
+    """
+    Checks a plan against the format; raises PlanFormatError describing the first problem.
+    """
+    _validate_metadata(plan)
+    for name, values in plan.get("projections", {}).items():
+        if not isinstance(values, np.ndarray) or values.ndim != 1:
+            raise PlanFormatError(f"Projection '{name}' must be a 1-D array")
+        _check_finite(name, values)
+
+
+def _check_finite(name, values):
+    if not np.isfinite(values).all():
+        raise PlanFormatError(f"Projection '{name}' contains non-finite values")
+
+
+def _validate_metadata(plan):
+    if not isinstance(plan, dict):
+        raise PlanFormatError("Plan must be a dict")
+    version = plan.get("version")
+    if not isinstance(version, int) or not 0 <= version <= PLAN_FORMAT_VERSION:
+        raise PlanFormatError(f"Unsupported plan version: {version!r}")
+
+    metadata = plan.get("metadata")
+    if not isinstance(metadata, dict):
+        raise PlanFormatError("Plan metadata must be a dict")
+    for section, fields in metadata.items():
+        if section not in PLAN_SCHEMA:
+            raise PlanFormatError(f"Unknown plan section '{section}'")
+        if not isinstance(fields, dict):
+            raise PlanFormatError(f"Plan section '{section}' must be a dict")
+        schema = PLAN_SCHEMA[section]
+        if schema is None:
+            continue
+        for field, value in fields.items():
+            if field not in schema:
+                raise PlanFormatError(f"Unknown field '{section}.{field}'")
+            if value is not None and not isinstance(value, schema[field]):
+                raise PlanFormatError(f"Field '{section}.{field}' has invalid type {type(value).__name__}")
+
+    start_age = plan.get("start_age")
+    if start_age is not None and not isinstance(start_age, int):
+        raise PlanFormatError("Plan start_age must be an int")
+
+
+def session_plan(session, metadata):
+    """
+    Plan from export metadata plus every projection in the session's projection store.
+    """
+    store = get_store(session)
+    return make_plan(metadata, {name: store.get(name) for name in store.columns}, start_age=store.start_age)
+
+
+def restore_projections(session, plan):
+    """
+    Writes a loaded plan's projections back into the session's projection store.
+    """
+    for name, values in plan["projections"].items():
+        put_projection(session, name, values, start_age=plan["start_age"])
+
+
+# --- Encoding ---
+def dumps_plans(plans):
+    """
+    Encodes plans into one compressed .npz archive.
+
+    Returns:
+    - bytes
+    """
+    for plan in plans:
+        validate_plan(plan)
+    names = sorted({name for plan in plans for name in plan["projections"]})
+    members = {}
+    for name in names:
+        columns = [plan["projections"].get(name) for plan in plans]
+        lengths = [len(values) if values is not None else 0 for values in columns]
+        block = np.zeros((len(plans), max(lengths)), dtype=np.float64)
+        for row, values in enumerate(columns):
+            if values is not None:
+                block[row, :len(values)] = values
+        members[PROJECTION_PREFIX + name] = block
+
+    meta = {
+        "format": PLAN_FORMAT,
+        "version": PLAN_FORMAT_VERSION,
+        "plans": [
+            {
+                "metadata": plan["metadata"],
+                "start_age": plan["start_age"],
+                "lengths": {name: len(values) for name, values in plan["projections"].items()},
+            }
+            for plan in plans
+        ],
+    }
+    members[META_MEMBER] = np.frombuffer(json.dumps(meta, separators=(",", ":")).encode("utf-8"), dtype=np.uint8)
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **members)
+    return buffer.getvalue()
+
+
+def _legacy_plan(data):
+    # Pre-format JSON export: metadata only, no projections
+    try:
+        metadata = json.loads(data)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise PlanFormatError(f"Not a plan file: {e}") from e
+    plan = {"version": 0, "metadata": metadata, "start_age": None, "projections": {}}
+    validate_plan(plan)
+    return plan
+
+
+def loads_plans(data):
+    """
+    Decodes a plan archive (or a legacy JSON plan) into a list of validated plans.
+    """
+    if not data.startswith(b"PK"):
+        return [_legacy_plan(data)]
+    try:
+        archive = np.load(io.BytesIO(data), allow_pickle=False)
+        meta = json.loads(archive[META_MEMBER].tobytes())
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        raise PlanFormatError(f"Not a plan file: {e}") from e
+    if not isinstance(meta, dict) or meta.get("format") != PLAN_FORMAT:
+        raise PlanFormatError("Not a plan file")
+    if not isinstance(meta.get("version"), int) or meta["version"] > PLAN_FORMAT_VERSION:
+        raise PlanFormatError(f"Plan file version {meta.get('version')!r} is newer than this app supports")
+
+    blocks = {}
+    plans = []
+    try:
+        for row, entry in enumerate(meta["plans"]):
+            projections = {}
+            for name, length in entry["lengths"].items():
+                if name not in blocks:
+                    blocks[name] = archive[PROJECTION_PREFIX + name]
+                projections[name] = blocks[name][row, :length]
+            plans.append({
+                "version": meta["version"],
+                "metadata": entry["metadata"],
+                "start_age": entry["start_age"],
+                "projections": projections,
+            })
+    except (KeyError, TypeError, IndexError, AttributeError) as e:
+        raise PlanFormatError(f"Malformed plan file: {e!r}") from e
+    # Projections are checked once per (plans x years) block rather than once per plan
+    for name, block in blocks.items():
+        if block.ndim != 2 or block.shape[0] != len(plans):
+            raise PlanFormatError(f"Projection '{name}' has shape {block.shape}, expected {len(plans)} rows")
+        _check_finite(name, block)
+    for plan in plans:
+        _validate_metadata(plan)
+    return plans
+
+
+def dumps_plan(plan):
+    return dumps_plans([plan])
+
+
+def loads_plan(data):
+    """
+    Decodes a single-plan file; raises PlanFormatError if it holds more than one plan.
+    """
+    plans = loads_plans(data)
+    if len(plans) != 1:
+        raise PlanFormatError(f"Expected one plan, found {len(plans)}")
+    return plans[0]
+
+
+def write_plans(path, plans):
+    with open(path, "wb") as f:
+        f.write(dumps_plans(plans))
+
+
+def read_plans(path):
+    with open(path, "rb") as f:
+        return loads_plans(f.read())
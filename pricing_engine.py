@@ -0,0 +1,257 @@
+# pricing_engine.py
+#
+# Single source for insurance pricing. The rate tables (plan premium / OOP,
+# national averages, age and risk corrections, the Medicare transition and the
+# lifetime cost model parameters) live in pricing_tables.json and are loaded
+# once, at import, into read-only NumPy arrays indexed by integer codes. Callers
+# resolve a whole projection with one gather per table instead of walking
+# dicts year by year.
+
+import json
+import os
+
+import numpy as np
+
+from telemetry import instrument
+
+PRICING_TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pricing_tables.json")
+
+# Application insurance labels -> national average plan keys
+PLAN_ALIASES = {
+    "Employer-based": "esi",
+    "Employer": "esi",
+    "Marketplace / Self-insured": "aca",
+    "Marketplace": "aca",
+    "None": "uninsured",
+}
+
+
+class RateTable:
+    """
+    Array of rates with one labelled axis per dimension.
+    """
+
+    def __init__(self, name, axes, values):
+        self.name = name
+        self.axes = {axis: tuple(labels) for axis, labels in axes.items()}
+        self.index = {axis: {label: i for i, label in enumerate(labels)} for axis, labels in self.axes.items()}
+        self.values = np.array(values, dtype=float)
+        expected = tuple(len(labels) for labels in self.axes.values())
+        if self.values.shape != expected:
+            raise ValueError(f"Rate table '{name}' has shape {self.values.shape}, axes expect {expected}")
+        self.values.flags.writeable = False
+
+    def code(self, axis, label, default=-1):
+        return self.index[axis].get(label, default)
+
+    def lookup(self, *codes, default=1.0):
+        """
+        Vectorized gather; `codes` broadcast together, and any code of -1 returns `default`.
+        """
+        codes = np.broadcast_arrays(*[np.asarray(c, dtype=np.int64) for c in codes])
+        known = np.logical_and.reduce([c >= 0 for c in codes])
+        rates = self.values[tuple(np.where(known, c, 0) for c in codes)]
+        return np.where(known, rates, default)
+
+
+class PricingTables:
+    """
+    Every rate table of one pricing_tables.json file.
+    """
+
+    def __init__(self, data):
+        self.version = data["version"]
+
+        plan_costs = data["plan_costs"]
+        self.plan_premium = RateTable("plan_costs.premium", plan_costs["axes"], plan_costs["premium"])
+        self.plan_oop = RateTable("plan_costs.oop", plan_costs["axes"], plan_costs["oop"])
+
+        uninsured = data["uninsured_lifetime_oop"]
+        self.uninsured_lifetime_oop = RateTable("uninsured_lifetime_oop", uninsured["axes"], uninsured["values"])
+        self.uninsured_end_age = uninsured["end_age"]
+
+        national = data["national_averages"]
+        self.national_premium = RateTable("national_averages.premium", national["axes"], national["premium"])
+        self.national_oop = RateTable("national_averages.oop", national["axes"], national["oop"])
+        self.age_factor_base_age = national["age_factor"]["base_age"]
+        self.age_factor_increase = national["age_factor"]["annual_increase"]
+
+        oop_correction = data["oop_correction"]
+        self.oop_correction = RateTable("oop_correction", oop_correction["axes"], oop_correction["values"])
+        self.oop_bracket_min_age = np.array(oop_correction["bracket_min_age"])
+
+        premium_correction = data["premium_correction"]
+        self.premium_correction = RateTable("premium_correction", premium_correction["axes"], premium_correction["values"])
+        self.premium_bracket_min_age = np.array(premium_correction["bracket_min_age"])
+
+        medicare = data["medicare"]
+        self.medicare_age = medicare["age"]
+        self.medicare_premium_factor = medicare["premium_factor"]
+        self.medicare_oop_factor = medicare["oop_factor"]
+        self.medicare_employee_premium = medicare["employee_premium"]
+        self.medicare_employer_premium = medicare["employer_premium"]
+
+        self.high_risk_years = data["high_risk_years"]
+
+        cost_model = data["cost_model"]
+        self.cost_model_insurance = tuple(cost_model["axes"]["insurance"])
+        self.cost_model = {
+            name: np.array(cost_model[name], dtype=float)
+            for name in ("oop_share", "base_premium", "premium_slope", "chronic_base_premium")
+        }
+        for name, values in self.cost_model.items():
+            if values.shape != (len(self.cost_model_insurance),):
+                raise ValueError(f"cost_model.{name} needs one value per insurance type")
+            values.flags.writeable = False
+        self.cost_model.update({
+            name: float(cost_model[name])
+            for name in ("base_cost", "cost_slope", "chronic_base_cost", "chronic_inflation_spread")
+        })
+
+
+def load_pricing_tables(path=PRICING_TABLES_PATH):
+    """
+    Reads and validates a pricing table file.
+
+    Returns:
+    - PricingTables
+    """
+    with open(path, encoding="utf-8") as f:
+        return PricingTables(json.load(f))
+
+
+PRICING = load_pricing_tables()
+
+
+# --- Vectorized lookups ---
+def age_bracket_codes(ages, bracket_min_age):
+    """
+    Index of the age bracket of every age, given each bracket's minimum age.
+    """
+    return np.maximum(np.searchsorted(bracket_min_age, np.asarray(ages), side="right") - 1, 0)
+
+
+def yearly_health_codes(table, health_status, n_years, tables=PRICING, default=-1):
+    """
+    Code of the health status for every projection year on `table`'s "health" axis;
+    high-risk reverts to chronic after `high_risk_years`.
+    """
+    codes = np.full(n_years, table.code("health", health_status, default), dtype=np.int64)
+    if health_status == "high_risk":
+        codes[tables.high_risk_years:] = table.code("health", "chronic", default)
+    return codes
+
+
+def premium_correction(ages, health_status, plan_key, tables=PRICING):
+    """
+    Premium correction ratio per year; 1.0 for plans or statuses without a rate.
+    """
+    table = tables.premium_correction
+    return table.lookup(
+        age_bracket_codes(ages, tables.premium_bracket_min_age),
+        yearly_health_codes(table, health_status, len(ages), tables),
+        table.code("plan", plan_key),
+    )
+
+
+def oop_correction(ages, insurance_type, health_status, tables=PRICING):
+    """
+    OOP correction ratio per year, as insurance_module.get_oop_correction_ratio.
+    High-risk and chronic share the "chronic_or_high" rate, so the high-risk reversion does not apply.
+    """
+    insurance_type = insurance_type.lower()
+    if insurance_type in ["medicare", "traditional medicare"]:
+        coverage = "traditional_medicare"
+    elif insurance_type in ["medicare advantage"]:
+        coverage = "medicare_advantage"
+    else:
+        coverage = "any"
+    table = tables.oop_correction
+    health = "healthy" if health_status.lower() == "healthy" else "chronic_or_high"
+    return table.lookup(
+        age_bracket_codes(ages, tables.oop_bracket_min_age), table.code("coverage", coverage), table.code("health", health)
+    )
+
+
+def medicare_adjusted_costs(base_premium, base_oop, inflation_rate, start_age, n_years, tables=PRICING):
+    """
+    Premium and OOP inflated from their year 1 values, reduced from the Medicare age.
+
+    Returns:
+    - Tuple of (premium_array, oop_array)
+    """
+    growth = (1 + inflation_rate) ** np.arange(n_years)
+    medicare = start_age + np.arange(n_years) >= tables.medicare_age
+    premiums = base_premium * growth * np.where(medicare, tables.medicare_premium_factor, 1.0)
+    oop = base_oop * growth * np.where(medicare, tables.medicare_oop_factor, 1.0)
+    return premiums, oop
+
+
+def corrected_insurance_costs(insurance_type_key, health_status, base_employee_premium, base_employer_premium,
+                              base_oop, inflation_rate, start_age, n_years, tables=PRICING):
+    """
+    Custom Step 1 costs with age/health corrections and inflation; ESI members switch
+    to the Medicare premiums and OOP factor from the Medicare age.
+
+    Returns:
+    - Tuple of (employee_premium_array, employer_premium_array, oop_array)
+    """
+    years = np.arange(n_years)
+    ages = start_age + years
+    growth = (1 + inflation_rate) ** years
+    if insurance_type_key in ["ESI", "ACA"]:
+        correction = premium_correction(ages, health_status, insurance_type_key, tables)
+    else:
+        correction = np.ones(n_years)
+
+    employee = base_employee_premium * growth * correction
+    employer = base_employer_premium * growth * correction
+    oop = base_oop * growth * correction
+    if insurance_type_key == "ESI":
+        medicare = ages >= tables.medicare_age
+        employee = np.where(medicare, tables.medicare_employee_premium, employee)
+        employer = np.where(medicare, tables.medicare_employer_premium, employer)
+        oop = np.where(medicare, base_oop * growth * tables.medicare_oop_factor, oop)
+    return employee, employer, oop
+
+
+def plan_key(insurance_type):
+    """
+    National average plan key for an insurance label ("ESI", "Employer-based", "medicare_advantage", ...).
+    """
+    if insurance_type in PLAN_ALIASES:
+        return PLAN_ALIASES[insurance_type]
+    return insurance_type.lower().replace(" ", "_")
+
+
+@instrument()
+def national_average_costs(insurance_type, health_status, family_status, age, n_years, tables=PRICING):
+    """
+    Premium and OOP from national averages, scaled by age and the OOP correction ratio.
+    Uninsured users spread the lifetime OOP for their status over the years left to 85.
+
+    Returns:
+    - Tuple of (premium_array, oop_array)
+    """
+    key = plan_key(insurance_type)
+    years = np.arange(n_years)
+    ages = age + years
+
+    if key == "uninsured":
+        # Statuses without a rate are priced as high-risk
+        table = tables.uninsured_lifetime_oop
+        health_codes = yearly_health_codes(table, health_status, n_years, tables, table.code("health", "high_risk"))
+        return np.zeros(n_years), table.values[health_codes] / np.maximum(1, tables.uninsured_end_age - ages)
+
+    plan_code = tables.national_premium.code("plan", key)
+    family_code = tables.national_premium.code("family", family_status)
+    if plan_code < 0:
+        raise ValueError(f"Unknown insurance type: {insurance_type}")
+    if family_code < 0:
+        raise ValueError(f"Unknown family_status value: {family_status}")
+
+    age_factor = 1 + tables.age_factor_increase * np.maximum(ages - tables.age_factor_base_age, 0)
+    risk_factor = oop_correction(ages, insurance_type, health_status, tables)
+    premium = tables.national_premium.values[plan_code, family_code] * age_factor * risk_factor
+    oop = tables.national_oop.values[plan_code, family_code] * age_factor * risk_factor
+    return premium, oop
@@ -1,33 +1,58 @@
 # projected_health_risk.py
 
+import numpy as np
+
+from risk_tables import age_trajectory, gather_status_trajectories, status_trajectory
+from telemetry import instrument
+
+
+# Qualitative insight per health status; statuses without their own entry get "low"
+RISK_INSIGHTS = {
+    "high": "Your current health status suggests elevated long-term risk.",
+    "chronic": "You are managing a chronic condition. Monitor regularly and plan proactively.",
+    "low": "You are currently low-risk. Maintain preventive care.",
+}
+
+
 def get_risk_insight(age, health_status):
     # Returns a simple qualitative insight
-    if health_status == "high":
-        return "Your current health status suggests elevated long-term risk."
-    elif health_status == "chronic":
-        return "You are managing a chronic condition. Monitor regularly and plan proactively."
-    else:
-        return "You are currently low-risk. Maintain preventive care."
+    return RISK_INSIGHTS.get(health_status, RISK_INSIGHTS["low"])
 
 def get_risk_trajectory(age, health_status):
-    # Returns a risk trajectory list based on age and health status
-    years = list(range(age, 86))
-    trajectory = []
-
-    # Define starting risk and slope per status
-    if health_status == "high_risk":
-        base_risk = 0.5 if age < 18 else 0.6
-        slope = 0.025
-    elif health_status == "chronic":
-        trajectory = [0.75] * len(years)
-        return trajectory
-    else:  # healthy
-        base_risk = 0.1 if age < 18 else 0.2
-        slope = 0.01
-
-    # Generate trajectory with capping at 1.0
-    for i in range(len(years)):
-        risk = min(1.0, base_risk + slope * i)
-        trajectory.append(risk)
-
-    return trajectory
\ No newline at end of file
+    # Returns the risk trajectory from age through 85 (read-only float32 view of the precomputed table)
+    return age_trajectory(age, health_status)
+
+
+def get_status_risk_trajectory(health_status):
+    # Returns the 50-year risk trajectory used by Step 3 (unknown statuses use the healthy curve)
+    return status_trajectory(health_status)
+
+
+def get_member_risk_weight(label, age):
+    # User counts fully, partner at 0.9, dependents by age band
+    if label == "User":
+        return 1.0
+    if label == "Partner":
+        return 0.9
+    return 0.3 if age <= 6 else 0.4 if age <= 12 else 0.5
+
+
+@instrument()
+def compute_lifetime_health_risk(members):
+    """
+    Weighted average of each family member's lifetime risk trajectory.
+
+    Parameters:
+    - members: list of (label, age, health_status) tuples; label is "User", "Partner" or a dependent label
+
+    Returns:
+    - Weighted lifetime average risk (0 when there are no members)
+    """
+    if not members:
+        return 0
+    weights = np.array([get_member_risk_weight(label, age) for label, age, _ in members])
+    total_weight = weights.sum()
+    if total_weight <= 0:
+        return 0
+    lifetime_means = gather_status_trajectories([status for _, _, status in members]).mean(axis=1, dtype=np.float64)
+    return float(weights @ lifetime_means / total_weight)
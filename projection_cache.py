@@ -0,0 +1,133 @@
+# projection_cache.py
+
+import copy
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Bump whenever a cached model's formulas change so stale entries are never served
+CACHE_VERSION = 1
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, pd.DataFrame):
+        return {"columns": list(obj.columns), "data": obj.to_dict(orient="list")}
+    if isinstance(obj, pd.Series):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    return repr(obj)
+
+
+def canonical_hash(*parts):
+    """
+    Returns a stable SHA-256 hex digest for any mix of dicts, lists, scalars and arrays.
+
+    Dict keys are sorted so two profiles with the same values always hash the same.
+    """
+    payload = json.dumps([CACHE_VERSION, parts], sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_size(value):
+    """
+    Rough in-memory size of a cached value in bytes.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ProjectionCache:
+    """
+    Thread-safe LRU cache for model projections, shared by every Streamlit session.
+
+    Entries are evicted least-recently-used first once either `max_entries` or
+    `max_bytes` is exceeded. Values are deep-copied on the way out so callers can
+    mutate what they receive (the steps add columns to cost_df in place).
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, name, inputs, compute):
+        """
+        Returns the cached result for (name, inputs), calling `compute()` on a miss.
+        """
+        key = canonical_hash(name, inputs)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._entries[key][0])
+            self.misses += 1
+
+        value = compute()
+        size = estimate_size(value)
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (copy.deepcopy(value), size)
+                self._bytes += size
+                self._evict()
+        return value
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": CACHE_VERSION,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Process-wide cache used by the step modules
+PROJECTION_CACHE = ProjectionCache()
+
+
+def cached_call(func, *args, **kwargs):
+    """
+    Calls a pure projection function through PROJECTION_CACHE, keyed on its name and arguments.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+    return PROJECTION_CACHE.get_or_compute(name, (args, kwargs), lambda: func(*args, **kwargs))
@@ -0,0 +1,148 @@
+# projection_engine.py
+#
+# Vectorized income, savings and 401(k) projections for batches of households.
+# A balance that grows by g and then receives contribution c[t] each year is
+#     b[t] = (1 + g)^(t+1) * (b0 + sum_{k<=t} c[k] / (1 + g)^(k+1)),
+# so every account path is a cumulative product of growth factors times a
+# cumulative sum of discounted contributions. The working (pre-retirement) and retired phases
+# are boolean masks over (household x year), so nothing loops over years.
+
+import numpy as np
+
+from telemetry import instrument
+
+RETIREMENT_AGE = 65
+
+# Per-household inputs of household_paths; every value is a scalar or one value per household
+HOUSEHOLD_FIELDS = (
+    "age",
+    "partner_age",
+    "family",
+    "inflation",
+    "net_income",
+    "income_growth",
+    "partner_net_income",
+    "partner_income_growth",
+    "savings_start",
+    "savings_growth",
+    "savings_contribution",
+    "start_401k",
+    "growth_401k",
+    "contribution_401k",
+    "partner_start_401k",
+    "partner_growth_401k",
+    "partner_contribution_401k",
+)
+
+
+def _column(values, n_rows=None):
+    # Scalar or per-household values -> float column (households x 1)
+    column = np.asarray(values, dtype=float).reshape(-1, 1)
+    if n_rows is not None and len(column) == 1:
+        column = np.repeat(column, n_rows, axis=0)
+    return column
+
+
+def working_years(start_ages, years, retirement_age=RETIREMENT_AGE):
+    """
+    Mask (households x years) of the years before retirement.
+    """
+    return _column(start_ages) + np.arange(years) < retirement_age
+
+
+def compound_paths(start, growth, contributions):
+    """
+    Account balances with yearly growth then the year's contribution:
+    b[t] = b[t-1] * (1 + growth) + contributions[t].
+
+    Parameters:
+    - start: starting balance, scalar or (households,)
+    - growth: yearly growth rate, scalar or (households,); must be above -100%
+    - contributions: array (households x years)
+
+    Returns:
+    - Array (households x years) of end-of-year balances
+    """
+    contributions = np.atleast_2d(np.asarray(contributions, dtype=float))
+    factor = 1 + _column(growth, len(contributions))
+    if (factor <= 0).any():
+        raise ValueError("Growth rates must be above -100%")
+    growth_paths = np.cumprod(np.repeat(factor, contributions.shape[1], axis=1), axis=1)
+    return growth_paths * (_column(start, len(contributions)) + np.cumsum(contributions / growth_paths, axis=1))
+
+
+def income_paths(monthly_income, growth, start_ages, years, retirement_age=RETIREMENT_AGE, retirement_ratio=0.4):
+    """
+    Annual income growing until retirement, then `retirement_ratio` of the starting annual income.
+
+    Returns:
+    - Array (households x years)
+    """
+    annual = _column(monthly_income) * 12
+    growth_path = (1 + _column(growth)) ** np.arange(years)
+    return np.where(
+        working_years(start_ages, years, retirement_age), annual * growth_path, annual * _column(retirement_ratio)
+    )
+
+
+def balance_paths(start, growth, annual_contribution, start_ages, years, retirement_age=RETIREMENT_AGE):
+    """
+    Savings / 401(k) balances: contributions before retirement, only growth after.
+
+    Returns:
+    - Array (households x years)
+    """
+    contributions = working_years(start_ages, years, retirement_age) * _column(annual_contribution)
+    return compound_paths(start, growth, contributions)
+
+
+@instrument()
+def household_paths(households, years, retirement_age=RETIREMENT_AGE):
+    """
+    Step 2 income and balance projections for a batch of households in one pass: user and
+    partner incomes share one income_paths call, and the savings, 401(k) and partner 401(k)
+    accounts share one balance_paths call.
+
+    Parameters:
+    - households: dict of HOUSEHOLD_FIELDS -> scalar or per-household values. Net incomes are
+      monthly; account growth rates exclude inflation, which every balance also earns
+      (as project_balance does); "family" is falsy for single households, whose partner
+      paths are zero
+    - years: projection length
+    - retirement_age: last working age + 1 for every member
+
+    Returns:
+    - Dict of arrays (households x years): "income" (user + partner), "income_partner",
+      "savings", "401k", "401k_partner"
+    """
+    missing = [name for name in HOUSEHOLD_FIELDS if name not in households]
+    if missing:
+        raise ValueError(f"Missing household fields: {', '.join(missing)}")
+    n = max(np.size(households[name]) for name in HOUSEHOLD_FIELDS)
+    h = {name: _column(households[name], n) for name in HOUSEHOLD_FIELDS}
+    family = h["family"] != 0
+
+    # User income falls to 40% at retirement; partner income stops entirely
+    incomes = income_paths(
+        np.vstack([h["net_income"], h["partner_net_income"]]),
+        np.vstack([h["income_growth"], h["partner_income_growth"]]),
+        np.vstack([h["age"], h["partner_age"]]),
+        years, retirement_age,
+        np.vstack([np.full((n, 1), 0.4), np.zeros((n, 1))]),
+    )
+    income_partner = np.where(family, incomes[n:], 0.0)
+
+    balances = balance_paths(
+        np.vstack([h["savings_start"], h["start_401k"], h["partner_start_401k"]]),
+        np.vstack([h["savings_growth"], h["growth_401k"], h["partner_growth_401k"]]) + np.vstack([h["inflation"]] * 3),
+        np.vstack([h["savings_contribution"], h["contribution_401k"], h["partner_contribution_401k"]]),
+        np.vstack([h["age"], h["age"], h["partner_age"]]),
+        years, retirement_age,
+    )
+    return {
+        "income": incomes[:n] + income_partner,
+        "income_partner": income_partner,
+        "savings": balances[:n],
+        "401k": balances[n:2 * n],
+        "401k_partner": np.where(family, balances[2 * n:], 0.0),
+    }
@@ -0,0 +1,179 @@
+# projection_model.py
+#
+# Pure projection functions shared by the Streamlit steps. Nothing here reads
+# st.session_state, so results can be cached and reused outside the UI.
+
+from drawdown_engine import drawdown_batch
+from ltc_module import expected_ltc_costs
+from pricing_engine import PRICING, corrected_insurance_costs, medicare_adjusted_costs
+from projection_engine import balance_paths, household_paths, income_paths
+from telemetry import instrument
+
+MEDICARE_AGE = PRICING.medicare_age
+MEDICARE_PREMIUM_FACTOR = PRICING.medicare_premium_factor
+MEDICARE_OOP_FACTOR = PRICING.medicare_oop_factor
+MEDICARE_EMPLOYEE_PREMIUM = PRICING.medicare_employee_premium
+MEDICARE_EMPLOYER_PREMIUM = PRICING.medicare_employer_premium
+
+# High-risk users are downgraded to chronic after this many years
+HIGH_RISK_YEARS = PRICING.high_risk_years
+
+
+def project_growth_series(base_amount, growth_rate, years):
+    """
+    Returns [base_amount * (1 + growth_rate) ** i for each year].
+    """
+    return [base_amount * ((1 + growth_rate) ** i) for i in range(years)]
+
+
+@instrument()
+def project_medicare_adjusted_costs(base_premium, base_oop, inflation_rate, start_age, n_years):
+    """
+    Inflates premium and OOP from their year 1 values and applies the Medicare
+    reduction from age 65.
+
+    Returns:
+    - Tuple of (premium_list, oop_list)
+    """
+    premiums, oop = medicare_adjusted_costs(base_premium, base_oop, inflation_rate, start_age, n_years)
+    return premiums.tolist(), oop.tolist()
+
+
+@instrument()
+def project_corrected_insurance_costs(insurance_type_key, health_status, base_employee_premium,
+                                      base_employer_premium, base_oop, inflation_rate, start_age, n_years):
+    """
+    Builds premium and OOP projections with age/health correction factors and inflation,
+    switching ESI members to Medicare values from age 65.
+
+    Returns:
+    - Tuple of (employee_premiums, employer_premiums, oop_list)
+    """
+    employee_premiums, employer_premiums, oop_years = corrected_insurance_costs(
+        insurance_type_key, health_status, base_employee_premium, base_employer_premium,
+        base_oop, inflation_rate, start_age, n_years
+    )
+    return employee_premiums.tolist(), employer_premiums.tolist(), oop_years.tolist()
+
+
+@instrument()
+def project_total_expenses(premiums, oop_costs, inflation_rate, start_age):
+    """
+    Inflation and Medicare-adjusted total healthcare expenses per year.
+    """
+    total_expenses = []
+    for i, (p, o) in enumerate(zip(premiums, oop_costs)):
+        inflated_total = (p + o) * ((1 + inflation_rate) ** i)
+        if start_age + i >= MEDICARE_AGE:
+            inflated_total *= MEDICARE_OOP_FACTOR  # Apply Medicare cost drop after age 65
+        total_expenses.append(inflated_total)
+    return total_expenses
+
+
+@instrument()
+def project_ltc_costs(ltc_setting, monthly_cost, inflation_rate, start_age, n_years):
+    """
+    Expected long-term care cost per year for a Step 1 LTC setting (None for no care),
+    from the onset-age and stay-duration distributions in ltc_module.
+    """
+    return expected_ltc_costs(start_age, n_years, ltc_setting, monthly_cost, inflation_rate)[0].tolist()
+
+
+@instrument()
+def project_income(monthly_net_income, growth_rate, start_age, years, retirement_age=65, retirement_ratio=0.4):
+    """
+    Retirement-aware income projection: grows until retirement, then drops to
+    `retirement_ratio` of the starting annual income.
+    """
+    return income_paths(monthly_net_income, growth_rate, start_age, years, retirement_age, retirement_ratio)[0].tolist()
+
+
+@instrument()
+def project_balance(start_balance, growth_rate, inflation_rate, annual_contribution, start_age, years,
+                    retirement_age=65):
+    """
+    Savings / 401(k) balance projection: contributions before retirement, only growth after.
+    """
+    return balance_paths(start_balance, growth_rate + inflation_rate, annual_contribution, start_age, years,
+                         retirement_age)[0].tolist()
+
+
+@instrument()
+def project_household_finances(household, years, retirement_age=65):
+    """
+    Step 2 income, savings and 401(k) projections for one household in a single
+    projection_engine pass.
+
+    Parameters:
+    - household: dict of projection_engine.HOUSEHOLD_FIELDS -> scalar values
+    - years: projection length
+    - retirement_age: retirement age of both members
+
+    Returns:
+    - Dict of lists: "income" (user + partner), "income_partner", "savings", "401k", "401k_partner"
+    """
+    paths = household_paths(household, years, retirement_age)
+    return {name: values[0].tolist() for name, values in paths.items()}
+
+
+@instrument()
+def compute_retirement_drawdown(chart_ages, deficit_values, savings_proj, proj_401k_combined,
+                                retirement_index, total_pension, estimated_ss):
+    """
+    Draws retirement deficits not covered by pension and Social Security from savings + 401(k).
+
+    Returns:
+    - Tuple of (used_capital, remaining_capital, unfunded_gap, pension_stream, ss_stream, total_used_capital)
+    """
+    savings_total = savings_proj[retirement_index] if 0 <= retirement_index < len(savings_proj) else 0
+    proj_401k_val = proj_401k_combined[retirement_index] if 0 <= retirement_index < len(proj_401k_combined) else 0
+    ss_per_year = estimated_ss / len(chart_ages) if chart_ages else 0
+
+    drawdown = drawdown_batch(deficit_values, savings_total + proj_401k_val, income=total_pension + ss_per_year)
+    pension_stream = [total_pension] * len(chart_ages)
+    ss_stream = [ss_per_year] * len(chart_ages)
+    return (drawdown["used"].tolist(), drawdown["remaining"].tolist(), drawdown["gap"].tolist(),
+            pension_stream, ss_stream, float(drawdown["total_used"]))
+
+
+@instrument()
+def compute_retirement_readiness(deficit_values, total_available):
+    """
+    Retirement Readiness drawdown: pays each year's deficit from a single pool of capital.
+
+    Returns:
+    - Tuple of (used_capital, remaining_capital, unfunded_gap, capital_left)
+    """
+    drawdown = drawdown_batch(deficit_values, total_available)
+    return (drawdown["used"].tolist(), drawdown["remaining"].tolist(), drawdown["gap"].tolist(),
+            float(drawdown["capital_left"]))
+
+
+def get_depletion_age(chart_ages, remaining_capital):
+    """
+    First age at which the remaining capital reaches zero, or None if it never does.
+    """
+    for age, capital in zip(chart_ages, remaining_capital):
+        if capital <= 0:
+            return age
+    return None
+
+
+@instrument()
+def simulate_capital_fund(healthcare_costs, annual_contribution, blended_growth):
+    """
+    Capital care fund: contribute, grow, then pay that year's healthcare cost from the fund.
+
+    Returns:
+    - Tuple of (capital_used, capital_balance)
+    """
+    capital_fund_value = 0
+    capital_used = []
+    capital_balance = []
+    for cost in healthcare_costs:
+        capital_fund_value = (capital_fund_value + annual_contribution) * (1 + blended_growth)
+        used = min(capital_fund_value, cost)
+        capital_fund_value -= used
+        capital_used.append(used)
+        capital_balance.append(capital_fund_value)
+    return capital_used, capital_balance
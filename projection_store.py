@@ -0,0 +1,159 @@
+# projection_store.py
+#
+# Columnar store for a session's yearly projections. Instead of one Python list
+# of floats per projection in st.session_state (premiums, household_proj,
+# savings_proj, ...), every projection is a named row of a single 2-D float64
+# array indexed by year from the user's current age. Reads return read-only
+# views, so steps share one buffer instead of each holding its own copy.
+
+import numpy as np
+import pandas as pd
+
+from projection_cache import estimate_size
+
+STORE_KEY = "projection_store"
+
+
+class ProjectionStore:
+    """
+    Named yearly projections held as rows of one (columns x years) array.
+
+    Each column keeps its own length, so projections of different horizons can
+    share the store; the array grows when a new column or a longer series arrives.
+    """
+
+    def __init__(self, start_age=None, dtype=np.float64):
+        self.start_age = start_age
+        self._data = np.zeros((0, 0), dtype=dtype)
+        self._rows = {}
+        self._lengths = {}
+
+    def _reserve(self, rows, years):
+        old_rows, old_years = self._data.shape
+        if rows <= old_rows and years <= old_years:
+            return
+        data = np.zeros((max(rows, old_rows), max(years, old_years)), dtype=self._data.dtype)
+        data[:old_rows, :old_years] = self._data
+        self._data = data
+
+    def set(self, name, values, start_age=None):
+        """
+        Stores a projection, replacing any previous values of the column.
+
+        Parameters:
+        - name: column name (e.g. "premiums")
+        - values: sequence of yearly values, first entry at the store's start age
+        - start_age: updates the age of the first year when given
+        """
+        values = np.asarray(values, dtype=self._data.dtype).ravel()
+        row = self._rows.get(name)
+        if row is None:
+            row = len(self._rows)
+        self._reserve(row + 1, len(values))
+        self._rows[name] = row
+        self._lengths[name] = len(values)
+        self._data[row, :len(values)] = values
+        self._data[row, len(values):] = 0.0
+        if start_age is not None:
+            self.start_age = start_age
+
+    def get(self, name, default=None):
+        """
+        Read-only view of a column, valid only until the next set(): a write that adds a
+        column or a longer series moves the data, leaving older views stale. Copy before keeping it.
+        """
+        row = self._rows.get(name)
+        if row is None:
+            return default
+        view = self._data[row, :self._lengths[name]]
+        view.flags.writeable = False
+        return view
+
+    def __contains__(self, name):
+        return name in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def columns(self):
+        return list(self._rows)
+
+    def ages(self, name=None):
+        """
+        Age for each year of a column (or of the longest column).
+        """
+        years = self._lengths[name] if name is not None else self._data.shape[1]
+        start = self.start_age or 0
+        return np.arange(start, start + years)
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def to_frame(self, names=None):
+        """
+        DataFrame with an "Age" column and one column per projection, zero-padded to the longest.
+        """
+        names = list(names) if names is not None else self.columns
+        frame = pd.DataFrame({name: self._data[self._rows[name]] for name in names})
+        frame.insert(0, "Age", self.ages())
+        return frame
+
+
+# --- Session helpers: `session` is st.session_state or any mutable mapping ---
+def get_store(session):
+    """
+    Returns the session's projection store, creating it on first use.
+    """
+    store = session.get(STORE_KEY)
+    if store is None:
+        store = ProjectionStore()
+        session[STORE_KEY] = store
+    return store
+
+
+def put_projection(session, name, values, start_age=None):
+    get_store(session).set(name, values, start_age=start_age)
+
+
+def get_projection(session, name, default=None):
+    """
+    Read-only view of a stored projection (see ProjectionStore.get), or `default` when it has not been computed yet.
+    """
+    store = session.get(STORE_KEY)
+    if store is None:
+        return default
+    return store.get(name, default)
+
+
+def get_projection_list(session, name):
+    """
+    Mutable list copy of a stored projection ([] when missing), for code that pads or edits values in place.
+    """
+    values = get_projection(session, name)
+    return values.tolist() if values is not None else []
+
+
+def session_memory_report(session):
+    """
+    Compares the store with the equivalent per-key Python lists.
+
+    Returns:
+    - Dict with "columns" (name -> list_bytes, store_bytes per column) and the totals
+      "list_bytes" and "store_bytes"
+    """
+    store = session.get(STORE_KEY)
+    if store is None or not len(store):
+        return {"columns": {}, "list_bytes": 0, "store_bytes": 0}
+    row_bytes = store.nbytes // len(store._data)
+    columns = {
+        name: {"list_bytes": estimate_size(store.get(name).tolist()), "store_bytes": row_bytes}
+        for name in store.columns
+    }
+    return {
+        "columns": columns,
+        "list_bytes": sum(c["list_bytes"] for c in columns.values()),
+        "store_bytes": store.nbytes,
+    }
+
@@ -1,6 +1,4 @@
-
-
-import streamlit as st
+from recommendation_rules import CAPITAL_STRATEGY, PERSONALIZED
 
 def recommend_option_1_only(profile, income, savings):
     return f"""
@@ -35,4 +33,64 @@ def recommend_lifestyle_guidance(profile):
     - Explore local or low-cost digital health support
 
     Every step improves your future options.
-    """, "lifestyle_guidance"
\ No newline at end of file
+    """, "lifestyle_guidance"
+
+def recommend_capital_strategy(health_status, family_history, available_cash, savings_balance):
+    """
+    Step 6 capital strategy recommendation from health status, family history and free cash
+    (recommendation_rules.CAPITAL_STRATEGY).
+
+    Returns:
+    - Tuple of (recommendation_text, drawdown_option, code); the text is empty for lifestyle guidance
+    """
+    rule, text = CAPITAL_STRATEGY.matches({
+        "health_status": health_status,
+        "family_history": bool(family_history),
+        "available_cash": available_cash,
+        "savings_balance": savings_balance,
+    })[0]
+    return text, rule.drawdown_option, rule.code
+
+
+def recommendation_features(profile, insurance_type, surplus, capital_strategy=None, risk_trajectory=None,
+                            family_risk_summary=None, high_risk_score=None, capital_shift=0):
+    """
+    Features of one plan for the recommendation rules.
+
+    Parameters:
+    - surplus: yearly surplus values (nested lists are flattened) or a single value
+
+    Returns:
+    - Dict of recommendation_rules.FEATURES name -> value
+    """
+    # Ensure surplus is a flat list for consistent checks
+    if isinstance(surplus, list):
+        flattened_surplus = [item for sublist in surplus for item in (sublist if isinstance(sublist, list) else [sublist])]
+    else:
+        flattened_surplus = [surplus]
+    return {
+        "age": profile.get("age", 30),
+        "health_status": profile.get("health_status", "healthy"),
+        "insurance_type": insurance_type,
+        "surplus": min(flattened_surplus, default=0),
+        "capital_shift": capital_shift,
+        "max_risk": max(risk_trajectory) if risk_trajectory else 0,
+        "high_risk_score": high_risk_score or 0,
+        "high_risk_dependents": (family_risk_summary or {}).get("high_risk_dependents", 0),
+        "long_allocation": (capital_strategy or {}).get("long", 0),
+    }
+
+
+def build_recommendations(profile, insurance_type, surplus, capital_strategy, risk_trajectory,
+                          family_risk_summary, high_risk_score):
+    """
+    Builds the personalized recommendation messages shown on the AI Recommendation tab
+    (recommendation_rules.PERSONALIZED); the risk insight always comes first.
+
+    Returns:
+    - List of recommendation strings
+    """
+    features = recommendation_features(
+        profile, insurance_type, surplus, capital_strategy, risk_trajectory, family_risk_summary, high_risk_score
+    )
+    return PERSONALIZED.messages(features)
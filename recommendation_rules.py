@@ -0,0 +1,379 @@
+# recommendation_rules.py
+#
+# Declarative recommendation rules. Each rule is a condition over a typed
+# feature vector (a conjunction of (feature, operator, value) clauses) plus a
+# text template and the recommendation code the caller acts on. A RuleSet
+# compiles its rules once, into vectorized predicates that score a batch of
+# 100k plans in one pass and into plain comparisons for the single plan a
+# Streamlit step shows (no array is built per call).
+#
+# Rules in the same group behave like an if/elif chain (only the first match
+# fires); rules without a group are independent ifs. An "otherwise" rule fires
+# only when no other rule in the set did.
+
+import operator
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from projected_health_risk import RISK_INSIGHTS
+from telemetry import instrument
+
+# Step 6 digital-first care estimate: virtual primary care + surgery bundle + vision/dental
+DIGITAL_FIRST_MONTHLY_COST = 80 + 100 + 50
+
+AT_RISK_STATUSES = ("chronic", "high_risk")
+INSURED_TYPES = ("Marketplace", "Employer")
+
+# Feature -> (dtype, default). Missing numbers are NaN, which fails every comparison
+FEATURES = {
+    "age": (float, 30),
+    "health_status": (object, "healthy"),
+    "family_history": (bool, False),
+    "insurance_type": (object, "None"),  # as the caller names it: Step 1 label or pricing type
+    "available_cash": (float, 0.0),
+    "savings_balance": (float, 0.0),
+    "surplus": (float, 0.0),  # lowest yearly surplus
+    "capital_shift": (float, 0.0),
+    "max_risk": (float, 0.0),  # peak of the risk trajectory
+    "high_risk_score": (float, 0.0),
+    "high_risk_dependents": (float, 0),
+    "long_allocation": (float, 0.0),  # long-term share of the capital strategy
+    "average_healthcare_pct": (float, np.nan),
+    "retirement_gap_start_age": (float, np.nan),
+    "monthly_premium": (float, 0.0),
+    "monthly_oop": (float, 0.0),
+    "digital_first_delta": (float, 0.0),  # monthly premium + OOP above the digital-first estimate
+}
+
+# Operator -> (vectorized comparison over a column, comparison of one value)
+OPERATORS = {
+    "==": (operator.eq, operator.eq),
+    "!=": (operator.ne, operator.ne),
+    "<": (operator.lt, operator.lt),
+    "<=": (operator.le, operator.le),
+    ">": (operator.gt, operator.gt),
+    ">=": (operator.ge, operator.ge),
+    "in": (lambda column, values: np.isin(column, list(values)), lambda value, values: value in values),
+    "not in": (lambda column, values: ~np.isin(column, list(values)), lambda value, values: value not in values),
+}
+
+# How a step displays a rule's message ("" for plain markdown)
+MESSAGE_KINDS = ("", "info", "success", "warning")
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    One recommendation. `when` is a tuple of (feature, operator, value) clauses that must
+    all hold (empty: always); `text` is a str.format template over the features and `kind`
+    one of MESSAGE_KINDS.
+    """
+    name: str
+    text: str
+    when: tuple = ()
+    code: str = ""
+    drawdown_option: str = ""
+    group: Optional[str] = None
+    otherwise: bool = False
+    kind: str = ""
+
+    def __post_init__(self):
+        if self.kind not in MESSAGE_KINDS:
+            raise ValueError(f"Unknown message kind for rule {self.name}: {self.kind}")
+
+
+def feature_table(plans):
+    """
+    Typed feature columns for a batch of plans.
+
+    Parameters:
+    - plans: dict (or DataFrame) of feature name -> one value, or one value per plan;
+      missing features take their default
+
+    Returns:
+    - Dict of feature name -> array (plans,)
+    """
+    unknown = set(plans) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown recommendation features: {', '.join(sorted(unknown))}")
+    columns = {name: np.atleast_1d(np.asarray(plans[name], dtype=dtype))
+               for name, (dtype, _) in FEATURES.items() if name in plans}
+    n_plans = max((len(column) for column in columns.values()), default=1)
+    return {
+        name: np.broadcast_to(columns[name] if name in columns else np.asarray(default, dtype=dtype), (n_plans,))
+        for name, (dtype, default) in FEATURES.items()
+    }
+
+
+def plan_features(plan):
+    """
+    Typed feature values of one plan, as plain Python scalars.
+
+    Parameters:
+    - plan: dict of feature name -> value; missing features take their default
+
+    Returns:
+    - Dict of every feature name -> value
+    """
+    unknown = set(plan) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown recommendation features: {', '.join(sorted(unknown))}")
+    values = {}
+    for name, (dtype, default) in FEATURES.items():
+        value = plan.get(name, default)
+        if dtype is float:
+            value = float("nan") if value is None else float(value)
+        elif dtype is bool:
+            value = bool(value)
+        values[name] = value
+    return values
+
+
+def _compile(when):
+    # A vectorized predicate and the scalar clauses of a conjunction
+    for feature, op, _ in when:
+        if feature not in FEATURES:
+            raise ValueError(f"Unknown recommendation feature: {feature}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown rule operator: {op}")
+    clauses = tuple((feature, OPERATORS[op][0], value) for feature, op, value in when)
+    scalar_clauses = tuple((feature, OPERATORS[op][1], value) for feature, op, value in when)
+
+    def predicate(features):
+        hit = np.ones(len(next(iter(features.values()))), dtype=bool)
+        for feature, compare, value in clauses:
+            hit &= compare(features[feature], value)
+        return hit
+    return predicate, scalar_clauses
+
+
+class RuleSet:
+    """
+    An ordered rule table compiled into vectorized predicates.
+    """
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Rule names must be unique within a rule set")
+        self._predicates, self._scalar_clauses = zip(*(_compile(rule.when) for rule in self.rules))
+
+    def evaluate(self, features):
+        """
+        Fired rules for every plan.
+
+        Parameters:
+        - features: feature_table output
+
+        Returns:
+        - Bool array (plans x rules)
+        """
+        n_plans = len(features["age"])
+        fired = np.zeros((n_plans, len(self.rules)), dtype=bool)
+        taken = {}  # group -> plans already matched by an earlier rule of the group
+        for index, (rule, predicate) in enumerate(zip(self.rules, self._predicates)):
+            if rule.otherwise:
+                continue
+            hit = predicate(features)
+            if rule.group is not None:
+                earlier = taken.setdefault(rule.group, np.zeros(n_plans, dtype=bool))
+                hit &= ~earlier
+                earlier |= hit
+            fired[:, index] = hit
+        other = fired.any(axis=1)
+        for index, (rule, predicate) in enumerate(zip(self.rules, self._predicates)):
+            if rule.otherwise:
+                fired[:, index] = ~other & predicate(features)
+        return fired
+
+    def codes(self, fired):
+        """
+        Code of the first fired rule per plan ("" where none fired).
+        """
+        codes = np.array([rule.code for rule in self.rules] + [""], dtype=object)
+        return codes[np.where(fired.any(axis=1), fired.argmax(axis=1), len(self.rules))]
+
+    def hit_counts(self, fired):
+        """
+        Number of plans each rule fired for.
+        """
+        return dict(zip((rule.name for rule in self.rules), fired.sum(axis=0).tolist()))
+
+    def matches(self, plan):
+        """
+        Fired rules of one plan with their rendered text, evaluated on scalars.
+
+        Parameters:
+        - plan: dict of feature name -> value (see plan_features)
+
+        Returns:
+        - List of (Rule, text) in table order
+        """
+        values = plan_features(plan)
+        fired = []
+        taken = set()  # groups already matched by an earlier rule
+        for rule, clauses in zip(self.rules, self._scalar_clauses):
+            if rule.otherwise or (rule.group is not None and rule.group in taken):
+                continue
+            if all(compare(values[feature], value) for feature, compare, value in clauses):
+                fired.append(rule)
+                if rule.group is not None:
+                    taken.add(rule.group)
+        if not fired:
+            fired = [
+                rule for rule, clauses in zip(self.rules, self._scalar_clauses)
+                if rule.otherwise and all(compare(values[feature], value) for feature, compare, value in clauses)
+            ]
+        return [(rule, rule.text.format(**values)) for rule in fired]
+
+    def messages(self, plan):
+        """
+        Rendered texts of one plan's fired rules.
+        """
+        return [text for _, text in self.matches(plan)]
+
+
+# --- Step 6 capital strategy: at-risk users need capital first, healthy users by family risk and cash ---
+_AT_RISK = ("health_status", "in", AT_RISK_STATUSES)
+CAPITAL_STRATEGY = RuleSet([
+    Rule("at_risk_cash_and_savings", "🧱 **Recommendation:** You are at risk and already in a treatment window. Focus on building a **Capital Care Fund** using available savings or income. (Option 1)",
+         (_AT_RISK, ("available_cash", ">", 0), ("savings_balance", ">", 0)), "option_1_only", "Option 1", "strategy"),
+    Rule("at_risk_savings", "💰 **Recommendation:** Use existing savings to begin a **Capital Care Fund**. (Option 1)",
+         (_AT_RISK, ("savings_balance", ">", 0)), "option_1_only", "Option 1", "strategy"),
+    Rule("at_risk_cash", "💡 **Recommendation:** Contribute from income to a **Capital Care Fund** for future treatment needs. (Option 1)",
+         (_AT_RISK, ("available_cash", ">", 0)), "option_1_only", "Option 1", "strategy"),
+    Rule("at_risk_no_capacity", "", (_AT_RISK,), "lifestyle_guidance", "", "strategy"),
+    Rule("family_risk_cash", "🔁 **Recommendation:** You’re healthy with family risk. Begin **Capital + Insurance Optimization** (**Option 1 + 2**).",
+         (("family_history", "==", True), ("available_cash", ">", 0)),
+         "option_1_plus_2", "Option 1 + Option 2", "strategy"),
+    Rule("family_risk", "📉 **Recommendation:** Healthy with family risk. Consider **insurance review** (**Option 2**).",
+         (("family_history", "==", True),), "option_2_only", "Option 2", "strategy"),
+    Rule("healthy_cash", "✅ **Recommendation:** Ideal profile for a **Capital Health Fund** (**Option 1 + 2**).",
+         (("available_cash", ">", 0),), "option_1_plus_2", "Option 1 + Option 2", "strategy"),
+    Rule("overinsured", "🛡️ **Recommendation:** Overinsured. Start with **Option 2** and allocate surplus later.",
+         (), "option_2_only", "Option 2", "strategy"),
+])
+
+# --- Personalized messages on the AI Recommendation tab ---
+PERSONALIZED = RuleSet([
+    Rule("insight_high", "🧠 " + RISK_INSIGHTS["high"], (("health_status", "==", "high"),), group="insight"),
+    Rule("insight_chronic", "🧠 " + RISK_INSIGHTS["chronic"], (("health_status", "==", "chronic"),), group="insight"),
+    Rule("insight_low", "🧠 " + RISK_INSIGHTS["low"], group="insight"),
+    Rule("late_high_risk", "⚠️ Your projected health risk becomes very high in later years. Consider planning for increased medical costs.",
+         (("max_risk", ">=", 0.9),)),
+    Rule("high_risk_member", "📌 You or a family member may be considered high-risk. Ensure you maintain sufficient savings or high-deductible coverage.",
+         (("high_risk_score", ">", 7),)),
+    Rule("high_risk_dependents", "🧒 One or more dependents have high risk—pediatric or long-term planning may be necessary.",
+         (("high_risk_dependents", ">", 0),)),
+    Rule("deficit", "💸 You may have a healthcare deficit in future years. Consider increasing income or reducing expenses.",
+         (("surplus", "<", 0),), group="surplus"),
+    Rule("surplus", "💰 You're generating surplus — consider allocating a portion toward a capital care fund.",
+         group="surplus"),
+    Rule("reallocate_premiums", "🔄 You may benefit from reallocating a portion of your insurance premiums to capital care, especially if you're low-risk or underutilizing current coverage.",
+         (("insurance_type", "in", INSURED_TYPES), ("health_status", "==", "healthy"))),
+    Rule("long_term_strategy", "📈 Strong long-term capital investment strategy in place. Monitor market conditions and rebalance annually.",
+         (("long_allocation", ">", 0.5),)),
+    Rule("revisit", "✅ Revisit this simulation yearly or after major life changes to stay on track."),
+])
+
+# --- Insurance adjustment from surplus and capital opportunity ---
+_INSURED = ("insurance_type", "in", INSURED_TYPES)
+INSURANCE_STRATEGY = RuleSet([
+    Rule("uninsured_healthy_surplus", "🛡️ You're uninsured but healthy and have a surplus — consider catastrophic or basic insurance + capital care fund.",
+         (("insurance_type", "==", "None"), ("surplus", ">", 5000), ("health_status", "==", "healthy")),
+         group="uninsured"),
+    Rule("uninsured", "❗ Consider at least minimal insurance to protect against unexpected events.",
+         (("insurance_type", "==", "None"),), group="uninsured"),
+    Rule("premium_shift", "💡 Consider reducing insurance level and allocating saved premiums into capital care.",
+         (_INSURED, ("capital_shift", ">", 10000))),
+    Rule("costs_exceed_income", "📉 Your costs exceed income — review your insurance costs or care usage.",
+         (_INSURED, ("surplus", "<", 0)), group="insured"),
+    Rule("over_insured", "🔄 You may be over-insured — explore digital-first care or high-deductible plans.",
+         (_INSURED, ("health_status", "==", "healthy"), ("age", "<", 45)), group="insured"),
+    Rule("high_risk_coverage", "⚠️ Due to high health risk, maintain sufficient insurance or ensure capital reserves.",
+         (("health_status", "==", "high"),)),
+    Rule("appropriate", "✅ Your insurance strategy looks appropriate for your profile.", otherwise=True),
+])
+
+# --- Simulation page plan for chronic / high-risk users ---
+CHRONIC_PLAN = RuleSet([
+    Rule("capital_bridge", "🧠 Recommended Plan: Capital-Bridge Plan (for chronic users with free cash and savings)",
+         (_AT_RISK, ("available_cash", ">", 0), ("savings_balance", ">", 0),
+          ("insurance_type", "in", ("None", "Marketplace / Self-insured"))), "capital_bridge", group="plan"),
+    Rule("protection_first", "🧠 Recommended Plan: Protection-First Plan (chronic user with adequate insurance)",
+         (_AT_RISK, ("available_cash", ">", 0), ("savings_balance", ">", 0)), "protection_first", group="plan"),
+    Rule("capital_first_savings", "🧠 Recommended Plan: Capital-First Plan (chronic user with savings but low income)",
+         (_AT_RISK, ("savings_balance", ">", 0)), "capital_first", group="plan"),
+    Rule("capital_first_limited", "🧠 Recommended Plan: Capital-First Plan (chronic user with limited financial capacity)",
+         (_AT_RISK,), "capital_first", group="plan"),
+])
+
+# --- Step 6 insights ---
+HEALTH_INSIGHTS = RuleSet([
+    Rule("above_benchmark", "- Your average healthcare spending is **{average_healthcare_pct:.1f}%**, which is above the national benchmark of 8%. Consider reviewing your care plan or insurance.",
+         (("average_healthcare_pct", ">", 8),)),
+    Rule("below_benchmark", "- Your average healthcare spending is **{average_healthcare_pct:.1f}%**, which is below the national benchmark of 8%. Your current strategy appears efficient, but monitoring trends and preventive steps remains important.",
+         (("average_healthcare_pct", "<=", 8),)),
+    Rule("no_ratio", "- Healthcare spending ratio not available. Please review Step 5.", otherwise=True),
+])
+
+FINANCIAL_INSIGHTS = RuleSet([
+    Rule("retirement_gap", "- Based on your projections, a retirement funding gap begins at **age {retirement_gap_start_age:.0f}**. Explore care optimization and digital-first plans to reduce long-term pressure.",
+         (("retirement_gap_start_age", ">", 0),)),
+    Rule("on_track", "- Your retirement capital is currently on track based on the simulated assumptions.", otherwise=True),
+])
+
+TUKU_CALLOUTS = RuleSet([
+    Rule("protect_care_pathway", "_Tuku says: You’re managing multiple chronic risks — now is the time to safeguard your care pathway with financial protection._",
+         (_AT_RISK,), group="callout"),
+    Rule("preventive_care", "_Tuku says: Prioritize preventive care and consider digital health solutions to optimize your health outcomes and financial stability._",
+         group="callout"),
+])
+
+DIGITAL_FIRST_COMPARISON = RuleSet([
+    Rule("oop_below_digital_first", "Your current OOP costs are already below digital-first alternatives. However, consider planning ahead as costs may rise due to family risk. Explore upgrade options available to you through our partners' network.",
+         (("monthly_premium", "==", 0), ("monthly_oop", "<=", DIGITAL_FIRST_MONTHLY_COST)),
+         group="comparison", kind="info"),
+    Rule("digital_first_savings", "Estimated monthly savings from reallocation: ${digital_first_delta:.0f}",
+         (("digital_first_delta", ">", 5),), group="comparison", kind="success"),
+    Rule("digital_first_equivalent", "Your current spending is roughly equivalent to digital-first alternatives.",
+         (("digital_first_delta", ">=", -5), ("digital_first_delta", "<=", 5)), group="comparison", kind="info"),
+    Rule("no_digital_first_savings", "Digital-first care may not currently offer cost savings based on your current healthcare spending.",
+         group="comparison", kind="warning"),
+])
+
+RULE_SETS = {
+    "capital_strategy": CAPITAL_STRATEGY,
+    "personalized": PERSONALIZED,
+    "insurance_strategy": INSURANCE_STRATEGY,
+    "chronic_plan": CHRONIC_PLAN,
+    "health_insights": HEALTH_INSIGHTS,
+    "financial_insights": FINANCIAL_INSIGHTS,
+    "tuku_callouts": TUKU_CALLOUTS,
+    "digital_first_comparison": DIGITAL_FIRST_COMPARISON,
+}
+
+
+@instrument()
+def score_plans(plans, rule_sets=None):
+    """
+    Scores a batch of plans against the recommendation rule sets in one pass.
+
+    Parameters:
+    - plans: dict (or DataFrame) of feature columns, see feature_table
+    - rule_sets: names of RULE_SETS to evaluate; defaults to all
+
+    Returns:
+    - Dict of rule set name -> {"fired": bool (plans x rules), "codes": first fired code per
+      plan, "hit_counts": rule name -> plans it fired for}
+    """
+    features = feature_table(plans)
+    scores = {}
+    for name in rule_sets or RULE_SETS:
+        rule_set = RULE_SETS[name]
+        fired = rule_set.evaluate(features)
+        scores[name] = {"fired": fired, "codes": rule_set.codes(fired), "hit_counts": rule_set.hit_counts(fired)}
+    return scores
@@ -0,0 +1,160 @@
+# recompute_graph.py
+#
+# Dependency graph for incremental recomputation. Each node declares the input
+# fields it reads and the nodes it depends on. On every evaluation a node is
+# recomputed only when the fingerprint of those inputs changed, and a node
+# whose recomputed output is unchanged does not dirty the nodes below it.
+#
+# A graph keeps the last value of every node, so it holds per-plan state: use
+# one graph per session or plan, not one shared across threads.
+
+from collections import deque
+from collections.abc import Mapping
+from dataclasses import dataclass, is_dataclass
+from types import SimpleNamespace
+
+import numpy as np
+
+import telemetry
+
+DEFAULT_HISTORY = 50
+
+
+@dataclass
+class GraphNode:
+    """
+    One model computation. `inputs` are "source" or "source.field" names; a whole
+    source is passed through as is, selected fields are passed as a namespace holding
+    only those fields, so an undeclared read fails instead of going stale.
+    """
+    name: str
+    func: object
+    inputs: tuple = ()
+    deps: tuple = ()
+
+
+def _unchanged(old, new):
+    # Plain equality; values it cannot compare (e.g. dicts holding arrays) count as changed
+    try:
+        return bool(old == new)
+    except (TypeError, ValueError):
+        return False
+
+
+def _freeze(value):
+    # Immutable snapshot of an input, so callers editing a list in place still register as a change
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, np.ndarray):
+        return value.dtype.str, value.shape, value.tobytes()
+    if is_dataclass(value):
+        return type(value), _freeze(vars(value))
+    return value
+
+
+def _read(source, field_name):
+    if isinstance(source, Mapping):
+        return source.get(field_name)
+    return getattr(source, field_name, None)
+
+
+class RecomputeGraph:
+    """
+    Nodes evaluated in the order they were added; a node may only depend on earlier nodes.
+    """
+
+    def __init__(self, history=DEFAULT_HISTORY):
+        self.nodes = {}
+        self.values = {}
+        self._specs = {}
+        self._fingerprints = {}
+        self._versions = {}
+        self.runs = 0
+        self.last_dirty = []
+        self.history = deque(maxlen=history)
+
+    def add(self, name, func, inputs=(), deps=()):
+        """
+        Registers a node.
+
+        Parameters:
+        - name: node name, used by dependents and in the dirty lists
+        - func: called with one keyword argument per input source and per dependency
+        - inputs: source names ("strategy") or fields ("profile.age") the node reads
+        - deps: names of nodes whose values the node reads
+        """
+        if name in self.nodes:
+            raise ValueError(f"Node '{name}' is already defined")
+        missing = [dep for dep in deps if dep not in self.nodes]
+        if missing:
+            raise ValueError(f"Node '{name}' depends on undefined nodes: {', '.join(missing)}")
+        self.nodes[name] = GraphNode(name, func, tuple(inputs), tuple(deps))
+        self._specs[name] = [spec.partition(".")[::2] for spec in inputs]
+        return self
+
+    def _node_inputs(self, node, sources):
+        # Whole sources are passed through; fields are grouped into one namespace per source
+        kwargs = {}
+        for source_name, field_name in self._specs[node.name]:
+            source = sources[source_name]
+            if not field_name:
+                kwargs[source_name] = source
+                continue
+            selected = kwargs.setdefault(source_name, SimpleNamespace())
+            setattr(selected, field_name, _read(source, field_name))
+        return kwargs
+
+    def _fingerprint(self, node, kwargs):
+        inputs = tuple((name, _freeze(vars(value) if isinstance(value, SimpleNamespace) else value))
+                       for name, value in kwargs.items())
+        return inputs, tuple(self._versions[dep] for dep in node.deps)
+
+    def evaluate(self, sources):
+        """
+        Brings every node up to date with `sources` and returns the node values.
+
+        Parameters:
+        - sources: dict of input objects (dataclasses or dicts) named as in the node inputs
+
+        Returns:
+        - Dict of node name -> value; `last_dirty` lists the nodes recomputed by this call
+        """
+        dirty = []
+        for node in self.nodes.values():
+            kwargs = self._node_inputs(node, sources)
+            fingerprint = self._fingerprint(node, kwargs)
+            if node.name in self._fingerprints and _unchanged(self._fingerprints[node.name], fingerprint):
+                continue
+            with telemetry.span(f"graph.{node.name}", telemetry.DEBUG):
+                value = node.func(**kwargs, **{dep: self.values[dep] for dep in node.deps})
+            if node.name not in self.values or not _unchanged(self.values[node.name], value):
+                self._versions[node.name] = self._versions.get(node.name, 0) + 1
+            self.values[node.name] = value
+            self._fingerprints[node.name] = fingerprint
+            dirty.append(node.name)
+
+        self.runs += 1
+        self.last_dirty = dirty
+        self.history.append((self.runs, tuple(dirty)))
+        telemetry.debug("recompute_graph dirty nodes", run=self.runs, dirty=dirty)
+        return dict(self.values)
+
+    def invalidate(self, name=None):
+        """
+        Forces a node (or every node when `name` is None) to recompute on the next evaluation.
+        """
+        names = [name] if name is not None else list(self.nodes)
+        for node_name in names:
+            self._fingerprints.pop(node_name, None)
+
+    def downstream(self, name):
+        """
+        Names of the nodes that depend on `name`, directly or indirectly, in evaluation order.
+        """
+        affected = {name}
+        for node in self.nodes.values():
+            if affected.intersection(node.deps):
+                affected.add(node.name)
+        return [node_name for node_name in self.nodes if node_name in affected and node_name != name]
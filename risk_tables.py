@@ -0,0 +1,104 @@
+# risk_tables.py
+#
+# Precomputed health risk trajectories. Every curve the app uses is built once
+# at import into a read-only float32 table, so lookups are O(1) slices that
+# return views instead of rebuilding a list per call.
+
+import numpy as np
+
+RISK_STATUS_CODES = {"healthy": 0, "chronic": 1, "high_risk": 2}
+
+# Age-based curves (projected_health_risk.get_risk_trajectory): (under-18 base, adult base, yearly slope),
+# capped at 1.0. Chronic is a flat 0.75.
+AGE_RISK_CURVES = {
+    "healthy": (0.1, 0.2, 0.01),
+    "chronic": (0.75, 0.75, 0.0),
+    "high_risk": (0.5, 0.6, 0.025),
+}
+ADULT_AGE = 18
+MAX_RISK_AGE = 85
+AGE_RISK_YEARS = MAX_RISK_AGE + 1
+
+# Step 3 curves: 50-year risk trajectory by health status only, (base, yearly slope), uncapped
+STATUS_RISK_CURVES = {
+    "healthy": (0.2, 0.005),
+    "chronic": (0.4, 0.0075),
+    "high_risk": (0.5, 0.01),
+}
+STATUS_RISK_YEARS = 50
+
+
+def _build_age_table():
+    # Shape (status, start-age bucket, year); bucket 0 is under 18, bucket 1 is adult
+    years = np.arange(AGE_RISK_YEARS)
+    table = np.empty((len(RISK_STATUS_CODES), 2, AGE_RISK_YEARS), dtype=np.float32)
+    for status, code in RISK_STATUS_CODES.items():
+        child_base, adult_base, slope = AGE_RISK_CURVES[status]
+        for bucket, base in enumerate((child_base, adult_base)):
+            table[code, bucket] = np.minimum(1.0, base + slope * years)
+    table.flags.writeable = False
+    return table
+
+
+def _build_status_table():
+    # Shape (status, year)
+    years = np.arange(STATUS_RISK_YEARS)
+    table = np.empty((len(RISK_STATUS_CODES), STATUS_RISK_YEARS), dtype=np.float32)
+    for status, code in RISK_STATUS_CODES.items():
+        base, slope = STATUS_RISK_CURVES[status]
+        table[code] = base + slope * years
+    table.flags.writeable = False
+    return table
+
+
+AGE_RISK_TABLE = _build_age_table()
+STATUS_RISK_TABLE = _build_status_table()
+
+
+def risk_status_code(health_status):
+    # Unknown statuses use the healthy curve
+    return RISK_STATUS_CODES.get(health_status, RISK_STATUS_CODES["healthy"])
+
+
+def age_bucket(age):
+    return 0 if age < ADULT_AGE else 1
+
+
+def age_trajectory(age, health_status):
+    """
+    Risk for each year from `age` through age 85, as a read-only float32 view.
+    """
+    return AGE_RISK_TABLE[risk_status_code(health_status), age_bucket(age), :max(0, AGE_RISK_YEARS - age)]
+
+
+def status_trajectory(health_status):
+    """
+    Step 3 risk curve for a health status (case-insensitive), as a read-only float32 view.
+    """
+    return STATUS_RISK_TABLE[risk_status_code((health_status or "").lower())]
+
+
+def gather_status_trajectories(statuses):
+    """
+    Step 3 curves for many members in one gather.
+
+    Returns:
+    - float32 array (members x STATUS_RISK_YEARS)
+    """
+    codes = np.array([risk_status_code((s or "").lower()) for s in statuses], dtype=np.intp)
+    return STATUS_RISK_TABLE[codes]
+
+
+def gather_age_trajectories(ages, statuses):
+    """
+    Age-based curves for many members in one gather.
+
+    Returns:
+    - Tuple of (trajectories, lengths): float32 array (members x AGE_RISK_YEARS) where row i starts at
+      member i's current age, and the number of valid years in each row (through age 85)
+    """
+    ages = np.asarray(ages, dtype=np.intp)
+    codes = np.array([risk_status_code(s) for s in statuses], dtype=np.intp)
+    buckets = (ages >= ADULT_AGE).astype(np.intp)
+    lengths = np.clip(AGE_RISK_YEARS - ages, 0, AGE_RISK_YEARS)
+    return AGE_RISK_TABLE[codes, buckets], lengths
@@ -0,0 +1,276 @@
+# scenario_engine.py
+#
+# Multi-scenario comparison: one base plan evaluated under every combination of
+# a grid of overrides (insurance type, inflation, retirement age, capital
+# allocation, monthly contribution, long-term care). All scenarios share the
+# base plan, so every quantity is computed as a (scenario x year) array in one
+# pass instead of running the pipeline once per scenario.
+#
+# Healthcare costs follow the Step 1 insurance pricing tables, inflated at the
+# scenario's inflation rate with the Medicare reduction from 65. Income, household
+# spending, balances, available cash and the capital care fund use the pipeline's
+# formulas with the scenario's retirement age in place of 65.
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from chronic_module import get_chronic_multiplier
+from cost_engine import MAX_AGE
+from drawdown_engine import drawdown_batch
+from insurance_cost_model import FAMILY_STATUS_CODES, HEALTH_STATUS_CODES, INSURANCE_TYPE_CODES, get_insurance_costs_from_codes
+from ltc_module import LTC_MONTHLY_COSTS, expected_ltc_costs
+from projection_model import MEDICARE_AGE, MEDICARE_OOP_FACTOR, MEDICARE_PREMIUM_FACTOR
+from simulation_pipeline import (
+    DIGITAL_FIRST_MONTHLY_COST,
+    RETIREMENT_AGE,
+    UNINSURED_SPREAD_YEARS,
+    _coerce_inputs,
+    run_income_stage,
+)
+from telemetry import instrument
+
+SCENARIO_AXES = (
+    "insurance_type",
+    "inflation_rate",
+    "retirement_age",
+    "allocation",
+    "monthly_contribution",
+    "ltc_setting",
+)
+
+# Step 1 insurance labels -> pricing table codes
+INSURANCE_SCENARIO_CODES = {
+    "Employer-based": INSURANCE_TYPE_CODES["Employer"],
+    "Marketplace / Self-insured": INSURANCE_TYPE_CODES["Marketplace"],
+    "None": INSURANCE_TYPE_CODES["uninsured"],
+}
+
+# Growth of the mid- and long-term tiers of the capital care fund; the short-term tier
+# grows at the plan's short_term_growth_rate
+ALLOCATION_GROWTH_RATES = {"mid_term": 0.05, "long_term": 0.07}
+
+# Default grid for the Step 6 comparison
+DEFAULT_OVERRIDES = {
+    "insurance_type": tuple(INSURANCE_SCENARIO_CODES),
+    "inflation_rate": (0.03, 0.05, 0.07),
+    "retirement_age": (62, 65, 67, 70),
+    "allocation": ((100, 0, 0), (50, 30, 20), (20, 30, 50)),
+    "monthly_contribution": (0, 100, 250, 500),
+    "ltc_setting": tuple(LTC_MONTHLY_COSTS),
+}
+
+RANKING = (("lifetime_cost", True), ("capital_shift", False), ("depletion_age", False))
+
+
+def scenario_grid(overrides, base):
+    """
+    Cartesian product of the override values.
+
+    Parameters:
+    - overrides: dict of axis -> sequence of values; missing axes keep the base value
+    - base: dict of axis -> base value
+
+    Returns:
+    - DataFrame with one row per scenario and one column per axis
+    """
+    unknown = set(overrides) - set(SCENARIO_AXES)
+    if unknown:
+        raise ValueError(f"Unknown scenario axis: {', '.join(sorted(unknown))}")
+    values = [list(overrides.get(axis, [base[axis]])) for axis in SCENARIO_AXES]
+    return pd.DataFrame(list(itertools.product(*values)), columns=list(SCENARIO_AXES))
+
+
+def _balance_at(start, growth, contribution, index, contribution_years):
+    # project_balance value at `index` in closed form: growth every year, contributions
+    # in the first `contribution_years` years; 0 where `index` is outside the projection
+    index = np.asarray(index)
+    n = np.maximum(index, 0)
+    k = np.clip(contribution_years, 0, n + 1)
+    m = 1 + growth
+    flat = np.isclose(m, 1.0)
+    geometric = np.where(flat, k, (m ** k - 1) / np.where(flat, 1.0, m - 1))
+    return start * m ** (n + 1) + contribution * m ** (n - k + 1) * geometric
+
+
+@instrument()
+def evaluate_scenarios(profile, financials=None, strategy=None, overrides=None, ltc_setting="None"):
+    """
+    Evaluates a base plan under every combination of the override values.
+
+    Parameters:
+    - profile, financials, strategy: base plan, as for SimulationPipeline.run
+    - overrides: dict of axis (see SCENARIO_AXES) -> sequence of values. "inflation_rate" replaces
+      the expense inflation, "allocation" is a (short, mid, long) percentage split of the capital
+      care fund, "ltc_setting" is a LTC_MONTHLY_COSTS key
+    - ltc_setting: base long-term care setting
+
+    Returns:
+    - DataFrame with one row per scenario: the axis values, "lifetime_cost" (premiums, OOP and
+      long-term care through 85), "capital_shift" (capital care fund at retirement),
+      "depletion_age" (first retirement age with an unfunded deficit, NaN if none),
+      "retirement_shortfall", "capital_left" and "available_cash"
+    """
+    profile, financials, strategy = _coerce_inputs(profile, financials, strategy)
+    base = {
+        "insurance_type": profile.insurance_type,
+        "inflation_rate": financials.expense_inflation,
+        "retirement_age": RETIREMENT_AGE,
+        "allocation": (100, 0, 0),
+        "monthly_contribution": strategy.monthly_contribution,
+        "ltc_setting": ltc_setting,
+    }
+    grid = scenario_grid(overrides or {}, base)
+
+    unknown = set(grid["insurance_type"]) - set(INSURANCE_SCENARIO_CODES)
+    if unknown:
+        raise ValueError(f"Unknown insurance type: {', '.join(sorted(map(str, unknown)))}")
+    insurance_codes = grid["insurance_type"].map(INSURANCE_SCENARIO_CODES).to_numpy()
+    inflation = grid["inflation_rate"].to_numpy(dtype=float)[:, None]
+    retirement_age = grid["retirement_age"].to_numpy(dtype=np.int64)
+    allocation = np.array(grid["allocation"].tolist(), dtype=float) / 100
+
+    n_scenarios = len(grid)
+    n_years = max(MAX_AGE - profile.age + 1, 0)
+    ages = profile.age + np.arange(n_years)
+    inflation_growth = (1 + inflation) ** np.arange(n_years)
+
+    # --- Healthcare costs ---
+    health_code = HEALTH_STATUS_CODES.get(profile.health_status, 0)
+    health_codes = np.full(n_scenarios, health_code)
+    family_codes = np.where(insurance_codes == INSURANCE_TYPE_CODES["uninsured"], 0,
+                            FAMILY_STATUS_CODES.get(profile.family_status, 0))
+    premiums, oop = get_insurance_costs_from_codes(insurance_codes, health_codes, family_codes, n_years)
+    medicare = ages >= MEDICARE_AGE
+    premiums = premiums * inflation_growth * np.where(medicare, MEDICARE_PREMIUM_FACTOR, 1.0)
+    oop = oop * inflation_growth * np.where(medicare, MEDICARE_OOP_FACTOR, 1.0)
+    ltc = expected_ltc_costs(profile.age, n_years, grid["ltc_setting"].to_numpy(), inflation=inflation[:, 0])
+    healthcare = premiums + oop + ltc
+
+    # Year 1 premium / OOP as Step 1 prices them (uninsured OOP spread over 60 years)
+    year1_premium, year1_oop = get_insurance_costs_from_codes(
+        insurance_codes, health_codes, family_codes, UNINSURED_SPREAD_YEARS
+    )
+    premium_cost, oop_cost = year1_premium[:, 0], year1_oop[:, 0]
+
+    # --- Income: grows until retirement, then 40% of the final income plus pensions ---
+    income = run_income_stage(profile, financials, 0)
+    total_pension = financials.pension_user + financials.pension_partner
+    years_since_start = np.arange(n_years)
+    working = ages[None, :] < retirement_age[:, None]
+    user_income = np.where(
+        working,
+        income["net_user_income"] * 12 * (1 + financials.income_growth) ** years_since_start,
+        income["net_user_income"] * 12 * 0.4,
+    )
+    if profile.family_status == "family":
+        partner_age = profile.partner_age if profile.partner_age is not None else RETIREMENT_AGE
+        partner_working = partner_age + years_since_start < RETIREMENT_AGE
+        user_income = user_income + np.where(
+            partner_working,
+            income["net_partner_income"] * 12 * (1 + financials.partner_income_growth) ** years_since_start,
+            0.0,
+        )
+    retirement_index = retirement_age - profile.age
+    if n_years:
+        final_index = np.where((retirement_index - 1 >= 0) & (retirement_index - 1 < n_years),
+                               retirement_index - 1, n_years - 1)
+        final_income = user_income[np.arange(n_scenarios), final_index][:, None]
+    else:
+        final_income = np.zeros((n_scenarios, 1))
+    years_post = ages[None, :] - retirement_age[:, None]
+    income_proj = np.where(years_post == 0, final_income,
+                           np.where(years_post > 0, final_income * 0.4 + total_pension, user_income))
+
+    # --- Household spending: drops 15% the year after retirement, then 1% a year ---
+    household = financials.monthly_expenses * 12 * inflation_growth
+    first_post = financials.monthly_expenses * 12 * (1 + inflation) ** (retirement_index[:, None] + 1) * 0.85
+    household = np.where(years_post >= 1, first_post * 0.99 ** np.maximum(years_post - 1, 0), household)
+
+    surplus = income_proj - household - healthcare
+
+    # --- Capital care fund (Step 6) ---
+    available_cash = (
+        income["net_income_monthly"] - premium_cost / 12 - oop_cost / 12
+        - financials.monthly_expenses - financials.monthly_debt - financials.annual_savings_contribution / 12
+    )
+    contribution = grid["monthly_contribution"].to_numpy(dtype=float)
+    default_contribution = np.where(available_cash > 0, np.minimum(100, np.trunc(available_cash)), 0)
+    contribution = np.where(np.isnan(contribution), default_contribution, contribution)
+
+    option_2_eligible = (
+        profile.health_status not in ["chronic", "high_risk"] and
+        profile.partner_health_status not in ["chronic", "high_risk"]
+    )
+    chronic_multiplier = get_chronic_multiplier(profile.age, profile.user_chronic_count.lower().replace(" ", "_"))
+    option_2_delta = (premium_cost / 12 + oop_cost / 12) * chronic_multiplier - DIGITAL_FIRST_MONTHLY_COST
+    annual_savings_option2 = np.where(option_2_eligible & (option_2_delta > 0), option_2_delta * 12, 0.0)
+
+    growth_rates = np.array([strategy.short_term_growth_rate, ALLOCATION_GROWTH_RATES["mid_term"],
+                             ALLOCATION_GROWTH_RATES["long_term"]])
+    blended_growth = allocation @ growth_rates
+    initial_capital = financials.savings_balance * strategy.savings_pct / 100 + contribution * 12 + annual_savings_option2
+    capital_shift = initial_capital * (1 + blended_growth) ** retirement_index
+
+    # --- Retirement drawdown: savings + 401(k) + capital care fund against yearly deficits ---
+    balance_growth = inflation[:, 0]
+    in_range = (retirement_index >= 0) & (retirement_index < n_years)
+    savings_at_retirement = _balance_at(
+        financials.savings_balance, financials.savings_growth + balance_growth, financials.annual_savings_contribution,
+        retirement_index, retirement_index,
+    )
+    user_401k_at_retirement = _balance_at(
+        financials.start_401k, financials.growth_401k + balance_growth,
+        financials.contrib_401k_employee + financials.contrib_401k_employer, retirement_index, retirement_index,
+    )
+    capital = (savings_at_retirement + user_401k_at_retirement) * in_range
+    if profile.family_status == "family":
+        partner_401k_at_retirement = _balance_at(
+            financials.partner_start_401k, financials.partner_growth_401k + balance_growth,
+            financials.partner_contrib_401k_employee + financials.partner_contrib_401k_employer,
+            retirement_index, RETIREMENT_AGE - partner_age,
+        )
+        capital = capital + partner_401k_at_retirement * in_range
+    capital = capital + capital_shift
+
+    deficits = np.where(years_post >= 0, np.maximum(-surplus, 0.0), 0.0)
+    drawdown = drawdown_batch(deficits, capital)
+    short = drawdown["gap"] > 0
+    depleted = short.any(axis=1)
+    depletion_age = np.where(depleted, ages[short.argmax(axis=1)] if n_years else np.nan, np.nan)
+
+    results = grid.copy()
+    results["lifetime_cost"] = healthcare.sum(axis=1)
+    results["capital_shift"] = capital_shift
+    results["depletion_age"] = depletion_age
+    results["retirement_shortfall"] = drawdown["gap"].sum(axis=1)
+    results["capital_left"] = drawdown["capital_left"]
+    results["available_cash"] = available_cash
+    results["monthly_contribution"] = contribution
+    return results
+
+
+def rank_scenarios(results, ranking=RANKING):
+    """
+    Sorts scenarios by lifetime cost (lowest first), then capital shift (highest first),
+    then depletion age (latest first, never depleting ahead of all), and adds a "rank" column.
+    """
+    keys = []
+    for column, ascending in reversed(ranking):
+        values = results[column].to_numpy(dtype=float)
+        if column == "depletion_age":
+            values = np.where(np.isnan(values), np.inf, values)
+        keys.append(values if ascending else -values)
+    order = np.lexsort(keys)
+    ranked = results.iloc[order].reset_index(drop=True)
+    ranked.insert(0, "rank", np.arange(1, len(ranked) + 1))
+    return ranked
+
+
+def compare_scenarios(profile, financials=None, strategy=None, overrides=None, ltc_setting="None", top=None):
+    """
+    Evaluates and ranks the scenario grid; `top` keeps only the best rows.
+    """
+    ranked = rank_scenarios(evaluate_scenarios(profile, financials, strategy, overrides, ltc_setting))
+    return ranked.head(top) if top else ranked
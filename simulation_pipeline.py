@@ -0,0 +1,962 @@
+# simulation_pipeline.py
+#
+# Headless version of Steps 1-6. Each stage takes explicit inputs instead of
+# reading st.session_state, so plans can be evaluated in a worker process and
+# the Streamlit steps can share the same model code.
+#
+# Stages: costs -> financials -> risk -> capital -> summary -> recommendation
+#
+# IncrementalSimulationPipeline runs the same stages, split into finer nodes, through a
+# RecomputeGraph so that a rerun after one input changed only recomputes what depends on it.
+
+from dataclasses import asdict, dataclass, field, fields
+from typing import Optional
+
+from chronic_module import get_chronic_multiplier
+from cost_engine import HEALTH_CODES, INSURANCE_CODES, generate_cost_arrays
+from drawdown_engine import depletion_ages, drawdown_batch, retirement_deficits
+from insurance_cost_model import HEALTH_STATUS_CODES, UNINSURED_LIFETIME_OOP, get_insurance_costs
+from ltc_module import expected_ltc_costs
+from monthly_cashflow_engine import MONTHS_PER_YEAR, simulate_monthly_cashflow
+from projected_health_risk import compute_lifetime_health_risk, get_status_risk_trajectory
+from projection_model import (
+    compute_retirement_drawdown,
+    project_balance,
+    project_growth_series,
+    project_income,
+    project_medicare_adjusted_costs,
+)
+from recommendation_logic import build_recommendations, recommend_capital_strategy
+from recommendation_rules import DIGITAL_FIRST_MONTHLY_COST
+from recompute_graph import RecomputeGraph
+from telemetry import INFO, instrument
+
+STAGES = ("costs", "financials", "risk", "capital", "summary", "recommendation")
+
+RETIREMENT_AGE = 65
+
+# Step 4 caps every projection at this many years
+FALLBACK_YEARS = 85
+
+# Insurance type labels used by the Step 1 radio, mapped to the pricing model's names
+INSURANCE_PRICING_TYPES = {
+    "Employer-based": "Employer",
+    "Marketplace / Self-insured": "Marketplace",
+}
+
+# Years the uninsured lifetime OOP benchmark is spread over for the year 1 cost
+UNINSURED_SPREAD_YEARS = 60
+
+
+def _from_dict(cls, data):
+    # Build a dataclass from a dict, ignoring keys it does not define
+    names = {f.name for f in fields(cls)}
+    return cls(**{k: v for k, v in (data or {}).items() if k in names and v is not None})
+
+
+def _rate(value):
+    # Percent inputs (e.g. 25.0) become fractions, as the Step 2 tax inputs do
+    return value / 100 if value > 1 else value
+
+
+def _pad(values, length):
+    # Same as Step 4's pad_array: extends with zeros, never truncates
+    return list(values) + [0] * (length - len(values))
+
+
+@dataclass
+class ProfileInput:
+    """
+    Step 1 profile. Field names match the profile dict the steps store in session state.
+    """
+    age: int = 30
+    gender: str = "male"
+    health_status: str = "healthy"
+    family_status: str = "single"
+    insurance_type: str = "Employer-based"
+    user_chronic_count: str = "None"
+    partner_age: Optional[int] = None
+    partner_health_status: Optional[str] = None
+    dependent_ages: list = field(default_factory=list)
+    dependent_health_statuses: list = field(default_factory=list)
+    family_history_user: list = field(default_factory=list)
+    family_history_partner: list = field(default_factory=list)
+    # Step 1 long-term care setting (None for no care) and its monthly cost today
+    ltc_type: Optional[str] = None
+    ltc_monthly_cost: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data):
+        return _from_dict(cls, data)
+
+    def to_profile_dict(self):
+        profile = asdict(self)
+        profile["num_dependents"] = len(self.dependent_ages)
+        return profile
+
+
+@dataclass
+class FinancialInputs:
+    """
+    Step 2 financial inputs. Rates are fractions (0.03 = 3%); tax rates also accept percents.
+    """
+    monthly_gross_income: float = 5000
+    tax_rate: float = 0.25
+    income_growth: float = 0.02
+    partner_monthly_gross_income: float = 8000
+    partner_tax_rate: float = 0.25
+    partner_income_growth: float = 0.03
+    monthly_expenses: float = 6440
+    monthly_debt: float = 1500
+    savings_balance: float = 20000
+    savings_growth: float = 0.03
+    annual_savings_contribution: float = 1200
+    start_401k: float = 0
+    contrib_401k_employee: float = 0
+    contrib_401k_employer: float = 0
+    growth_401k: float = 0.05
+    partner_start_401k: float = 0
+    partner_contrib_401k_employee: float = 0
+    partner_contrib_401k_employer: float = 0
+    partner_growth_401k: float = 0.05
+    pension_user: float = 0
+    pension_partner: float = 0
+    expense_inflation: float = 0.05
+
+    @classmethod
+    def from_dict(cls, data):
+        return _from_dict(cls, data)
+
+
+@dataclass
+class CapitalStrategyInput:
+    """
+    Step 6 capital care fund choices. `monthly_contribution=None` uses the Step 6 slider
+    default of min(100, available cash).
+    """
+    monthly_contribution: Optional[float] = None
+    savings_pct: float = 20
+    short_term_growth_rate: float = 0.03
+
+    @classmethod
+    def from_dict(cls, data):
+        return _from_dict(cls, data)
+
+
+@dataclass
+class ModelAssumptions:
+    """
+    Fallback values the steps use when nothing else is set in session state.
+    """
+    base_premium: float = 6000
+    base_oop: float = 3000
+    cost_inflation: float = 0.03
+    projection_years: int = 60
+    post_retirement_growth: float = 0.03
+    fallback_income_growth: float = 0.02
+    # Optional monthly cash flow (monthly_cashflow_engine); the yearly results are the same either way
+    monthly_resolution: bool = False
+    monthly_timings: Optional[dict] = None
+    monthly_opening_cash: float = 0
+
+
+@dataclass
+class SimulationResults:
+    """
+    Output of one pipeline run: per-year projections, scalar metrics and the recommendation.
+    """
+    ages: list
+    projections: dict
+    metrics: dict
+    recommendation_code: str
+    drawdown_option: str
+    recommendation_text: str
+    recommendations: list
+
+    def summary(self):
+        """
+        Flat dict of the scalar metrics and recommendation fields.
+        """
+        return {
+            **self.metrics,
+            "recommendation_code": self.recommendation_code,
+            "drawdown_option": self.drawdown_option,
+        }
+
+
+# --- Stage 1: costs ---
+@instrument("pipeline.costs", level=INFO)
+def run_costs_stage(profile, financials):
+    """
+    Cost table and year 1 premium / OOP, as computed by Step 1. The expected long-term care
+    cost of the profile's LTC setting is its own column and is included in the healthcare cost.
+
+    Returns:
+    - Dict with "ages", "n_years", "cost_table" (dict of lists), "premium_cost" and "oop_cost"
+    """
+    # Step 1 builds the cost table from a profile dict without an insurance type
+    cost_arrays = generate_cost_arrays(
+        [profile.age],
+        [HEALTH_CODES.get(profile.health_status, 0)],
+        [INSURANCE_CODES["None"]],
+        expense_inflation=financials.expense_inflation,
+    )
+    n_years = int(cost_arrays["mask"][0].sum())
+    cost_table = {
+        name: cost_arrays[name][0, :n_years].tolist()
+        for name in ("Age", "Healthcare Cost", "OOP", "Premium")
+    }
+    ltc = expected_ltc_costs(
+        profile.age, n_years, profile.ltc_type, profile.ltc_monthly_cost, financials.expense_inflation
+    )[0]
+    cost_table["Long-Term Care"] = ltc.tolist()
+    cost_table["Healthcare Cost"] = (cost_arrays["Healthcare Cost"][0, :n_years] + ltc).tolist()
+
+    if profile.insurance_type in INSURANCE_PRICING_TYPES:
+        premiums, oop_costs = get_insurance_costs(
+            INSURANCE_PRICING_TYPES[profile.insurance_type],
+            profile.health_status,
+            profile.family_status,
+            # Only year 1 is read; past the last simulated age there are no projected years
+            years_to_simulate=max(n_years, 1),
+        )
+        premium_cost, oop_cost = premiums[0], oop_costs[0]
+    elif profile.insurance_type == "None":
+        # Uninsured: validated lifetime OOP spread evenly, as Step 1 does on every rerun
+        health_code = HEALTH_STATUS_CODES.get(profile.health_status, HEALTH_STATUS_CODES["high_risk"])
+        premium_cost, oop_cost = 0, float(UNINSURED_LIFETIME_OOP[health_code]) / UNINSURED_SPREAD_YEARS
+    else:
+        premium_cost, oop_cost = 0, 0
+
+    return {
+        "ages": cost_table["Age"],
+        "n_years": n_years,
+        "cost_table": cost_table,
+        "premium_cost": premium_cost,
+        "oop_cost": oop_cost,
+    }
+
+
+# --- Stage 2: financials ---
+@instrument()
+def run_income_stage(profile, financials, years):
+    """
+    Net monthly income and the yearly income projections for the user and partner.
+    """
+    net_user_income = (financials.monthly_gross_income - financials.contrib_401k_employee / 12) * (
+        1 - _rate(financials.tax_rate)
+    )
+    income_proj = project_income(
+        net_user_income, financials.income_growth, profile.age, years,
+        retirement_age=RETIREMENT_AGE, retirement_ratio=0.4
+    )
+
+    if profile.family_status == "family":
+        partner_age = profile.partner_age if profile.partner_age is not None else RETIREMENT_AGE
+        net_partner_income = (
+            financials.partner_monthly_gross_income - financials.partner_contrib_401k_employee / 12
+        ) * (1 - _rate(financials.partner_tax_rate))
+        # Partner income stops entirely at 65
+        income_proj_partner = project_income(
+            net_partner_income, financials.partner_income_growth, partner_age, years,
+            retirement_age=RETIREMENT_AGE, retirement_ratio=0
+        )
+        combined_income_proj = [user + partner for user, partner in zip(income_proj, income_proj_partner)]
+    else:
+        net_partner_income = 0
+        income_proj_partner = [0] * years
+        combined_income_proj = income_proj
+
+    return {
+        "net_user_income": net_user_income,
+        "net_partner_income": net_partner_income,
+        "net_income_monthly": net_user_income + net_partner_income,
+        "income_proj": combined_income_proj,
+        "income_proj_partner": income_proj_partner,
+    }
+
+
+@instrument()
+def run_household_stage(financials, years):
+    """
+    Household expense and debt projections.
+    """
+    return {
+        "household_proj": project_growth_series(financials.monthly_expenses * 12, financials.expense_inflation, years),
+        "debt_proj": project_growth_series(financials.monthly_debt, financials.expense_inflation, years),
+    }
+
+
+@instrument()
+def run_balances_stage(profile, financials, years):
+    """
+    Savings and 401(k) balances: contributions before retirement, only growth after.
+    """
+    inflation_rate = financials.expense_inflation
+    proj_401k = project_balance(
+        financials.start_401k, financials.growth_401k, inflation_rate,
+        financials.contrib_401k_employee + financials.contrib_401k_employer,
+        profile.age, years, retirement_age=RETIREMENT_AGE
+    )
+    if profile.family_status == "family":
+        partner_age = profile.partner_age if profile.partner_age is not None else RETIREMENT_AGE
+        proj_401k_partner = project_balance(
+            financials.partner_start_401k, financials.partner_growth_401k, inflation_rate,
+            financials.partner_contrib_401k_employee + financials.partner_contrib_401k_employer,
+            partner_age, years, retirement_age=RETIREMENT_AGE
+        )
+    else:
+        proj_401k_partner = [0] * years
+    savings_proj = project_balance(
+        financials.savings_balance, financials.savings_growth, inflation_rate,
+        financials.annual_savings_contribution, profile.age, years, retirement_age=RETIREMENT_AGE
+    )
+    return {
+        "savings_proj": savings_proj,
+        "proj_401k": proj_401k,
+        "proj_401k_partner": proj_401k_partner,
+    }
+
+
+def compute_available_cash(financials, costs, net_income_monthly):
+    """
+    Monthly cash left after year 1 premium / OOP, expenses, debt and savings contributions.
+    """
+    return (
+        net_income_monthly
+        - costs["premium_cost"] / 12 - costs["oop_cost"] / 12
+        - financials.monthly_expenses - financials.monthly_debt
+        - financials.annual_savings_contribution / 12
+    )
+
+
+@instrument("pipeline.financials", level=INFO)
+def run_financials_stage(profile, financials, costs):
+    """
+    Net income, household/debt projections, savings and 401(k) balances and available cash (Step 2).
+    """
+    years = costs["n_years"]
+    fin = run_income_stage(profile, financials, years)
+    fin.update(run_household_stage(financials, years))
+    fin.update(run_balances_stage(profile, financials, years))
+    fin["available_cash"] = compute_available_cash(financials, costs, fin["net_income_monthly"])
+    return fin
+
+
+# --- Stage 3: risk ---
+@instrument()
+def run_premiums_stage(profile, years, assumptions):
+    """
+    Chronic multiplier and the Medicare-adjusted premium / OOP projections.
+    """
+    user_chronic_count = profile.user_chronic_count.lower().replace(" ", "_")
+    chronic_multiplier = get_chronic_multiplier(profile.age, user_chronic_count)
+    premiums, oop = project_medicare_adjusted_costs(
+        assumptions.base_premium * chronic_multiplier,
+        assumptions.base_oop * chronic_multiplier,
+        assumptions.cost_inflation,
+        profile.age,
+        years,
+    )
+    return {
+        "chronic_multiplier": chronic_multiplier,
+        "premiums": premiums,
+        "oop": oop,
+        "lifetime_healthcare_cost": sum(premiums) + sum(oop),
+    }
+
+
+@instrument()
+def run_health_risk_stage(profile):
+    """
+    Health risk trajectory and lifetime family risk.
+    """
+    members = [("User", profile.age, profile.health_status)]
+    if profile.partner_age is not None and profile.partner_health_status is not None:
+        members.append(("Partner", profile.partner_age, profile.partner_health_status))
+    for i, (dep_age, dep_status) in enumerate(zip(profile.dependent_ages, profile.dependent_health_statuses)):
+        members.append((f"Dependent #{i+1}", dep_age, dep_status))
+    return {
+        "risk_trajectory": get_status_risk_trajectory(profile.health_status).tolist(),
+        "lifetime_health_risk": compute_lifetime_health_risk(members),
+    }
+
+
+@instrument("pipeline.risk", level=INFO)
+def run_risk_stage(profile, costs, assumptions):
+    """
+    Health risk trajectory, lifetime family risk and chronic-adjusted cost projections (Step 3).
+    """
+    risk = run_premiums_stage(profile, costs["n_years"], assumptions)
+    risk.update(run_health_risk_stage(profile))
+    return risk
+
+
+# --- Stage 4: capital ---
+@instrument()
+def run_surplus_stage(profile, financials, fin, risk, assumptions):
+    """
+    Retirement-adjusted income and expenses and the yearly surplus.
+    """
+    age = profile.age
+    retirement_index = RETIREMENT_AGE - age
+    total_pension = financials.pension_user + financials.pension_partner
+    chronic_multiplier = risk["chronic_multiplier"]
+
+    def apply_retirement_income(income, n_years):
+        if 0 <= retirement_index - 1 < len(income):
+            final_income = income[retirement_index - 1]
+        else:
+            final_income = income[-1] if income else 0
+        for i in range(n_years):
+            if age + i == RETIREMENT_AGE:
+                income[i] = final_income
+            elif age + i > RETIREMENT_AGE:
+                income[i] = final_income * 0.40 + total_pension
+
+    income_proj = _pad(fin["income_proj"], assumptions.projection_years)
+    apply_retirement_income(income_proj, assumptions.projection_years)
+
+    max_len = max(len(fin["proj_401k"]), len(fin["proj_401k_partner"]))
+    proj_401k = [u + p for u, p in zip(_pad(fin["proj_401k"], max_len), _pad(fin["proj_401k_partner"], max_len))]
+    savings_proj = list(fin["savings_proj"])
+    household_proj = list(fin["household_proj"])
+
+    # Savings and 401(k) only grow after retirement; household spending drops 15%, then 1% a year
+    retirement_savings_value = savings_proj[retirement_index] if 0 <= retirement_index < len(savings_proj) else 0
+    retirement_401k_value = proj_401k[retirement_index] if 0 <= retirement_index < len(proj_401k) else 0
+    base_post_retirement_household = None
+    for i in range(len(savings_proj)):
+        years_post = age + i - RETIREMENT_AGE
+        if years_post <= 0:
+            continue
+        growth = (1 + assumptions.post_retirement_growth) ** years_post
+        savings_proj[i] = retirement_savings_value * growth
+        proj_401k[i] = retirement_401k_value * growth
+        if i < len(household_proj):
+            if years_post == 1:
+                household_proj[i] = household_proj[i] * 0.85
+                base_post_retirement_household = household_proj[i]
+            elif base_post_retirement_household is not None:
+                household_proj[i] = base_post_retirement_household * ((1 - 0.01) ** (years_post - 1))
+
+    if profile.insurance_type == "None":
+        premiums = [0] * len(risk["premiums"])
+    else:
+        premiums = [p * chronic_multiplier for p in risk["premiums"]]
+    oop = [o * chronic_multiplier for o in risk["oop"]]
+
+    final_years = min(FALLBACK_YEARS, len(income_proj), len(savings_proj), len(proj_401k), len(household_proj),
+                      len(premiums), len(oop))
+    ages = list(range(age, age + final_years))
+
+    # Step 4 rebuilds income from year 1 net income when the padded projection is misaligned
+    if len(income_proj) != final_years:
+        starting_income = fin["net_user_income"] * 12
+        income_proj = [starting_income * ((1 + assumptions.fallback_income_growth) ** i) for i in range(final_years)]
+    apply_retirement_income(income_proj, final_years)
+
+    total_expenses = [household_proj[i] + premiums[i] + oop[i] for i in range(final_years)]
+    surplus = [income_proj[i] - total_expenses[i] for i in range(final_years)]
+
+    return {
+        "ages": ages,
+        "income": income_proj[:final_years],
+        "household": household_proj[:final_years],
+        "premiums": premiums[:final_years],
+        "oop": oop[:final_years],
+        "total_expenses": total_expenses,
+        "surplus": surplus,
+        "savings": savings_proj[:final_years],
+        "401k": proj_401k[:final_years],
+    }
+
+
+@instrument()
+def run_drawdown_stage(profile, financials, fin, capital):
+    """
+    Retirement drawdown of the yearly deficits after 65 and the readiness status.
+    """
+    retirement_index = RETIREMENT_AGE - profile.age
+    total_pension = financials.pension_user + financials.pension_partner
+    drawdown = {
+        "retirement_ages": [],
+        "capital_drawn": [],
+        "remaining_capital": [],
+        "unfunded_gap": [],
+        "retirement_capital_used": 0,
+        "retirement_shortfall": 0,
+        "retirement_depletion_age": None,
+        "retirement_status": "unavailable",
+    }
+
+    # Retirement readiness reads the Step 2 income projection and the unadjusted 401(k) balances
+    step2_income = fin["income_proj"]
+    if retirement_index < 0 or retirement_index >= len(step2_income):
+        return drawdown
+
+    max_len = max(len(fin["proj_401k"]), len(fin["proj_401k_partner"]))
+    proj_401k_combined = [u + p for u, p in zip(_pad(fin["proj_401k"], max_len), _pad(fin["proj_401k_partner"], max_len))]
+
+    final_income = step2_income[retirement_index - 1] if 0 <= retirement_index - 1 < len(step2_income) else 0
+    estimated_ss = min(final_income, 500_000) * 0.40
+
+    chart_ages, deficit_values = retirement_deficits(capital["ages"], capital["surplus"], RETIREMENT_AGE)
+
+    *_, total_used_capital = compute_retirement_drawdown(
+        chart_ages, deficit_values, capital["savings"], proj_401k_combined,
+        retirement_index, total_pension, estimated_ss
+    )
+
+    # Step 4/5 readiness chart: 401(k) balance plus lifetime pension, no savings projection
+    user_401k = fin["proj_401k"]
+    total_available = (user_401k[-1] if user_401k else 0) + total_pension * len(chart_ages)
+    readiness = drawdown_batch(deficit_values, total_available)
+
+    if not readiness["used"].any():
+        status = "self_sufficient"
+    elif readiness["capital_left"] > 0:
+        status = "covered"
+    else:
+        status = "depleted"
+
+    drawdown.update({
+        "retirement_ages": chart_ages,
+        "capital_drawn": readiness["used"].tolist(),
+        "remaining_capital": readiness["remaining"].tolist(),
+        "unfunded_gap": readiness["gap"].tolist(),
+        "retirement_capital_used": total_used_capital,
+        "retirement_shortfall": float(readiness["gap"].sum()),
+        "retirement_depletion_age": (depletion_ages(chart_ages, readiness["depletion_index"])[0] or chart_ages[-1])
+        if status == "depleted" else None,
+        "retirement_status": status,
+    })
+    return drawdown
+
+
+@instrument()
+def run_monthly_stage(financials, capital, assumptions):
+    """
+    Monthly cash flow of the Step 4 projections, with debt payments, savings contributions
+    before retirement and retirement drawdowns added. Empty unless assumptions.monthly_resolution.
+
+    Returns:
+    - Dict with "monthly_net_cash_flow" and "monthly_cash" (one list of 12 months per year),
+      their yearly roll-up "annual_net_cash_flow", "shortfall_months", "first_shortfall_age",
+      "first_shortfall_month" (1-12) and "peak_monthly_shortfall"
+    """
+    if not assumptions.monthly_resolution:
+        return {}
+    ages = capital["ages"]
+    n_years = len(ages)
+    drawn = dict(zip(capital["retirement_ages"], capital["capital_drawn"]))
+    streams = {
+        "income": capital["income"],
+        "household": capital["household"],
+        "premiums": capital["premiums"],
+        "oop": capital["oop"],
+        # Step 2 debt is a monthly payment
+        "debt": [financials.monthly_debt * 12 * (1 + financials.expense_inflation) ** i for i in range(n_years)],
+        "contributions": [financials.annual_savings_contribution if age < RETIREMENT_AGE else 0 for age in ages],
+        "withdrawals": [drawn.get(age, 0) for age in ages],
+    }
+    flows = simulate_monthly_cashflow(
+        streams, timings=assumptions.monthly_timings, opening_cash=assumptions.monthly_opening_cash
+    )
+    first = int(flows["first_shortfall"][0])
+    return {
+        "monthly_net_cash_flow": flows["net"][0].tolist(),
+        "monthly_cash": flows["cash"][0].tolist(),
+        "annual_net_cash_flow": flows["annual_net"][0].tolist(),
+        "shortfall_months": int(flows["shortfall_months"][0]),
+        "first_shortfall_age": ages[first // MONTHS_PER_YEAR] if first >= 0 else None,
+        "first_shortfall_month": first % MONTHS_PER_YEAR + 1 if first >= 0 else None,
+        "peak_monthly_shortfall": float(flows["peak_shortfall"][0]),
+    }
+
+
+@instrument("pipeline.capital", level=INFO)
+def run_capital_stage(profile, financials, fin, risk, assumptions):
+    """
+    Retirement-adjusted income and expenses, yearly surplus and the retirement drawdown (Step 4),
+    plus the monthly cash flow when assumptions.monthly_resolution is set.
+    """
+    capital = run_surplus_stage(profile, financials, fin, risk, assumptions)
+    capital.update(run_drawdown_stage(profile, financials, fin, capital))
+    capital.update(run_monthly_stage(financials, capital, assumptions))
+    return capital
+
+
+# --- Stage 5: summary ---
+@instrument("pipeline.summary", level=INFO)
+def run_summary_stage(risk, capital):
+    """
+    Healthcare share of total expenses per year (Step 5).
+    """
+    n_years = len(capital["ages"])
+    chronic_multiplier = risk["chronic_multiplier"]
+    # Step 5 applies the chronic multiplier again on top of Step 4's adjusted OOP
+    oop = [o * chronic_multiplier for o in capital["oop"]]
+    premiums = [p * chronic_multiplier for p in risk["premiums"][:n_years]]
+    healthcare_pct = [
+        (o + p) / (o + p + h) * 100 if (o + p + h) else 0
+        for o, p, h in zip(oop, premiums, capital["household"])
+    ]
+    return {
+        "healthcare_pct": healthcare_pct,
+        "average_healthcare_pct": sum(healthcare_pct) / len(healthcare_pct) if healthcare_pct else None,
+        "current_healthcare_pct": healthcare_pct[0] if healthcare_pct else None,
+    }
+
+
+# --- Stage 6: recommendation ---
+@instrument("pipeline.recommendation", level=INFO)
+def run_recommendation_stage(profile, financials, costs, fin, risk, capital, strategy):
+    """
+    Capital care fund projection and the Step 6 recommendation.
+    """
+    available_cash = fin["available_cash"]
+    chronic_multiplier = risk["chronic_multiplier"]
+
+    # Option 2: redirect current premium + OOP above the digital-first estimate
+    option_2_eligible = (
+        profile.health_status not in ["chronic", "high_risk"] and
+        profile.partner_health_status not in ["chronic", "high_risk"]
+    )
+    annual_savings_option2 = 0
+    if option_2_eligible:
+        monthly_spending = (costs["premium_cost"] / 12 + costs["oop_cost"] / 12) * chronic_multiplier
+        delta = monthly_spending - DIGITAL_FIRST_MONTHLY_COST
+        if delta > 0:
+            annual_savings_option2 = delta * 12
+
+    monthly_contribution = strategy.monthly_contribution
+    if monthly_contribution is None:
+        monthly_contribution = min(100, int(available_cash)) if available_cash > 0 else 0
+    initial_capital = (
+        financials.savings_balance * strategy.savings_pct / 100
+        + monthly_contribution * 12
+        + annual_savings_option2
+    )
+    years_to_retirement = RETIREMENT_AGE - profile.age
+    projected_capital_fund = initial_capital * ((1 + strategy.short_term_growth_rate) ** years_to_retirement)
+
+    recommendation_text, drawdown_option, code = recommend_capital_strategy(
+        profile.health_status, profile.family_history_user, available_cash, financials.savings_balance
+    )
+    recommendations = build_recommendations(
+        profile.to_profile_dict(),
+        INSURANCE_PRICING_TYPES.get(profile.insurance_type, profile.insurance_type),
+        capital["surplus"],
+        None,
+        risk["risk_trajectory"],
+        None,
+        None,
+    )
+
+    return {
+        "option_2_eligible": option_2_eligible,
+        "annual_savings_option2": annual_savings_option2,
+        "initial_capital": initial_capital,
+        "capital_shift": projected_capital_fund,
+        "recommendation_code": code,
+        "drawdown_option": drawdown_option,
+        "recommendation_text": recommendation_text,
+        "recommendations": recommendations,
+    }
+
+
+def assemble_results(costs, fin, risk, capital, summary, rec):
+    """
+    Collects the stage outputs into SimulationResults.
+    """
+    projections = {
+        "healthcare_cost": costs["cost_table"]["Healthcare Cost"],
+        "ltc": costs["cost_table"]["Long-Term Care"],
+        "income": capital["income"],
+        "household": capital["household"],
+        "premiums": capital["premiums"],
+        "oop": capital["oop"],
+        "total_expenses": capital["total_expenses"],
+        "surplus": capital["surplus"],
+        "savings": capital["savings"],
+        "401k": capital["401k"],
+        "healthcare_pct": summary["healthcare_pct"],
+        "risk_trajectory": risk["risk_trajectory"],
+        "retirement_ages": capital["retirement_ages"],
+        "capital_drawn": capital["capital_drawn"],
+        "remaining_capital": capital["remaining_capital"],
+        "unfunded_gap": capital["unfunded_gap"],
+    }
+    # Monthly cash flow, when the pipeline ran with monthly resolution
+    for name in ("monthly_net_cash_flow", "monthly_cash", "annual_net_cash_flow"):
+        if name in capital:
+            projections[name] = capital[name]
+    metrics = {
+        "premium_cost": costs["premium_cost"],
+        "oop_cost": costs["oop_cost"],
+        "net_income_monthly": fin["net_income_monthly"],
+        "available_cash": fin["available_cash"],
+        "chronic_multiplier": risk["chronic_multiplier"],
+        "lifetime_health_risk": risk["lifetime_health_risk"],
+        "lifetime_healthcare_cost": risk["lifetime_healthcare_cost"],
+        "retirement_capital_used": capital["retirement_capital_used"],
+        "retirement_shortfall": capital["retirement_shortfall"],
+        "retirement_depletion_age": capital["retirement_depletion_age"],
+        "retirement_status": capital["retirement_status"],
+        "average_healthcare_pct": summary["average_healthcare_pct"],
+        "current_healthcare_pct": summary["current_healthcare_pct"],
+        "annual_savings_option2": rec["annual_savings_option2"],
+        "initial_capital": rec["initial_capital"],
+        "capital_shift": rec["capital_shift"],
+    }
+    for name in ("shortfall_months", "first_shortfall_age", "first_shortfall_month", "peak_monthly_shortfall"):
+        if name in capital:
+            metrics[name] = capital[name]
+    return SimulationResults(
+        ages=capital["ages"],
+        projections=projections,
+        metrics=metrics,
+        recommendation_code=rec["recommendation_code"],
+        drawdown_option=rec["drawdown_option"],
+        recommendation_text=rec["recommendation_text"],
+        recommendations=rec["recommendations"],
+    )
+
+
+def _coerce_inputs(profile, financials, strategy):
+    if isinstance(profile, dict):
+        profile = ProfileInput.from_dict(profile)
+    if not isinstance(financials, FinancialInputs):
+        financials = FinancialInputs.from_dict(financials)
+    if not isinstance(strategy, CapitalStrategyInput):
+        strategy = CapitalStrategyInput.from_dict(strategy)
+    return profile, financials, strategy
+
+
+def plan_inputs_from_session(session):
+    """
+    Builds pipeline inputs from the values the Streamlit steps keep in session state.
+
+    Step 2 stores incomes net of tax and 401(k) contributions, so they are passed on as
+    gross income with the monthly 401(k) contribution added back and a zero tax rate,
+    which nets to the same value.
+
+    Returns:
+    - Tuple of (ProfileInput, FinancialInputs, CapitalStrategyInput)
+    """
+    profile = dict(session.get("profile") or {})
+    for key in ("insurance_type", "user_chronic_count", "ltc_type", "ltc_monthly_cost"):
+        if profile.get(key) is None:
+            profile[key] = session.get(key)
+
+    contrib_user = session.get("contrib_401k_employee") or 0
+    contrib_partner = session.get("partner_401k_contrib") or 0
+    financials = {
+        "tax_rate": 0,
+        "partner_tax_rate": 0,
+        "income_growth": session.get("income_growth"),
+        "monthly_expenses": session.get("monthly_expenses"),
+        "monthly_debt": session.get("debt_monthly_payment"),
+        "savings_balance": session.get("savings_balance"),
+        "savings_growth": session.get("savings_growth"),
+        "annual_savings_contribution": session.get("annual_contrib"),
+        "start_401k": profile.get("start_401k_user"),
+        "contrib_401k_employee": contrib_user,
+        "contrib_401k_employer": session.get("contrib_401k_employer"),
+        "growth_401k": session.get("growth_401k"),
+        "partner_start_401k": profile.get("start_401k_partner"),
+        "partner_contrib_401k_employee": contrib_partner,
+        "partner_contrib_401k_employer": session.get("partner_employer_401k_contrib"),
+        "partner_growth_401k": profile.get("partner_growth_401k"),
+        "pension_user": session.get("pension_user"),
+        "pension_partner": session.get("pension_partner"),
+        "expense_inflation": session.get("expense_inflation"),
+    }
+    if session.get("net_user_income") is not None:
+        financials["monthly_gross_income"] = session["net_user_income"] + contrib_user / 12
+    if session.get("net_income_monthly_partner") is not None:
+        financials["partner_monthly_gross_income"] = session["net_income_monthly_partner"] + contrib_partner / 12
+
+    strategy = {
+        "monthly_contribution": session.get("capital_monthly_contrib"),
+        "savings_pct": session.get("capital_savings_pct"),
+        "short_term_growth_rate": session.get("short_term_growth_rate"),
+    }
+    return ProfileInput.from_dict(profile), FinancialInputs.from_dict(financials), CapitalStrategyInput.from_dict(strategy)
+
+
+class SimulationPipeline:
+    """
+    Runs all six stages for one plan. Holds only the model assumptions, so one instance
+    can be reused for any number of plans (and across threads or worker processes).
+    """
+
+    def __init__(self, assumptions=None):
+        self.assumptions = assumptions or ModelAssumptions()
+
+    @instrument("pipeline.run", level=INFO)
+    def run(self, profile, financials=None, strategy=None):
+        """
+        Evaluates one plan.
+
+        Parameters:
+        - profile: ProfileInput (or a dict of its fields)
+        - financials: FinancialInputs (or a dict); defaults to the Step 2 defaults
+        - strategy: CapitalStrategyInput (or a dict); defaults to the Step 6 defaults
+
+        Returns:
+        - SimulationResults
+        """
+        profile, financials, strategy = _coerce_inputs(profile, financials, strategy)
+
+        costs = run_costs_stage(profile, financials)
+        fin = run_financials_stage(profile, financials, costs)
+        risk = run_risk_stage(profile, costs, self.assumptions)
+        capital = run_capital_stage(profile, financials, fin, risk, self.assumptions)
+        summary = run_summary_stage(risk, capital)
+        rec = run_recommendation_stage(profile, financials, costs, fin, risk, capital, strategy)
+        return assemble_results(costs, fin, risk, capital, summary, rec)
+
+
+# --- Incremental pipeline: the stages split into graph nodes ---
+def build_simulation_graph():
+    """
+    Dependency graph of the pipeline:
+    costs -> horizon -> premiums/OOP, household/debt, income, savings/401(k) -> cash, surplus
+    -> drawdown -> monthly cash flow, summary -> recommendation.
+    """
+    graph = RecomputeGraph()
+    graph.add(
+        "costs", run_costs_stage,
+        inputs=("profile.age", "profile.health_status", "profile.insurance_type", "profile.family_status",
+                "profile.ltc_type", "profile.ltc_monthly_cost", "financials.expense_inflation"),
+    )
+    graph.add("horizon", lambda costs: costs["n_years"], deps=("costs",))
+    graph.add(
+        "premiums", lambda profile, assumptions, horizon: run_premiums_stage(profile, horizon, assumptions),
+        inputs=("profile.age", "profile.user_chronic_count", "assumptions.base_premium", "assumptions.base_oop",
+                "assumptions.cost_inflation"),
+        deps=("horizon",),
+    )
+    graph.add(
+        "health_risk", run_health_risk_stage,
+        inputs=("profile.age", "profile.health_status", "profile.partner_age", "profile.partner_health_status",
+                "profile.dependent_ages", "profile.dependent_health_statuses"),
+    )
+    graph.add(
+        "household", lambda financials, horizon: run_household_stage(financials, horizon),
+        inputs=("financials.monthly_expenses", "financials.monthly_debt", "financials.expense_inflation"),
+        deps=("horizon",),
+    )
+    graph.add(
+        "income", lambda profile, financials, horizon: run_income_stage(profile, financials, horizon),
+        inputs=("profile.age", "profile.family_status", "profile.partner_age",
+                "financials.monthly_gross_income", "financials.tax_rate", "financials.income_growth",
+                "financials.contrib_401k_employee", "financials.partner_monthly_gross_income",
+                "financials.partner_tax_rate", "financials.partner_income_growth",
+                "financials.partner_contrib_401k_employee"),
+        deps=("horizon",),
+    )
+    graph.add(
+        "balances", lambda profile, financials, horizon: run_balances_stage(profile, financials, horizon),
+        inputs=("profile.age", "profile.family_status", "profile.partner_age", "financials.expense_inflation",
+                "financials.start_401k", "financials.growth_401k", "financials.contrib_401k_employee",
+                "financials.contrib_401k_employer", "financials.partner_start_401k",
+                "financials.partner_growth_401k", "financials.partner_contrib_401k_employee",
+                "financials.partner_contrib_401k_employer", "financials.savings_balance",
+                "financials.savings_growth", "financials.annual_savings_contribution"),
+        deps=("horizon",),
+    )
+    graph.add(
+        "cash", lambda financials, costs, income: compute_available_cash(financials, costs, income["net_income_monthly"]),
+        inputs=("financials.monthly_expenses", "financials.monthly_debt", "financials.annual_savings_contribution"),
+        deps=("costs", "income"),
+    )
+    graph.add(
+        "surplus",
+        lambda profile, financials, assumptions, income, household, balances, premiums: run_surplus_stage(
+            profile, financials, {**income, **household, **balances}, premiums, assumptions
+        ),
+        inputs=("profile.age", "profile.insurance_type", "financials.pension_user", "financials.pension_partner",
+                "assumptions.projection_years", "assumptions.post_retirement_growth",
+                "assumptions.fallback_income_growth"),
+        deps=("income", "household", "balances", "premiums"),
+    )
+    graph.add(
+        "drawdown",
+        lambda profile, financials, income, balances, surplus: run_drawdown_stage(
+            profile, financials, {**income, **balances}, surplus
+        ),
+        inputs=("profile.age", "financials.pension_user", "financials.pension_partner"),
+        deps=("income", "balances", "surplus"),
+    )
+    graph.add(
+        "monthly",
+        lambda financials, assumptions, surplus, drawdown: run_monthly_stage(
+            financials, {**surplus, **drawdown}, assumptions
+        ),
+        inputs=("financials.monthly_debt", "financials.expense_inflation", "financials.annual_savings_contribution",
+                "assumptions.monthly_resolution", "assumptions.monthly_timings", "assumptions.monthly_opening_cash"),
+        deps=("surplus", "drawdown"),
+    )
+    graph.add(
+        "summary", lambda premiums, surplus: run_summary_stage(premiums, surplus),
+        deps=("premiums", "surplus"),
+    )
+    graph.add(
+        "recommendation",
+        lambda profile, financials, strategy, costs, cash, premiums, health_risk, surplus: run_recommendation_stage(
+            profile, financials, costs, {"available_cash": cash}, {**premiums, **health_risk}, surplus, strategy
+        ),
+        inputs=("profile", "financials.savings_balance", "strategy"),
+        deps=("costs", "cash", "premiums", "health_risk", "surplus"),
+    )
+    return graph
+
+
+class IncrementalSimulationPipeline:
+    """
+    SimulationPipeline that keeps every node's result between runs and recomputes only
+    the nodes whose inputs changed (e.g. moving the 401(k) growth rate reruns the
+    balances, surplus, drawdown, summary and recommendation nodes, not the costs).
+
+    Holds per-plan state: use one instance per session. Results share lists with the
+    cached node values, so treat them as read-only.
+    """
+
+    def __init__(self, assumptions=None):
+        self.assumptions = assumptions or ModelAssumptions()
+        self.graph = build_simulation_graph()
+
+    @instrument("pipeline.run_incremental", level=INFO)
+    def run(self, profile, financials=None, strategy=None):
+        """
+        Evaluates one plan, reusing unchanged node results from the previous run.
+        Parameters and return value are the same as SimulationPipeline.run.
+        """
+        profile, financials, strategy = _coerce_inputs(profile, financials, strategy)
+        values = self.graph.evaluate({
+            "profile": profile,
+            "financials": financials,
+            "strategy": strategy,
+            "assumptions": self.assumptions,
+        })
+        fin = {**values["income"], **values["household"], **values["balances"], "available_cash": values["cash"]}
+        risk = {**values["premiums"], **values["health_risk"]}
+        capital = {**values["surplus"], **values["drawdown"], **values["monthly"]}
+        return assemble_results(values["costs"], fin, risk, capital, values["summary"], values["recommendation"])
+
+    @property
+    def last_dirty(self):
+        """
+        Nodes recomputed by the last run.
+        """
+        return self.graph.last_dirty
+
+
+def run_simulation(profile, financials=None, strategy=None, assumptions=None):
+    """
+    Convenience wrapper: runs one plan through a fresh SimulationPipeline.
+    """
+    return SimulationPipeline(assumptions).run(profile, financials, strategy)
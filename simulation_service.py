@@ -0,0 +1,393 @@
+# simulation_service.py
+#
+# HTTP API for the simulation pipeline: a plan goes in, and its projections plus
+# the recommendation come back. It runs on asyncio and the standard library
+# only, so it needs nothing beyond requirements.txt and runs fully locally.
+#
+#     POST /v1/simulate   body: {"profile": {...}, "financials": {...}, "strategy": {...}}
+#                         or a plan as main.py exports it / a flat batch_runner record
+#     GET  /health        queue depth, in-flight batches and request counters
+#
+# Model runs are CPU-bound, so they go to a process pool. Requests that arrive
+# while the workers are busy are queued and sent to a worker together, up to
+# max_batch_size per task, which amortizes the inter-process round trip. The
+# queue is bounded: when it is full, new requests get 503 with Retry-After
+# (backpressure) instead of piling up. A request still unanswered after
+# request_timeout seconds gets 504.
+#
+# Usage:
+#     python simulation_service.py [--host 127.0.0.1] [--port 8502] [--workers 4]
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_runner import plan_to_inputs
+from simulation_pipeline import CapitalStrategyInput, FinancialInputs, ProfileInput, SimulationPipeline
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_QUEUE = 1024
+DEFAULT_REQUEST_TIMEOUT = 10.0
+
+# Idle keep-alive connections are closed after this long without a request
+IDLE_TIMEOUT = 15.0
+MAX_BODY_BYTES = 1024 * 1024
+
+HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+    422: "Unprocessable Entity", 500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+
+class ServiceError(Exception):
+    """
+    Error returned to the client as {"error": message} with an HTTP status.
+    """
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+# --- Worker side ---
+_pipeline = None
+
+
+def _init_worker(assumptions):
+    global _pipeline
+    _pipeline = SimulationPipeline(assumptions)
+
+
+def request_inputs(payload):
+    """
+    Pipeline inputs of one request body: {"profile", "financials", "strategy"} sections,
+    or anything batch_runner.plan_to_inputs accepts.
+
+    Returns:
+    - Tuple of (ProfileInput, FinancialInputs, CapitalStrategyInput)
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    if isinstance(payload.get("profile"), dict) and ("financials" in payload or "strategy" in payload):
+        return (
+            ProfileInput.from_dict(payload["profile"]),
+            FinancialInputs.from_dict(payload.get("financials")),
+            CapitalStrategyInput.from_dict(payload.get("strategy")),
+        )
+    return plan_to_inputs(payload)
+
+
+def results_payload(results):
+    """
+    JSON body of one SimulationResults.
+    """
+    return {
+        "ages": results.ages,
+        "projections": results.projections,
+        "metrics": results.metrics,
+        "recommendation": {
+            "code": results.recommendation_code,
+            "drawdown_option": results.drawdown_option,
+            "text": results.recommendation_text,
+            "recommendations": results.recommendations,
+        },
+    }
+
+
+def simulate_batch(payloads):
+    """
+    Worker entry point: runs a batch of request bodies with the process-wide pipeline.
+
+    Returns:
+    - List of (True, response body) or (False, error message), in request order
+    """
+    pipeline = _pipeline or SimulationPipeline()
+    outcomes = []
+    for payload in payloads:
+        try:
+            outcomes.append((True, results_payload(pipeline.run(*request_inputs(payload)))))
+        except Exception as e:
+            outcomes.append((False, f"{type(e).__name__}: {e}"))
+    return outcomes
+
+
+# --- Service ---
+class SimulationService:
+    """
+    Queues simulate requests and runs them in batches on a process pool.
+
+    At most `workers` batches are in flight; everything else waits in a queue of
+    `max_queue` requests. Use as `async with SimulationService(...) as service:`.
+    """
+
+    def __init__(self, workers=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_queue=DEFAULT_MAX_QUEUE,
+                 request_timeout=DEFAULT_REQUEST_TIMEOUT, assumptions=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch_size = max_batch_size
+        self.max_queue = max_queue
+        self.request_timeout = request_timeout
+        self.assumptions = assumptions
+        self.counters = {"served": 0, "failed": 0, "rejected": 0, "timed_out": 0, "batches": 0}
+        self._queue = None
+        self._slots = None
+        self._executor = None
+        self._batcher = None
+        self._in_flight = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.assumptions,)
+        )
+        # Start the workers now so the first requests do not pay for process start-up
+        await asyncio.gather(*[
+            asyncio.get_running_loop().run_in_executor(self._executor, simulate_batch, [])
+            for _ in range(self.workers)
+        ])
+        self._batcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        if self._batcher:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, *self._in_flight, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def simulate(self, payload):
+        """
+        Runs one request body through the pipeline.
+
+        Returns:
+        - Response body dict (see results_payload)
+
+        Raises:
+        - ServiceError: 503 when the queue is full, 504 on timeout, 422 when the plan is invalid
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((payload, future))
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise ServiceError(503, "Simulation queue is full, retry shortly", {"Retry-After": "1"})
+        try:
+            # shield: a timed-out request leaves its future for the batcher to skip
+            body = await asyncio.wait_for(asyncio.shield(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            self.counters["timed_out"] += 1
+            raise ServiceError(504, f"Simulation did not finish within {self.request_timeout:g}s")
+        except ServiceError:
+            self.counters["failed"] += 1
+            raise
+        self.counters["served"] += 1
+        return body
+
+    async def _dispatch(self):
+        # Take a worker slot, then everything queued meanwhile (up to max_batch_size) is one batch
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            batch = [(payload, future) for payload, future in batch if not future.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._run_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, batch):
+        try:
+            outcomes = await asyncio.get_running_loop().run_in_executor(
+                self._executor, simulate_batch, [payload for payload, _ in batch]
+            )
+        except Exception as e:
+            outcomes = [(False, e)] * len(batch)
+        finally:
+            self._slots.release()
+        self.counters["batches"] += 1
+        for (_, future), (ok, value) in zip(batch, outcomes):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            elif isinstance(value, Exception):
+                future.set_exception(ServiceError(500, f"Worker failed: {type(value).__name__}: {value}"))
+            else:
+                future.set_exception(ServiceError(422, value))
+
+    def stats(self):
+        return {
+            **self.counters,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_flight_batches": len(self._in_flight),
+            "workers": self.workers,
+            "max_batch_size": self.max_batch_size,
+            "max_queue": self.max_queue,
+        }
+
+
+# --- HTTP routes ---
+async def handle_simulate(service, body):
+    try:
+        payload = json.loads(body or b"null")
+    except ValueError as e:
+        raise ServiceError(400, f"Invalid JSON: {e}")
+    return await service.simulate(payload)
+
+
+async def handle_health(service, body):
+    return {"status": "ok", **service.stats()}
+
+
+ROUTES = {
+    ("POST", "/v1/simulate"): handle_simulate,
+    ("GET", "/health"): handle_health,
+}
+
+
+async def _read_request(reader):
+    # Returns (method, path, headers, body), or None when the client closed the connection
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise ServiceError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise ServiceError(400, "Content-Length must be an integer")
+    if length < 0:
+        raise ServiceError(400, "Content-Length must not be negative")
+    if length > MAX_BODY_BYTES:
+        raise ServiceError(413, f"Request body is larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?", 1)[0], headers, body
+
+
+def _response(status, body, keep_alive, headers=None):
+    payload = json.dumps(body).encode("utf-8")
+    lines = [
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(payload)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        *[f"{name}: {value}" for name, value in (headers or {}).items()],
+    ]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload
+
+
+async def handle_connection(service, reader, writer):
+    """
+    Serves HTTP/1.1 requests on one connection until the client closes it or goes idle.
+    """
+    try:
+        while True:
+            try:
+                request = await asyncio.wait_for(_read_request(reader), IDLE_TIMEOUT)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                break
+            except ServiceError as e:
+                writer.write(_response(e.status, {"error": e.message}, keep_alive=False))
+                break
+            if request is None:
+                break
+            method, path, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+
+            handler = ROUTES.get((method, path))
+            try:
+                if handler is None:
+                    allowed = any(route_path == path for _, route_path in ROUTES)
+                    raise ServiceError(405 if allowed else 404, f"No route for {method} {path}")
+                status, response, extra_headers = 200, await handler(service, body), None
+            except ServiceError as e:
+                status, response, extra_headers = e.status, {"error": e.message}, e.headers
+            writer.write(_response(status, response, keep_alive, extra_headers))
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None, **service_options):
+    """
+    Runs the HTTP service until cancelled.
+
+    Parameters:
+    - host, port: address to listen on (default: localhost only)
+    - ready: optional callable(port) called once the service accepts connections
+    - service_options: SimulationService keyword arguments
+    """
+    async with SimulationService(**service_options) as service:
+        server = await asyncio.start_server(
+            lambda reader, writer: handle_connection(service, reader, writer), host, port
+        )
+        async with server:
+            if ready:
+                ready(server.sockets[0].getsockname()[1])
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the simulation pipeline over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="listen address (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="listen port (0 picks a free port)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="plans per worker task")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="queued requests before 503")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT, help="request timeout (seconds)")
+    args = parser.parse_args(argv)
+
+    def ready(port):
+        print(f"Simulation service listening on http://{args.host}:{port}", flush=True)
+
+    async def run():
+        # SIGTERM (e.g. from a process manager) stops the service like Ctrl+C, so the worker pool shuts down
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass  # No asyncio signal handlers on Windows
+        await serve(
+            args.host, args.port, ready=ready, workers=args.workers, max_batch_size=args.max_batch_size,
+            max_queue=args.max_queue, request_timeout=args.timeout,
+        )
+
+    try:
+        asyncio.run(run())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,62 +1,27 @@
-import pandas as pd
+import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
+from cost_engine import HEALTH_CODES, INSURANCE_CODES, generate_cost_arrays, cost_table
+from monte_carlo_engine import DEFAULT_VOLATILITIES, simulate_investment_strategy_monte_carlo
+from projection_engine import compound_paths
+from projection_model import simulate_capital_fund
+from recommendation_rules import CHRONIC_PLAN
+from telemetry import instrument
 
 
+@instrument()
 def generate_costs(profile, care_preferences):
-    ages = list(range(profile["age"], 86))
-    base_cost = 2000
-    cost_data = []
-
-    for i, age in enumerate(ages):
-        insurance_type = profile.get("insurance_type", "None")
-        # Chronic illness adjustment
-        if profile.get("health_status") == "chronic":
-            base_cost = 6500
-            chronic_inflation = st.session_state.get("expense_inflation", 0.05) + 0.02
-            years_since_start = age - profile["age"]
-            total_cost = base_cost * ((1 + chronic_inflation) ** years_since_start)
-
-            oop = total_cost * (
-                0.15 if insurance_type == "Employer"
-                else 0.2 if insurance_type == "Marketplace"
-                else 0.5
-            )
-
-            base_premium = 1500 if insurance_type == "Employer" else 1800 if insurance_type == "Marketplace" else 0
-            premium = base_premium * ((1 + chronic_inflation) ** years_since_start)
-
-            print(f"--- Chronic Cost Debug ---")
-            print(f"Age: {age}")
-            print(f"Years Since Start: {years_since_start}")
-            print(f"Base Cost: {base_cost}")
-            print(f"Chronic Inflation Rate: {chronic_inflation:.4f}")
-            print(f"Total Healthcare Cost: {total_cost:.2f}")
-            print(f"OOP Cost: {oop:.2f}")
-            print(f"Premium: {premium:.2f}")
-        else:
-            total_cost = 2000 + (age - profile["age"]) * 100
-            if insurance_type == "Employer":
-                oop = total_cost * 0.15
-                premium = 1500 + (age - profile["age"]) * 40
-            elif insurance_type == "Marketplace":
-                oop = total_cost * 0.2
-                premium = 1800 + (age - profile["age"]) * 60
-            else:  # Uninsured
-                oop = total_cost * 0.5
-                premium = 0
-
-        entry = {
-            "Age": age,
-            "Healthcare Cost": total_cost,
-            "OOP": oop,
-            "Premium": premium
-        }
-        cost_data.append(entry)
-
-    return pd.DataFrame(cost_data)
-
-def simulate_investment_strategy(cost_df, strategy=None):
+    # Single-profile view of the vectorized cost engine
+    insurance_type = profile.get("insurance_type", "None")
+    cost_arrays = generate_cost_arrays(
+        [profile["age"]],
+        [HEALTH_CODES.get(profile.get("health_status"), 0)],
+        [INSURANCE_CODES.get(insurance_type, INSURANCE_CODES["None"])],
+        expense_inflation=st.session_state.get("expense_inflation", 0.05),
+    )
+    return cost_table(cost_arrays)
+
+@instrument()
+def simulate_investment_strategy(cost_df, strategy=None, monte_carlo_paths=0, seed=None):
     df = cost_df.copy()
 
     # Extract user-defined surplus and capital care allocation
@@ -89,22 +54,28 @@ def simulate_investment_strategy(cost_df, strategy=None):
     st.session_state.capital_from_surplus = surplus_contribution
     st.session_state.capital_from_reallocation = premium_contribution
     st.session_state.total_capital_contribution = annual_contribution
-    capital_fund_value = 0
-    capital_used = []
-    capital_balance = []
-    income_available = []
-    surplus_allocated = []
-
-    for cost in df["Healthcare Cost"]:
-        capital_fund_value = (capital_fund_value + annual_contribution) * (1 + blended_growth)
-        used = min(capital_fund_value, cost)
-        capital_fund_value -= used
-        capital_used.append(used)
-        capital_balance.append(capital_fund_value)
+    capital_used, capital_balance = simulate_capital_fund(df["Healthcare Cost"], annual_contribution, blended_growth)
 
     df["Capital Used"] = capital_used
     df["Capital Fund Remaining"] = capital_balance
 
+    # Optional stochastic mode: percentile bands and depletion probability across return paths
+    if monte_carlo_paths:
+        monte_carlo = simulate_investment_strategy_monte_carlo(
+            df["Healthcare Cost"].to_numpy(),
+            annual_contribution,
+            {"short_term": short_alloc, "mid_term": mid_alloc, "long_term": long_alloc},
+            mean_rates={"short_term": short_rate, "mid_term": mid_rate, "long_term": long_rate},
+            volatilities=st.session_state.get("return_volatilities", DEFAULT_VOLATILITIES),
+            n_paths=monte_carlo_paths,
+            distribution=st.session_state.get("return_distribution", "normal"),
+            seed=seed,
+        )
+        df["Capital Fund P10"] = monte_carlo["fund_balance"][10]
+        df["Capital Fund P50"] = monte_carlo["fund_balance"][50]
+        df["Capital Fund P90"] = monte_carlo["fund_balance"][90]
+        st.session_state.capital_monte_carlo = monte_carlo
+
     # Export DataFrame for downstream rendering (full DataFrame, no chart rendering here)
     st.session_state.capital_graph_df = df
 
@@ -117,30 +88,22 @@ def display_ai_recommendations(after_capital_strategy):
     Display the AI recommendation section after simulation outputs.
     Requires `after_capital_strategy` DataFrame and Streamlit session state variables.
     """
-    # --- Inserted chronic/high-risk recommendation logic ---
+    # --- Chronic/high-risk plan (recommendation_rules.CHRONIC_PLAN) ---
     profile = st.session_state.get("profile", {})
-    health_status = profile.get("health_status", "healthy")
-    insurance_type = profile.get("insurance_type", "None")
-    free_cash = st.session_state.get("free_cash", 0)
-    savings = st.session_state.get("current_savings", 0)
-    underinsured = insurance_type in ["None", "Marketplace / Self-insured"]
-
-    # Apply chronic/high-risk recommendation logic
-    if health_status in ["chronic", "high_risk"]:
-        if free_cash > 0 and savings > 0:
-            if underinsured:
-                st.success("🧠 Recommended Plan: Capital-Bridge Plan (for chronic users with free cash and savings)")
-            else:
-                st.success("🧠 Recommended Plan: Protection-First Plan (chronic user with adequate insurance)")
-        elif savings > 0:
-            st.success("🧠 Recommended Plan: Capital-First Plan (chronic user with savings but low income)")
-        else:
-            st.success("🧠 Recommended Plan: Capital-First Plan (chronic user with limited financial capacity)")
+    plans = CHRONIC_PLAN.messages({
+        "health_status": profile.get("health_status", "healthy"),
+        "insurance_type": profile.get("insurance_type", "None"),
+        "available_cash": st.session_state.get("free_cash", 0),
+        "savings_balance": st.session_state.get("current_savings", 0),
+    })
+    if plans:
+        for plan in plans:
+            st.success(plan)
         return
-    # --- End inserted logic ---
     st.markdown("### 🤖 Personalized Strategy Breakdown")
 
 
+@instrument()
 def simulate_capital_allocation(cost_df, strategy_allocation, initial_capital, monthly_contribution, fund_source,
                                 pct_from_savings, base_surplus=None):
     updated_df = cost_df.copy()
@@ -171,6 +134,7 @@ def simulate_capital_allocation(cost_df, strategy_allocation, initial_capital, m
 
     return updated_df
 
+@instrument()
 def simulate_full_investment_strategy(
     profile,
     net_income_annual,
@@ -187,49 +151,27 @@ def simulate_full_investment_strategy(
     partner_employer_401k_contrib
 ):
     years = profile.get("simulation_years", 40)
-
-    # Initialize investment buckets
-    short_term = []
-    mid_term = []
-    long_term = []
-
-    value_short = profile.get("start_short_term", 0)
-    value_mid = profile.get("start_mid_term", 0)
-    value_long = profile.get("start_long_term", 0)
-
-    for i in range(years):
-        annual_savings = net_income_annual * savings_rate * ((1 + savings_growth) ** i)
-
-        value_short *= (1 + growth_short)
-        value_short += annual_savings * capital_allocations.get("short_term", 0)
-        short_term.append(value_short)
-
-        value_mid *= (1 + growth_mid)
-        value_mid += annual_savings * capital_allocations.get("mid_term", 0)
-        mid_term.append(value_mid)
-
-        value_long *= (1 + growth_long)
-        value_long += annual_savings * capital_allocations.get("long_term", 0)
-        long_term.append(value_long)
-
-    # --- USER 401(k) ---
-    user_401k = []
-    value_401k = profile.get("start_401k_user", 0)
-    for i in range(years):
-        value_401k *= (1 + growth_401k)
-        value_401k += contrib_401k_employee + contrib_401k_employer
-        user_401k.append(value_401k)
-
-    # --- PARTNER 401(k) ---
-    partner_401k = []
-    if profile.get("family_status") == "family":
-        value_partner_401k = profile.get("start_401k_partner", 0)
-        for i in range(years):
-            value_partner_401k *= (1 + growth_401k)
-            value_partner_401k += partner_401k_contrib + partner_employer_401k_contrib
-            partner_401k.append(value_partner_401k)
-    else:
-        partner_401k = [0] * years
+    family = profile.get("family_status") == "family"
+
+    # Yearly contributions to the short/mid/long-term buckets and the two 401(k)s
+    annual_savings = net_income_annual * savings_rate * (1 + savings_growth) ** np.arange(years)
+    contributions = np.vstack([
+        annual_savings * capital_allocations.get("short_term", 0),
+        annual_savings * capital_allocations.get("mid_term", 0),
+        annual_savings * capital_allocations.get("long_term", 0),
+        np.full(years, contrib_401k_employee + contrib_401k_employer),
+        np.full(years, partner_401k_contrib + partner_employer_401k_contrib if family else 0),
+    ])
+    starts = [
+        profile.get("start_short_term", 0),
+        profile.get("start_mid_term", 0),
+        profile.get("start_long_term", 0),
+        profile.get("start_401k_user", 0),
+        profile.get("start_401k_partner", 0) if family else 0,
+    ]
+    growths = [growth_short, growth_mid, growth_long, growth_401k, growth_401k]
+    # All five accounts grow, then take the year's contribution, in one vectorized pass
+    short_term, mid_term, long_term, user_401k, partner_401k = compound_paths(starts, growths, contributions).tolist()
 
     return {
         "short_term": short_term,
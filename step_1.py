@@ -1,8 +1,16 @@
+import pandas as pd
 import streamlit as st
 from simulator_core import generate_costs
 from cost_library import estimate_uninsured_oop_by_year
-from simulator_core import generate_costs
-from cost_library import estimate_uninsured_oop_by_year
+from pricing_engine import PRICING
+from projection_cache import PROJECTION_CACHE, cached_call
+import telemetry
+from projection_model import (
+    project_corrected_insurance_costs,
+    project_ltc_costs,
+    project_medicare_adjusted_costs,
+    project_total_expenses,
+)
 
 
 def run_step_1(tab1):
@@ -130,8 +138,10 @@ def run_step_1(tab1):
         elif use_avg_inputs == "Use National Averages (Recommended)":
             # Use national benchmark data for selected insurance type
             insurance_type_key = "Employer" if insurance_type == "Employer-based" else "Marketplace"
-            print("DEBUG: Calling get_insurance_costs with:", insurance_type_key, health_status, family_status, years)
-            premiums, oop_costs = get_insurance_costs(
+            telemetry.debug("Calling get_insurance_costs", insurance_type=insurance_type_key, health_status=health_status,
+                            family_status=family_status, years=years)
+            premiums, oop_costs = cached_call(
+                get_insurance_costs,
                 insurance_type=insurance_type_key,
                 health_status=health_status,
                 family_status=family_status,
@@ -139,8 +149,7 @@ def run_step_1(tab1):
                 partner_age=partner_age if family_status == "family" else None,
                 years_to_simulate=years
             )
-            print("DEBUG: Premiums Returned:", premiums)
-            print("DEBUG: OOP Costs Returned:", oop_costs)
+            telemetry.debug("get_insurance_costs returned", premiums=premiums, oop_costs=oop_costs)
             # --- Display correct premium and OOP values after get_insurance_costs ---
             st.markdown(f"**Premium:** ${int(premiums[0]):,}/yr (employee contribution)")
             st.markdown(f"**Out-of-Pocket (risk-adjusted):** ${int(oop_costs[0]):,}/yr")
@@ -272,63 +281,27 @@ def run_step_1(tab1):
             }
             st.session_state["age"] = user_age
             care_prefs = st.session_state.get("care_prefs", {})
-            cost_df = generate_costs(profile, care_prefs)
-
-            if st.session_state.get("include_ltc", False):
-                ltc_inputs = st.session_state.get("ltc_inputs", {})
-                average_ltc_monthly = (
-                                              ltc_inputs["assisted_living"] +
-                                              ltc_inputs["nursing_semi"] +
-                                              ltc_inputs["nursing_private"]
-                                      ) / 3
-                average_ltc_annual = average_ltc_monthly * 12
-
-                start_age = profile["age"]
-                inflation = st.session_state.get("expense_inflation", 0.05)
-                longterm_costs = []
-
-                for i in range(len(cost_df)):
-                    age = start_age + i
-                    if age >= 75:
-                        cost = average_ltc_annual * ((1 + inflation) ** i)
-                    else:
-                        cost = 0
-                    longterm_costs.append(cost)
+            # generate_costs also reads expense_inflation from session state, so it is part of the key
+            cost_df = PROJECTION_CACHE.get_or_compute(
+                "simulator_core.generate_costs",
+                (profile, care_prefs, st.session_state.get("expense_inflation", 0.05)),
+                lambda: generate_costs(profile, care_prefs),
+            )
 
-                cost_df["Long-Term Care"] = longterm_costs
-                cost_df["Healthcare Cost"] += cost_df["Long-Term Care"]
-            else:
-                cost_df["Long-Term Care"] = [0] * len(cost_df)
+            # Expected long-term care cost for the selected setting (zero without LTC), added to the
+            # healthcare cost below; assign returns a new frame, so the cached cost table is never modified
+            longterm_costs = cached_call(
+                project_ltc_costs, st.session_state.get("ltc_type"), st.session_state.get("ltc_monthly_cost", 0),
+                st.session_state.get("expense_inflation", 0.05), profile["age"], len(cost_df)
+            )
+            cost_df = cost_df.assign(**{"Long-Term Care": longterm_costs})
 
             # --- Patch: Ensure Healthcare Cost fallback if needed ---
             if "Capital+OOP" not in cost_df.columns and "Healthcare Cost" not in cost_df.columns:
                 cost_df["Healthcare Cost"] = cost_df.get("Total Healthcare", 0)
 
             # --- Begin Premium Correction/Adjustment Logic ---
-            # Define correction_ratio (example structure, replace with actual lookup as needed)
-            # This should be loaded/defined elsewhere or imported, here is a sample for illustration:
-            correction_ratio = {
-                "18-34": {"healthy": {"ESI": 1.0, "ACA": 1.1}, "chronic": {"ESI": 1.2, "ACA": 1.3}, "high_risk": {"ESI": 1.5, "ACA": 1.7}},
-                "35-49": {"healthy": {"ESI": 1.1, "ACA": 1.2}, "chronic": {"ESI": 1.3, "ACA": 1.4}, "high_risk": {"ESI": 1.6, "ACA": 1.8}},
-                "50-64": {"healthy": {"ESI": 1.2, "ACA": 1.3}, "chronic": {"ESI": 1.4, "ACA": 1.5}, "high_risk": {"ESI": 1.7, "ACA": 1.9}},
-                "65+":   {"healthy": {"ESI": 1.0, "ACA": 1.0}, "chronic": {"ESI": 1.0, "ACA": 1.0}, "high_risk": {"ESI": 1.0, "ACA": 1.0}},
-            }
-            # Determine age bracket for correction
-            def get_age_bracket(age):
-                if age < 35:
-                    return "18-34"
-                elif age < 50:
-                    return "35-49"
-                elif age < 65:
-                    return "50-64"
-                else:
-                    return "65+"
-            # Map UI insurance_type to correction key
-            insurance_map = {
-                "Employer-based": "ESI",
-                "Marketplace / Self-insured": "ACA",
-                "None": "Uninsured"
-            }
+            # Correction ratios and age brackets live in projection_model
             # --- insurance_type_key assignment for Step 1 Calculation ---
             if insurance_type == "Employer-based":
                 insurance_type_key = "ESI"
@@ -336,20 +309,9 @@ def run_step_1(tab1):
                 insurance_type_key = "ACA"
             else:
                 insurance_type_key = "Uninsured"
-            # Medicare values for age 65+ (example, can make these user adjustable)
-            medicare_employee_value = 1800
-            medicare_employer_value = 0
-
             # For projection, use the number of years in cost_df and user's starting age
             n_years = len(cost_df)
             start_age = profile["age"]
-            # Adjust high-risk users to revert after 10 years
-            adjusted_health_status = []
-            for i in range(n_years):
-                if health_status == "high_risk" and i >= 10:
-                    adjusted_health_status.append("chronic")  # downgrade from high-risk to chronic
-                else:
-                    adjusted_health_status.append(health_status)
             # Save base premiums for reference
             base_employee_premium = st.session_state.get("employee_premium", 0)
             base_employer_premium = st.session_state.get("employer_premium", 0)
@@ -361,29 +323,18 @@ def run_step_1(tab1):
                 if insurance_type_key in ["ESI", "ACA"]:
                     base_premium = st.session_state.get("premium", 0)
                     base_oop = st.session_state.get("oop_cost", 0)
-                    inflation_rate = premium_inflation
-                    premium_years = []
-                    oop_years = []
-                    for i in range(n_years):
-                        age = start_age + i
-                        adj_premium = base_premium * ((1 + inflation_rate) ** i)
-                        adj_oop = base_oop * ((1 + inflation_rate) ** i)
-                        if age >= 65:
-                            adj_premium *= 0.5
-                            adj_oop *= 0.7
-                        premium_years.append(adj_premium)
-                        oop_years.append(adj_oop)
+                    premium_years, oop_years = cached_call(
+                        project_medicare_adjusted_costs, base_premium, base_oop, premium_inflation, start_age, n_years
+                    )
                     premiums = premium_years
                     employer_premiums = [0] * n_years
                     total_oop_over_time = oop_years
                 elif insurance_type_key == "Uninsured":
                     # Uninsured logic using validated lifetime cost estimates divided over expected years
-                    if health_status == "healthy":
-                        lifetime_cost = 75000
-                    elif health_status == "chronic":
-                        lifetime_cost = 459000
-                    else:  # high_risk or other
-                        lifetime_cost = 472000
+                    lifetime_table = PRICING.uninsured_lifetime_oop
+                    lifetime_cost = float(lifetime_table.values[
+                        lifetime_table.code("health", health_status, lifetime_table.code("health", "high_risk"))
+                    ])
 
                     # Estimate number of years until age 85
                     years = 85 - user_age
@@ -409,42 +360,25 @@ def run_step_1(tab1):
                 cost_df["Premiums"] = premiums
                 cost_df["Employer Premiums"] = employer_premiums
                 cost_df["OOP Cost"] = total_oop_over_time
-                cost_df["Healthcare Cost"] = cost_df["OOP Cost"] + cost_df["Premiums"]
+                cost_df["Healthcare Cost"] = cost_df["OOP Cost"] + cost_df["Premiums"] + cost_df["Long-Term Care"]
             else:
                 # Build premium and OOP projections with correction factors and inflation, plus Medicare adjustment
-                employee_premiums = []
-                employer_premiums = []
-                oop_years = []
-                # --- Ensure oop_pct is defined ---
-                oop_pct = 0.25  # Default to 25% of medical costs if not otherwise defined
-                for i in range(n_years):
-                    age = start_age + i
-                    # Correction only for ESI or ACA, not for "None"
-                    if insurance_type_key in ["ESI", "ACA"]:
-                        age_bracket = get_age_bracket(age)
-                        health = adjusted_health_status[i]
-                        correction = correction_ratio.get(age_bracket, {}).get(health, {}).get(insurance_type_key, 1.0)
-                    else:
-                        correction = 1.0
-                    # Pre-65: use corrected, post-65: switch to Medicare if ESI
-                    if age >= 65 and insurance_type_key == "ESI":
-                        emp_prem = medicare_employee_value
-                        emr_prem = medicare_employer_value
-                        # For OOP: use base_oop * inflation, then Medicare adjustment
-                        adj_oop = st.session_state.get("oop_cost", 0) * ((1 + premium_inflation) ** i)
-                        adj_oop *= 0.7
-                    else:
-                        emp_prem = base_employee_premium * ((1 + premium_inflation) ** i) * correction
-                        emr_prem = base_employer_premium * ((1 + premium_inflation) ** i) * correction
-                        adj_oop = st.session_state.get("oop_cost", 0) * ((1 + premium_inflation) ** i) * correction
-                    employee_premiums.append(emp_prem)
-                    employer_premiums.append(emr_prem)
-                    oop_years.append(adj_oop)
+                employee_premiums, employer_premiums, oop_years = cached_call(
+                    project_corrected_insurance_costs,
+                    insurance_type_key,
+                    health_status,
+                    base_employee_premium,
+                    base_employer_premium,
+                    st.session_state.get("oop_cost", 0),
+                    premium_inflation,
+                    start_age,
+                    n_years,
+                )
                 premiums = employee_premiums
                 cost_df["Premiums"] = premiums
                 cost_df["Employer Premiums"] = employer_premiums
                 cost_df["OOP Cost"] = oop_years
-                cost_df["Healthcare Cost"] = cost_df["OOP Cost"] + cost_df["Premiums"]
+                cost_df["Healthcare Cost"] = cost_df["OOP Cost"] + cost_df["Premiums"] + cost_df["Long-Term Care"]
 
             st.session_state.cost_df = cost_df
             st.session_state.profile = profile
@@ -476,18 +410,18 @@ def run_step_1(tab1):
                 st.session_state["monthly_premium"] = 0
 
             # --- Insurance cost charting section (refactored for fallback and debug) ---
-            import pandas as pd
             # --- Refactored insurance cost visualization logic ---
             # Get insurance costs for graphing (clipped to simulation years)
             years_to_simulate = n_years
 
             # Insurance cost logic: ensure correct separation for ESI, ACA, and uninsured
             def get_premiums_and_oop_for_graph(insurance_type, health_status, family_status, user_age, years_to_simulate):
-                print("Insurance Type Selected:", insurance_type)
+                telemetry.debug("Insurance type selected", insurance_type=insurance_type)
                 if insurance_type == "Employer-based":
                     # Use ESI logic
                     from insurance_cost_model import get_insurance_costs
-                    premiums, oop_costs = get_insurance_costs(
+                    premiums, oop_costs = cached_call(
+                        get_insurance_costs,
                         insurance_type="Employer",
                         health_status=health_status,
                         family_status=family_status,
@@ -507,7 +441,8 @@ def run_step_1(tab1):
                 elif insurance_type == "Marketplace / Self-insured":
                     # Use ACA/Marketplace logic
                     from insurance_cost_model import get_insurance_costs
-                    premiums, oop_costs = get_insurance_costs(
+                    premiums, oop_costs = cached_call(
+                        get_insurance_costs,
                         insurance_type="Marketplace",
                         health_status=health_status,
                         family_status=family_status,
@@ -526,12 +461,10 @@ def run_step_1(tab1):
                     st.session_state["monthly_oop"] = monthly_oop
                 elif insurance_type == "None":
                     # Uninsured logic using validated lifetime cost estimates divided over expected years
-                    if health_status == "healthy":
-                        lifetime_cost = 75000
-                    elif health_status == "chronic":
-                        lifetime_cost = 459000
-                    else:  # high_risk or other
-                        lifetime_cost = 472000
+                    lifetime_table = PRICING.uninsured_lifetime_oop
+                    lifetime_cost = float(lifetime_table.values[
+                        lifetime_table.code("health", health_status, lifetime_table.code("health", "high_risk"))
+                    ])
 
                     # Estimate number of years until age 85
                     years = 85 - user_age
@@ -560,8 +493,7 @@ def run_step_1(tab1):
                     st.session_state["oop_cost"] = oop_cost
                     st.session_state["monthly_premium"] = monthly_premium
                     st.session_state["monthly_oop"] = monthly_oop
-                print("Premiums for Graph:", premiums[:5])
-                print("OOP for Graph:", oop_costs[:5])
+                telemetry.debug("Costs for graph", premiums=premiums[:5], oop_costs=oop_costs[:5])
                 return premiums[:years_to_simulate], oop_costs[:years_to_simulate]
 
             premiums, oop_costs = get_premiums_and_oop_for_graph(
@@ -571,14 +503,7 @@ def run_step_1(tab1):
 
             # --- Inflation and Medicare-adjusted total expenses calculation ---
             inflation_rate = st.session_state.get("expense_inflation", 0.05)
-            total_expenses = []
-            for i, (p, o) in enumerate(zip(premiums, oop_costs)):
-                year_age = user_age + i
-                inflated_total = (p + o) * ((1 + inflation_rate) ** i)
-                if year_age >= 65:
-                    inflated_total *= 0.7  # Apply Medicare cost drop after age 65
-                total_expenses.append(inflated_total)
-            import pandas as pd
+            total_expenses = cached_call(project_total_expenses, premiums, oop_costs, inflation_rate, user_age)
             df_costs = pd.DataFrame({
                 "Age": years_plot,
                 "Total Healthcare Expenses": total_expenses
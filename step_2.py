@@ -1,15 +1,11 @@
 import streamlit as st
-
+from projection_cache import cached_call
+from projection_model import project_growth_series, project_household_finances, project_ltc_costs
+from projection_store import get_projection, put_projection
+import telemetry
 
 
 def run_step_2(tab3):
-    income_proj = st.session_state.get("income_proj", [])
-    savings_proj = st.session_state.get("savings_proj", [])
-    proj_401k = st.session_state.get("proj_401k", [])
-    household_proj = st.session_state.get("household_proj", [])
-    premiums = st.session_state.get("premiums", [])
-    oop = st.session_state.get("oop", [])
-    debt_proj = st.session_state.get("debt_proj", [])
     with tab3:
         # --- Ensure family_status is initialized in session_state to avoid AttributeError ---
         if "family_status" not in st.session_state:
@@ -17,8 +13,8 @@ def run_step_2(tab3):
         # --- Ensure monthly_debt_input is initialized before use ---
         monthly_debt_input = st.session_state.get("debt_monthly_payment")
         if monthly_debt_input is None:
-            debt_proj_list = st.session_state.get("debt_proj", [0])
-            monthly_debt_input = debt_proj_list[0] if isinstance(debt_proj_list, list) and debt_proj_list else 0
+            debt_proj_stored = get_projection(st.session_state, "debt_proj")
+            monthly_debt_input = float(debt_proj_stored[0]) if debt_proj_stored is not None and len(debt_proj_stored) else 0
         # --- Use premium inflation from Step 1 as selected by the user ---
         inflation_rate = st.session_state.get("premium_inflation", 0.05)
         # --- Ensure profile and key variables are always defined to avoid reference errors ---
@@ -100,7 +96,7 @@ def run_step_2(tab3):
             st.session_state["monthly_expenses_input"] = monthly_expenses  # Preserve user-entered value for available cash
             if monthly_expenses is not None:
                 monthly_household = monthly_expenses  # Use actual input for year 1
-                household_proj = [monthly_expenses * ((1 + inflation_rate) ** i) * 12 for i in range(years)]  # For future years
+                household_proj = cached_call(project_growth_series, monthly_expenses * 12, inflation_rate, years)  # For future years
 
 
             st.markdown(f"#### 💰 Total Monthly Household Expenses: ${monthly_expenses:,.0f}")
@@ -120,34 +116,28 @@ def run_step_2(tab3):
             monthly_expenses = st.session_state.get("monthly_expenses_for_cash", 0)
             # --- Project household expenses and debt over time ---
             household_expenses_annual = st.session_state.get("monthly_expenses_input", 0) * 12
-            household_proj = [household_expenses_annual * ((1 + inflation_rate) ** i) for i in range(years)]
+            household_proj = cached_call(project_growth_series, household_expenses_annual, inflation_rate, years)
             # Project debt over time based on user input monthly_debt_input
-            debt_proj = [monthly_debt_input * ((1 + inflation_rate) ** i) for i in range(years)]
+            debt_proj = cached_call(project_growth_series, monthly_debt_input, inflation_rate, years)
 
             # --- Projected Health Premiums ---
             base_premium = st.session_state.get("base_premium", 6000)
-            premiums = [base_premium * ((1 + inflation) ** i) for i in range(years)]
-            st.session_state["premiums"] = premiums
-            st.session_state["projected_premiums"] = premiums
-            st.session_state["debt_proj"] = debt_proj
+            premiums = cached_call(project_growth_series, base_premium, inflation, years)
+            put_projection(st.session_state, "premiums", premiums, start_age=profile.get("age", 30))
+            put_projection(st.session_state, "debt_proj", debt_proj)
 
             # --- Store in session state for downstream use ---
-            st.session_state.household_proj = household_proj
+            put_projection(st.session_state, "household_proj", household_proj)
 
             # --- 🧓 Long-Term Care Projection ---
-            ltc_enabled = st.session_state.get("ltc_enabled", False)
-            ltc_annual_cost = st.session_state.get("ltc_annual_cost", 0)
+            # Expected cost from the onset-age and stay distributions of the Step 1 setting (zero without LTC)
             user_age = profile.get("age", 30)
+            ltc_type = st.session_state.get("ltc_type") if st.session_state.get("ltc_enabled", False) else None
+            ltc_proj = cached_call(
+                project_ltc_costs, ltc_type, st.session_state.get("ltc_monthly_cost", 0), inflation_rate, user_age, years
+            )
 
-            if ltc_enabled:
-                ltc_proj = [
-                    ltc_annual_cost * ((1 + inflation_rate) ** i) if (user_age + i) >= 75 else 0
-                    for i in range(years)
-                ]
-            else:
-                ltc_proj = [0] * years
-
-            st.session_state["ltc_proj"] = ltc_proj
+            put_projection(st.session_state, "ltc_proj", ltc_proj)
 
 
 
@@ -214,7 +204,7 @@ def run_step_2(tab3):
 
             # --- NEW: Net income after 401(k) logic (using corrected formula) ---
             if family_status == "family":
-                st.write("DEBUG: Net Income After 401(k) (Partner):", net_income_monthly_partner)
+                telemetry.debug("Net income after 401(k) (partner)", net_income_monthly_partner=net_income_monthly_partner)
             total_net_income = net_user_income + partner_net_income
             net_income_monthly = total_net_income
             st.session_state.net_income_monthly = net_income_monthly
@@ -289,83 +279,40 @@ def run_step_2(tab3):
                 years = len(cost_df)
                 user_age = profile.get("age", 30)
                 retirement_age = 65
-                # --- Revised Retirement-aware income projection (stop regular income after retirement) ---
-                income_proj = [
-                    net_user_income * 12 * ((1 + income_growth) ** i) if (
-                        user_age + i) < retirement_age else net_user_income * 12 * 0.4
-                    for i in range(years)
-                ]
-
-                # --- Partner income projection using new variables ---
-                if family_status == "family":
-                    income_proj_partner = []
-                    for i in range(years):
-                        partner_age_i = partner_age + i  # partner's age this year
-                        if partner_age_i < 65:
-                            income = net_income_monthly_partner * 12 * ((1 + income_growth_partner) ** i)
-                        else:
-                            income = 0
-                        income_proj_partner.append(income)
-                else:
-                    income_proj_partner = [0 for _ in range(years)]
-
-                # --- Combined income projection ---
-                if family_status == "family":
-                    combined_income_proj = [user + partner for user, partner in
-                                            zip(income_proj, income_proj_partner)]
-                else:
-                    combined_income_proj = income_proj
-
-                # Store the combined projection in session state
-                st.session_state.combined_income_proj = combined_income_proj
-
-                # --- Revised savings and 401(k) projections: contributions before retirement, only growth after ---
-                # User projections
-                proj_401k = []
-                savings_proj = []
-                user_401k_balance = profile.get("start_401k_user", 0)
-                current_401k = user_401k_balance
-                current_savings = savings_start
-                monthly_contrib_401k = (contrib_401k_employee + contrib_401k_employer) / 12
-                monthly_savings = annual_contrib / 12
-                growth_rate_401k = growth_401k
-                growth_rate_savings = savings_growth
-                for i in range(years):
-                    age_iter = user_age + i
-                    if age_iter < retirement_age:
-                        current_401k = current_401k * (1 + growth_rate_401k + inflation_rate) + monthly_contrib_401k * 12
-                        current_savings = current_savings * (1 + growth_rate_savings + inflation_rate) + monthly_savings * 12
-                    else:
-                        current_401k = current_401k * (1 + growth_rate_401k + inflation_rate)
-                        current_savings = current_savings * (1 + growth_rate_savings + inflation_rate)
-                    proj_401k.append(current_401k)
-                    savings_proj.append(current_savings)
-
-                # Partner projections for family mode
-                if family_status == "family":
-                    proj_401k_partner = []
-                    savings_proj_partner = []
-                    partner_401k_balance = profile.get("start_401k_partner", 0)
-                    current_401k_partner = partner_401k_balance
-                    partner_age_val = profile.get("partner_age", 65)
-                    monthly_contrib_401k_partner = (partner_401k_contrib + partner_employer_401k_contrib) / 12
-                    growth_401k_partner = profile.get("partner_growth_401k", growth_401k)
-                    for i in range(years):
-                        age_partner = partner_age_val + i
-                        if age_partner < retirement_age:
-                            current_401k_partner = current_401k_partner * (
-                                1 + growth_401k_partner + inflation_rate) + monthly_contrib_401k_partner * 12
-                        else:
-                            current_401k_partner = current_401k_partner * (1 + growth_401k_partner + inflation_rate)
-                        proj_401k_partner.append(current_401k_partner)
-                else:
-                    proj_401k_partner = [0] * years
+                is_family = family_status == "family"
+                # --- Income, savings and 401(k) projections for the whole household in one vectorized pass ---
+                # User income drops to 40% at retirement and partner income stops entirely at 65; savings
+                # and 401(k) balances take contributions before retirement and only grow after.
+                household = {
+                    "age": user_age,
+                    "partner_age": partner_age,
+                    "family": is_family,
+                    "inflation": inflation_rate,
+                    "net_income": net_user_income,
+                    "income_growth": income_growth,
+                    "partner_net_income": net_income_monthly_partner if is_family else 0,
+                    "partner_income_growth": income_growth_partner if is_family else 0,
+                    "savings_start": savings_start,
+                    "savings_growth": savings_growth,
+                    "savings_contribution": annual_contrib,
+                    "start_401k": profile.get("start_401k_user", 0),
+                    "growth_401k": growth_401k,
+                    "contribution_401k": contrib_401k_employee + contrib_401k_employer,
+                    "partner_start_401k": profile.get("start_401k_partner", 0) if is_family else 0,
+                    "partner_growth_401k": profile.get("partner_growth_401k", growth_401k),
+                    "partner_contribution_401k": (
+                        partner_401k_contrib + partner_employer_401k_contrib if is_family else 0
+                    ),
+                }
+                paths = cached_call(project_household_finances, household, years, retirement_age=retirement_age)
+                combined_income_proj = paths["income"]
+                income_proj_partner = paths["income_partner"]
+                savings_proj = paths["savings"]
+                proj_401k = paths["401k"]
+                proj_401k_partner = paths["401k_partner"]
                 # --- Store 401k projections in session state unconditionally before marking submission ---
-                st.session_state["proj_401k"] = proj_401k
-                if family_status == "family":
-                    st.session_state["proj_401k_partner"] = proj_401k_partner
-                else:
-                    st.session_state["proj_401k_partner"] = [0] * years
+                put_projection(st.session_state, "proj_401k", proj_401k)
+                put_projection(st.session_state, "proj_401k_partner", proj_401k_partner)
 
                 st.session_state.net_user_income = net_user_income
                 st.session_state.net_income_annual = net_income_annual
@@ -379,10 +326,9 @@ def run_step_2(tab3):
                 st.session_state.contrib_401k_employee = contrib_401k_employee
                 st.session_state.contrib_401k_employer = contrib_401k_employer
                 st.session_state.growth_401k = growth_401k
-                st.session_state.income_proj = combined_income_proj
-                st.session_state.income_proj_partner = income_proj_partner
-                st.session_state.savings_proj = savings_proj
-                st.session_state.proj_401k = proj_401k
+                put_projection(st.session_state, "income_proj", combined_income_proj)
+                put_projection(st.session_state, "income_proj_partner", income_proj_partner)
+                put_projection(st.session_state, "savings_proj", savings_proj)
 
                 # insurance_type already defined at top-level
                 employee_premium = st.session_state.get("employee_premium", 0)
@@ -1,18 +1,11 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-# from health_risk_module import get_risk_trajectory  # Ensure this is accessible
+from chart_service import show_chart
 from chronic_module import get_chronic_multiplier
-
-# --- Risk trajectory function ---
-def get_risk_trajectory(health_status):
-    base_curve = {
-        "healthy": [0.2 + 0.005 * i for i in range(50)],
-        "chronic": [0.4 + 0.0075 * i for i in range(50)],
-        "high_risk": [0.5 + 0.01 * i for i in range(50)]
-    }
-    traj = base_curve.get(health_status.lower(), base_curve["healthy"])
-    return traj[:50]
+from projected_health_risk import compute_lifetime_health_risk, get_status_risk_trajectory as get_risk_trajectory
+from projection_cache import cached_call
+from projection_model import project_medicare_adjusted_costs
+from projection_store import put_projection
 
 def run_step_3(tab4):
     with tab4:
@@ -29,7 +22,7 @@ def run_step_3(tab4):
         dependent_health_statuses = st.session_state.get("dependent_health_statuses", [])
 
         user_traj = get_risk_trajectory(health_status)
-        risk_trajectory = user_traj
+        risk_trajectory = user_traj.tolist()
         st.session_state["risk_trajectory"] = risk_trajectory
 
         risk_values = [user_traj[0]]
@@ -72,51 +65,15 @@ def run_step_3(tab4):
             return round(min(score, 1.0), 2)
 
         # Lifetime average
-        family_trajectories = []
-        for label, age, status, _ in individual_ratios:
-            traj = get_risk_trajectory(status)
-            family_trajectories.append((label, age, status, traj))
-
-        total_weight = 0
-        weighted_lifetime_sum = 0
-        for label, age, status, traj in family_trajectories:
-            weight = 1.0 if label == "User" else 0.9 if label == "Partner" else (0.3 if age <= 6 else 0.4 if age <= 12 else 0.5)
-            weighted_lifetime_sum += sum(traj) / len(traj) * weight
-            total_weight += weight
-
-        weighted_avg_lifetime_risk = weighted_lifetime_sum / total_weight if total_weight > 0 else 0
+        weighted_avg_lifetime_risk = compute_lifetime_health_risk(
+            [(label, age, status) for label, age, status, _ in individual_ratios]
+        )
         st.session_state["lifetime_health_risk_ratio"] = weighted_avg_lifetime_risk
 
         st.subheader("🩺 Health Risk Ratio")
 
         # Updated: Side-by-side pie charts for Health Risk Ratios (Health Risk vs Remaining)
-        labels = ["Health Risk", ""]
-        colors = ["#FF9999", "#DDDDDD"]
-        sizes1 = [risk_values[0], 1 - risk_values[0]]
-        sizes2 = [weighted_avg_lifetime_risk, 1 - weighted_avg_lifetime_risk]
-
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 5))
-        ax1.pie(
-            sizes1,
-            labels=labels,
-            colors=colors,
-            autopct=lambda pct: f"{pct:.0f}%" if pct == round(sizes1[0]*100) else "",
-            startangle=90
-        )
-        ax1.axis("equal")
-        ax1.set_title("Year 1 Health Risk", fontsize=14, fontweight="bold")
-
-        ax2.pie(
-            sizes2,
-            labels=labels,
-            colors=colors,
-            autopct=lambda pct: f"{pct:.0f}%" if 50 < pct < 100 else "",
-            startangle=90
-        )
-        ax2.axis("equal")
-        ax2.set_title("Lifetime Average Risk", fontsize=14, fontweight="bold")
-
-        st.pyplot(fig)
+        show_chart("health_risk_pies", year1_risk=risk_values[0], lifetime_risk=weighted_avg_lifetime_risk)
 
         tuku_image_path = "Tuku_Default_Health_Adviser.png"
         col1, col2 = st.columns([1, 8])
@@ -143,25 +100,13 @@ def run_step_3(tab4):
         base_premium *= chronic_multiplier
         base_oop *= chronic_multiplier
         years = len(cost_df)
-        premiums = []
-        oop = []
-        for i in range(years):
-            age = user_age + i
-            premium_i = base_premium * ((1 + inflation) ** i)
-            oop_i = base_oop * ((1 + inflation) ** i)
-            if age >= 65:
-                premium_i *= 0.5
-                oop_i *= 0.7
-            premiums.append(premium_i)
-            oop.append(oop_i)
+        premiums, oop = cached_call(project_medicare_adjusted_costs, base_premium, base_oop, inflation, user_age, years)
         cost_df["Premiums"] = premiums
         cost_df["OOP Cost"] = oop
         st.session_state["cost_df"] = cost_df
-        st.session_state["premiums"] = premiums
-        st.session_state["oop"] = oop
-        st.session_state["healthcare"] = [premiums[i] + oop[i] for i in range(years)]
         # Ensure correct age alignment for downstream steps
-        st.session_state["ages"] = list(range(user_age, user_age + years))
+        put_projection(st.session_state, "premiums", premiums, start_age=user_age)
+        put_projection(st.session_state, "oop", oop)
 
         st.subheader("📈 Healthcare Cost Projection")
         total_cost = sum(premiums) + sum(oop)
@@ -1,60 +1,26 @@
-def compute_retirement_drawdown(chart_ages, deficit_values, savings_proj, proj_401k_combined,
-                                retirement_index, total_pension, estimated_ss):
-    used_capital = []
-    remaining_capital = []
-    unfunded_gap = []
-    pension_stream = []
-    ss_stream = []
-
-    savings_total = savings_proj[retirement_index] if 0 <= retirement_index < len(savings_proj) else 0
-    proj_401k_val = proj_401k_combined[retirement_index] if 0 <= retirement_index < len(proj_401k_combined) else 0
-    ss_per_year = estimated_ss / len(chart_ages) if chart_ages else 0
-    current_capital = savings_total + proj_401k_val
-
-    for i, age in enumerate(chart_ages):
-        pension = total_pension
-        ss = ss_per_year
-        total_income = pension + ss
-
-        deficit = deficit_values[i]
-        uncovered = max(deficit - total_income, 0)
-
-        used = min(uncovered, current_capital)
-        gap = max(uncovered - used, 0)
-        current_capital -= used
-
-        used_capital.append(used)
-        remaining_capital.append(max(current_capital, 0))
-        unfunded_gap.append(gap)
-        pension_stream.append(pension)
-        ss_stream.append(ss)
-
-    total_used_capital = sum(used_capital)
-    return used_capital, remaining_capital, unfunded_gap, pension_stream, ss_stream, total_used_capital
+import numpy as np
+import pandas as pd
+import streamlit as st
+from chart_service import show_chart
+from chronic_module import get_chronic_multiplier
+from drawdown_engine import retirement_deficits
+from monthly_cashflow_engine import simulate_monthly_cashflow
+from projection_model import compute_retirement_drawdown, compute_retirement_readiness, get_depletion_age
+from projection_store import get_projection, get_projection_list, put_projection
 
 
 def run_step_4(tab4):
-    import matplotlib.pyplot as plt
-    import numpy as np
-    import streamlit as st
-    from chronic_module import get_chronic_multiplier
-    import pandas as pd
-    import matplotlib.ticker as mticker
-
-    def format_thousands(x, _):
-        return f"{int(round(x / 1000))}"
-
     with tab4:
         st.header("Step 4: Financial Outlook")
         st.image("Tuku_Analyst.png", width=60)
         st.markdown(
             "Most household expenses drop after retirement — but healthcare costs often **rise exponentially**. They typically increase from about **8% to over 14% of household spending** as people age, due to chronic conditions, specialist visits, and medications. As you review your financials, pay attention to potential funding gaps in funding your retirement. Planning ahead also helps you preserve your quality of life, covering both essential care and your retirement dreams — including that bucket list you've been meaning to explore.")
 
-        # Load projections from session state
-        income_proj = st.session_state.get("income_proj", [])
-        savings_proj = st.session_state.get("savings_proj", [])
-        proj_401k_user = st.session_state.get("proj_401k", [])
-        proj_401k_partner = st.session_state.get("proj_401k_partner", [])
+        # Load projections from session state (list copies: the logic below pads and updates them in place)
+        income_proj = get_projection_list(st.session_state, "income_proj")
+        savings_proj = get_projection_list(st.session_state, "savings_proj")
+        proj_401k_user = get_projection_list(st.session_state, "proj_401k")
+        proj_401k_partner = get_projection_list(st.session_state, "proj_401k_partner")
 
         # --- Inserted logic to construct income_proj accurately across retirement ---
         # --- Fixed: Ensure income_proj spans from current_age to retirement_age, then drops ---
@@ -102,7 +68,7 @@ def run_step_4(tab4):
         proj_401k_partner = pad_array(proj_401k_partner, max_len)
 
         proj_401k = [u + p for u, p in zip(proj_401k_user, proj_401k_partner)]
-        household_proj = st.session_state.get("household_proj", [])
+        household_proj = get_projection_list(st.session_state, "household_proj")
         current_age = st.session_state.get("age", 30)
 
         # Retrieve chronic condition multiplier
@@ -149,8 +115,8 @@ def run_step_4(tab4):
                         household_proj[i] = base_post_retirement_household * ((1 - 0.01) ** (years_post - 1))
 
         monthly_debt = st.session_state.get("monthly_debt", 0)
-        premiums = st.session_state.get("premiums", [])
-        oop = st.session_state.get("oop", [])
+        premiums = get_projection_list(st.session_state, "premiums")
+        oop = get_projection_list(st.session_state, "oop")
 
         # --- Fallback logic: ensure arrays are lists before using in years calculation ---
         income_proj = income_proj if isinstance(income_proj, list) else []
@@ -251,50 +217,14 @@ def run_step_4(tab4):
             return
 
         # All three charts in one row
-        fig, axs = plt.subplots(1, 3, figsize=(24, 5))
-
-        # Annual Expenditures (stacked)
-        axs[0].bar(ages, household_proj, label='Household')
-        bottom_premiums = np.array(household_proj)
-        axs[0].bar(ages, premiums, bottom=bottom_premiums, label='Premiums')
-        bottom_oop = bottom_premiums + np.array(premiums)
-        axs[0].bar(ages, oop, bottom=bottom_oop, label='OOP')
-        axs[0].set_title("Annual Expenditures Projection")
-        axs[0].set_xlabel("Age")
-        axs[0].set_ylabel("Amount ($)")
-        axs[0].legend()
-        axs[0].grid(True)
-        axs[0].yaxis.set_major_formatter(mticker.FuncFormatter(format_thousands))
-        axs[0].set_ylabel("Amount ($,000)")
-
-        # Annual Income (stacked: Primary Income + Pension)
         pension_user = st.session_state.get("pension_user", 0)
         pension_partner = st.session_state.get("pension_partner", 0)
         total_pension = pension_user + pension_partner
         pension_stream = [0 if age < 66 else total_pension for age in ages]
-        primary_income = [max(income_proj[i] - pension_stream[i], 0) for i in range(len(ages))]
-        axs[1].bar(ages, income_proj, label="Total Income")
-        axs[1].bar(ages, pension_stream, label="Pension Overlay", alpha=0.3)
-        axs[1].set_title("Annual Income Projection")
-        axs[1].set_xlabel("Age")
-        axs[1].yaxis.set_major_formatter(mticker.FuncFormatter(format_thousands))
-        axs[1].legend()
-        axs[1].grid(True)
-        axs[1].set_ylabel("Amount ($,000)")
-
-        # Savings and 401(k)
-        axs[2].bar(ages, savings_proj, label="Savings")
-        bottom_401k = np.array(savings_proj)
-        axs[2].bar(ages, proj_401k, bottom=bottom_401k, label="401(k)")
-        axs[2].set_title("Savings and 401(k) Projection")
-        axs[2].set_xlabel("Age")
-        axs[2].set_ylabel("Amount ($,000)")
-        axs[2].yaxis.set_major_formatter(mticker.FuncFormatter(format_thousands))
-        axs[2].legend()
-        axs[2].grid(True)
-        axs[2].axhline(0, color='black', linewidth=0.8)
-
-        st.pyplot(fig)
+        show_chart(
+            "projection_bars", ages=ages, household=household_proj, premiums=premiums, oop=oop,
+            income=income_proj, pension=pension_stream, savings=savings_proj, proj_401k=proj_401k
+        )
 
         # Validate that all required data arrays are non-empty and aligned
         required_data = {
@@ -328,11 +258,46 @@ def run_step_4(tab4):
                 "Debt": debt_projection
             })
             st.session_state["expense_df"] = expense_df
-            st.session_state["surplus"] = surplus
+            put_projection(st.session_state, "surplus", surplus)
             # Debug print to confirm columns in capital_graph_df
             # print(st.session_state["capital_graph_df"].head())
             st.session_state["capital_graph_df"] = expense_df[["Age", "Savings", "401(k)"]].copy()
 
+            # --- Optional monthly cash flow: months that run short even when the year balances ---
+            if st.checkbox("Show monthly cash flow", key="show_monthly_cashflow"):
+                timing_labels = {"Spread evenly": "monthly", "Quarterly": "quarterly",
+                                 "Start of year": "start", "End of year": "end"}
+                col1, col2, col3 = st.columns(3)
+                oop_timing = col1.selectbox("Out-of-pocket costs paid", list(timing_labels), index=2)
+                contribution_timing = col2.selectbox("Savings contributions made", list(timing_labels))
+                cash_buffer = col3.number_input("Cash on hand each January ($)", 0, value=0, step=500)
+                annual_contrib = st.session_state.get("annual_contrib", 0) or 0
+                flows = simulate_monthly_cashflow(
+                    {
+                        "income": income_proj,
+                        "household": household_proj,
+                        "premiums": premiums,
+                        "oop": oop,
+                        "debt": [abs(d) * 12 for d in debt_projection],  # monthly payments
+                        "contributions": [annual_contrib if age < retirement_age else 0 for age in ages],
+                    },
+                    timings={"oop": timing_labels[oop_timing], "contributions": timing_labels[contribution_timing]},
+                    opening_cash=cash_buffer,
+                )
+                first = int(flows["first_shortfall"][0])
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Months short of cash", int(flows["shortfall_months"][0]))
+                m2.metric("First shortfall",
+                          f"Age {ages[first // 12]}, month {first % 12 + 1}" if first >= 0 else "None")
+                m3.metric("Largest shortfall", f"${flows['peak_shortfall'][0]:,.0f}")
+                monthly_df = pd.DataFrame({
+                    "Age": np.repeat(ages, 12),
+                    "Month": np.tile(np.arange(1, 13), len(ages)),
+                    "Net Cash Flow": flows["net"][0].ravel(),
+                    "Cash Position": flows["cash"][0].ravel(),
+                })
+                st.dataframe(monthly_df[monthly_df["Cash Position"] < 0], hide_index=True)
+
         # Note: Removed all logic and graphs tied to the capital care fund as per instructions.
 
         # --- Lifetime Retirement Income Sources Pie Chart ---
@@ -342,19 +307,19 @@ def run_step_4(tab4):
         if (
                 capital_graph_df is not None and not capital_graph_df.empty and
                 expense_df is not None and not expense_df.empty and
-                st.session_state.get("surplus") is not None
+                get_projection(st.session_state, "surplus") is not None
         ):
             age_series = expense_df["Age"].tolist()
-            surplus = st.session_state.get("surplus", [])
+            surplus = get_projection_list(st.session_state, "surplus")
             if not age_series or not surplus or len(surplus) != len(age_series):
                 st.warning("Age or surplus data is missing or mismatched — skipping retirement readiness chart.")
                 return
 
             # Defensive check for required arrays
-            income_proj = st.session_state.get("income_proj", [])
-            savings_proj = st.session_state.get("savings_proj", [])
-            proj_401k_user = st.session_state.get("proj_401k", [])
-            proj_401k_partner = st.session_state.get("proj_401k_partner", [])
+            income_proj = get_projection_list(st.session_state, "income_proj")
+            savings_proj = get_projection_list(st.session_state, "savings_proj")
+            proj_401k_user = get_projection_list(st.session_state, "proj_401k")
+            proj_401k_partner = get_projection_list(st.session_state, "proj_401k_partner")
             if proj_401k_user is None:
                 proj_401k_user = []
             if proj_401k_partner is None:
@@ -425,14 +390,7 @@ def run_step_4(tab4):
             # Total capital drawn down after retirement
 
             # Compute drawdown early for use in pie chart
-            chart_ages = []
-            deficit_values = []
-            for i in range(len(age_series)):
-                age = age_series[i]
-                if age >= 65 and i < len(surplus):
-                    chart_ages.append(age)
-                    deficit = -surplus[i] if surplus[i] < 0 else 0
-                    deficit_values.append(deficit)
+            chart_ages, deficit_values = retirement_deficits(age_series, surplus)
 
             used_capital, _, _, _, _, total_used_capital = compute_retirement_drawdown(
                 chart_ages, deficit_values, savings_proj, proj_401k_combined,
@@ -464,20 +422,7 @@ def run_step_4(tab4):
                 else:
                     filtered_labels, filtered_values = zip(*filtered_sources)
                     st.markdown("#### Retirement Income Sources")
-                    fig_pie, ax_pie = plt.subplots(figsize=(1.8, 1.8))
-
-                    def filter_autopct(pct):
-                        return f"{pct:.1f}%" if pct > 2 else ''
-
-                    wedges, texts, autotexts = ax_pie.pie(
-                        filtered_values,
-                        labels=filtered_labels,
-                        autopct=filter_autopct,
-                        startangle=90,
-                        textprops={'fontsize': 7}
-                    )
-                    ax_pie.axis('equal')
-                    st.pyplot(fig_pie)
+                    show_chart("income_sources_pie", labels=list(filtered_labels), values=list(filtered_values))
 
 
 
@@ -490,47 +435,14 @@ def run_step_4(tab4):
                 st.markdown(
                     "This projection helps you plan ahead so you don’t outlive your financial resources — including savings, 401(k), and any eligible pension.")
                 # Always render retirement readiness chart for all post-retirement years, even with zero deficits
-                chart_ages = []
-                deficit_values = []
-                for i in range(len(age_series)):
-                    age = age_series[i]
-                    if age >= 65 and i < len(surplus):
-                        chart_ages.append(age)
-                        deficit = -surplus[i] if surplus[i] < 0 else 0
-                        deficit_values.append(deficit)
+                chart_ages, deficit_values = retirement_deficits(age_series, surplus)
 
                 if chart_ages:
-                    savings_total = savings_proj[retirement_index] if 0 <= retirement_index < len(savings_proj) else 0
-                    proj_401k_val = proj_401k_combined[retirement_index] if 0 <= retirement_index < len(
-                        proj_401k_combined) else 0
                     total_pension = pension_user + pension_partner
-                    ss_per_year = estimated_ss / len(chart_ages)
-                    current_capital = savings_total + proj_401k_val
-
-                    used_capital = []
-                    remaining_capital = []
-                    unfunded_gap = []
-                    pension_stream = []
-                    ss_stream = []
-
-                    for i, age in enumerate(chart_ages):
-                        pension = total_pension  # annual pension
-                        ss = ss_per_year
-                        total_income = pension + ss
-
-                        # Actual deficit to cover (if surplus < 0)
-                        deficit = deficit_values[i]
-                        uncovered = max(deficit - total_income, 0)
-
-                        used = min(uncovered, current_capital)
-                        gap = max(uncovered - used, 0)
-                        current_capital -= used
-
-                        used_capital.append(used)
-                        remaining_capital.append(max(current_capital, 0))
-                        unfunded_gap.append(gap)
-                        pension_stream.append(pension)
-                        ss_stream.append(ss)
+                    used_capital, remaining_capital, unfunded_gap, pension_stream, ss_stream, _ = compute_retirement_drawdown(
+                        chart_ages, deficit_values, savings_proj, proj_401k_combined,
+                        retirement_index, total_pension, estimated_ss
+                    )
 
                     df_drawdown = pd.DataFrame({
                         "Age": chart_ages,
@@ -548,38 +460,19 @@ def run_step_4(tab4):
                     st.subheader("🎯 Retirement Readiness")
                     if surplus and capital_graph_df is not None and not capital_graph_df.empty:
                         age_series = expense_df["Age"].tolist()
-                        chart_ages = []
-                        deficit_values = []
-                        for i, age in enumerate(age_series):
-                            if age >= 65 and i < len(surplus):
-                                chart_ages.append(age)
-                                deficit = -surplus[i] if surplus[i] < 0 else 0
-                                deficit_values.append(deficit)
+                        chart_ages, deficit_values = retirement_deficits(age_series, surplus)
 
                         if chart_ages:
                             savings_total = st.session_state.get("savings_projection", [0])[-1]
-                            proj_401k = st.session_state.get("proj_401k", [0])[-1]
+                            proj_401k = float(get_projection(st.session_state, "proj_401k", [0])[-1])
                             pension_user = st.session_state.get("pension_user", 0)
                             pension_partner = st.session_state.get("pension_partner", 0)
                             total_pension = pension_user + pension_partner
                             total_available = savings_total + proj_401k + (total_pension * len(chart_ages))
 
-                            used_capital = []
-                            remaining_capital = []
-                            unfunded_gap = []
-                            current_capital = total_available
-
-                            for deficit in deficit_values:
-                                if deficit > 0:
-                                    used = min(deficit, current_capital)
-                                    gap = max(deficit - used, 0)
-                                    current_capital -= used
-                                else:
-                                    used = 0
-                                    gap = 0
-                                used_capital.append(used)
-                                remaining_capital.append(max(current_capital, 0))
-                                unfunded_gap.append(gap)
+                            used_capital, remaining_capital, unfunded_gap, current_capital = compute_retirement_readiness(
+                                deficit_values, total_available
+                            )
 
                             surplus_remaining = remaining_capital.copy()
 
@@ -597,10 +490,7 @@ def run_step_4(tab4):
                                     st.success(
                                         "✅ Your available capital is projected to cover all retirement expenses.")
                                 else:
-                                    depletion_age = chart_ages[
-                                        len(used_capital) - remaining_capital[::-1].index(
-                                            0) - 1] if 0 in remaining_capital else \
-                                        chart_ages[-1]
+                                    depletion_age = get_depletion_age(chart_ages, remaining_capital) or chart_ages[-1]
                                     st.warning(
                                         f"⚠️ You may fall short by approximately ${-current_capital:,.0f} in retirement funding. Capital is projected to be depleted by age {depletion_age}.")
                             else:
@@ -1,7 +1,11 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from chart_service import show_chart
 from chronic_module import get_chronic_multiplier
+from drawdown_engine import retirement_deficits
+from projection_model import compute_retirement_readiness, get_depletion_age
+from projection_store import get_projection
 
 def run_step_5(tab6):
     with tab6:
@@ -41,8 +45,9 @@ def run_step_5(tab6):
         expense_df = st.session_state.get("expense_df", pd.DataFrame())
         # Restore columns from session state if missing
         if "Premium" not in expense_df.columns:
-            if "premiums" in st.session_state:
-                expense_df["Premium"] = st.session_state["premiums"][:len(expense_df)]
+            premiums = get_projection(st.session_state, "premiums")
+            if premiums is not None:
+                expense_df["Premium"] = premiums[:len(expense_df)].copy()
             elif "projections" in st.session_state and "premiums" in st.session_state["projections"]:
                 expense_df["Premium"] = st.session_state["projections"]["premiums"][:len(expense_df)]
         if "OOP" not in expense_df.columns and "oop" in st.session_state.get("projections", {}):
@@ -60,7 +65,7 @@ def run_step_5(tab6):
         average_healthcare_pct = None
 
         capital_graph_df = st.session_state.get("capital_graph_df", pd.DataFrame())
-        surplus = st.session_state.get("surplus", [])
+        surplus = get_projection(st.session_state, "surplus", np.empty(0))
         if st.session_state.get("debug_mode", False):
             st.write("Surplus preview:", surplus[:5])
             st.write("Capital DF preview:", capital_graph_df.head())
@@ -94,107 +99,50 @@ def run_step_5(tab6):
                 current_healthcare_pct = expense_df.iloc[0]["Healthcare %"]
 
                 # --- Pie charts block ---
-                import matplotlib.pyplot as plt
-
                 col_l, col_divider, col_m, col_r = st.columns([1.2, 0.1, 1.2, 1.2])
 
                 with col_l:
                     st.markdown("**Lifetime Health Risk**")
-                    fig_lifetime, ax_lifetime = plt.subplots(figsize=(1.5, 1.5))
-                    wedges, texts, autotexts = ax_lifetime.pie(
-                        [lifetime_risk, 1 - lifetime_risk],
-                        labels=["", ""],
-                        autopct=lambda pct: f"{lifetime_risk:.0%}" if pct > 1 and pct > 50 else "",
-                        startangle=90,
-                        colors=["#ff9999", "#f0f0f0"],
-                        textprops={'fontsize': 6, 'weight': 'bold'}
-                    )
-                    for txt in texts:
-                        txt.set_text("")
-                    for i, autotxt in enumerate(autotexts):
-                        autotxt.set_text(f"{lifetime_risk:.0%}" if i == 0 else "")
-                    ax_lifetime.axis("equal")
-                    st.pyplot(fig_lifetime)
+                    show_chart("share_pie", share=lifetime_risk, text=f"{lifetime_risk:.0%}", color="#ff9999")
 
                 with col_divider:
                     st.markdown("<div style='height: 120px; border-left: 1px solid #ccc;'></div>", unsafe_allow_html=True)
 
                 with col_m:
                     st.markdown("**Current Healthcare % of Total Expenses:**")
-                    fig_cur, ax_cur = plt.subplots(figsize=(1.5, 1.5))
-                    wedges, texts, autotexts = ax_cur.pie(
-                        [current_healthcare_pct / 100, 1 - (current_healthcare_pct / 100)],
-                        labels=["", ""],
-                        autopct=lambda pct: f"{current_healthcare_pct:.0f}%" if pct > 1 and pct > 50 else "",
-                        startangle=90,
-                        colors=["#66b3ff", "#f0f0f0"],
-                        textprops={'fontsize': 6, 'weight': 'bold'}
+                    show_chart(
+                        "share_pie", share=current_healthcare_pct / 100, text=f"{current_healthcare_pct:.0f}%",
+                        color="#66b3ff"
                     )
-                    for txt in texts:
-                        txt.set_text("")
-                    for i, autotxt in enumerate(autotexts):
-                        autotxt.set_text(f"{current_healthcare_pct:.0f}%" if i == 0 else "")
-                    ax_cur.axis("equal")
-                    st.pyplot(fig_cur)
 
                 with col_r:
                     st.markdown("**Average Healthcare % of Total Expenses:**")
-                    fig_avg, ax_avg = plt.subplots(figsize=(1.5, 1.5))
-                    wedges, texts, autotexts = ax_avg.pie(
-                        [average_healthcare_pct / 100, 1 - (average_healthcare_pct / 100)],
-                        labels=["", ""],
-                        autopct=lambda pct: f"{average_healthcare_pct:.0f}%" if pct > 1 and pct > 50 else "",
-                        startangle=90,
-                        colors=["#99ff99", "#f0f0f0"],
-                        textprops={'fontsize': 6, 'weight': 'bold'}
+                    show_chart(
+                        "share_pie", share=average_healthcare_pct / 100, text=f"{average_healthcare_pct:.0f}%",
+                        color="#99ff99"
                     )
-                    for txt in texts:
-                        txt.set_text("")
-                    for i, autotxt in enumerate(autotexts):
-                        autotxt.set_text(f"{average_healthcare_pct:.0f}%" if i == 0 else "")
-                    ax_avg.axis("equal")
-                    st.pyplot(fig_avg)
 
                 st.image("Tuku_Analyst.png", width=64)
                 st.markdown("Your average healthcare spending is 12.5%, which is above the national benchmark of 8%. Consider reviewing your care plan or insurance.")
 
         # Retirement Readiness Indicator (revised logic)
         st.subheader("🎯 Retirement Readiness")
-        if surplus and capital_graph_df is not None and not capital_graph_df.empty:
+        if len(surplus) and capital_graph_df is not None and not capital_graph_df.empty:
             age_series = expense_df["Age"].tolist()
             # Updated drawdown logic from Step 4
-            chart_ages = []
-            deficit_values = []
-            for i, age in enumerate(age_series):
-                if age >= 65 and i < len(surplus):
-                    chart_ages.append(age)
-                    deficit = -surplus[i] if surplus[i] < 0 else 0
-                    deficit_values.append(deficit)
+            chart_ages, deficit_values = retirement_deficits(age_series, surplus)
 
             if chart_ages:
                 savings_total = st.session_state.get("savings_projection", [0])[-1]
-                proj_401k = st.session_state.get("proj_401k", [0])[-1]
+                proj_401k = float(get_projection(st.session_state, "proj_401k", [0])[-1])
                 pension_user = st.session_state.get("pension_user", 0)
                 pension_partner = st.session_state.get("pension_partner", 0)
                 total_pension = pension_user + pension_partner
                 total_available = savings_total + proj_401k + (total_pension * len(chart_ages))
 
-                used_capital = []
-                remaining_capital = []
-                unfunded_gap = []
-                current_capital = total_available
-
-                for deficit in deficit_values:
-                    if deficit > 0:
-                        used = min(deficit, current_capital)
-                        gap = max(deficit - used, 0)
-                        current_capital -= used
-                    else:
-                        used = 0
-                        gap = 0
-                    used_capital.append(used)
-                    remaining_capital.append(max(current_capital, 0))
-                    unfunded_gap.append(gap)
+                used_capital, remaining_capital, unfunded_gap, current_capital = compute_retirement_readiness(
+                    deficit_values, total_available
+                )
 
                 surplus_remaining = remaining_capital.copy()
 
@@ -211,7 +159,7 @@ def run_step_5(tab6):
                     if current_capital > 0:
                         st.success("✅ Your available capital is projected to cover all retirement expenses.")
                     else:
-                        depletion_age = chart_ages[len(used_capital) - remaining_capital[::-1].index(0) - 1] if 0 in remaining_capital else chart_ages[-1]
+                        depletion_age = get_depletion_age(chart_ages, remaining_capital) or chart_ages[-1]
                         st.warning(f"⚠️ You may fall short by approximately ${-current_capital:,.0f} in retirement funding. Capital is projected to be depleted by age {depletion_age}.")
                 else:
                     st.info("✅ No capital drawdown was needed. You remain financially self-sufficient through retirement.")
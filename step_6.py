@@ -1,5 +1,29 @@
+import pandas as pd
 import streamlit as st
+from capital_optimizer import DEFAULT_RESERVE_MONTHS, optimize_capital_strategy
+from chart_service import show_chart
 from chronic_module import get_chronic_multiplier
+from health_event_simulator import HEALTH_STATUSES, simulate_health_events, stress_test_capital_fund, summarize_oop
+from ltc_module import simulate_ltc_paths
+from plan_format import PLAN_FILE_EXTENSION, dumps_plan, session_plan
+from projection_cache import cached_call
+from recommendation_logic import recommend_capital_strategy
+from recommendation_rules import (
+    DIGITAL_FIRST_COMPARISON,
+    DIGITAL_FIRST_MONTHLY_COST,
+    FINANCIAL_INSIGHTS,
+    HEALTH_INSIGHTS,
+    TUKU_CALLOUTS,
+)
+from scenario_engine import DEFAULT_OVERRIDES, compare_scenarios
+from simulation_pipeline import plan_inputs_from_session
+
+# Streamlit call for each recommendation_rules.MESSAGE_KINDS value
+MESSAGE_DISPLAY = {"": st.markdown, "info": st.info, "success": st.success, "warning": st.warning}
+
+# Lives simulated by the health event stress test
+STRESS_TEST_LIVES = 5_000
+
 
 def run_step_6(tab7):
     with tab7:
@@ -20,26 +44,24 @@ def run_step_6(tab7):
         if "final_average_healthcare_pct" not in st.session_state:
             st.session_state["final_average_healthcare_pct"] = st.session_state.get("locked_average_healthcare_pct", average_healthcare_pct)
         average_healthcare_pct = st.session_state["final_average_healthcare_pct"]
-        if average_healthcare_pct is not None:
-            if average_healthcare_pct > 8:
-                st.markdown(f"- Your average healthcare spending is **{average_healthcare_pct:.1f}%**, which is above the national benchmark of 8%. Consider reviewing your care plan or insurance.")
-            elif average_healthcare_pct <= 8:
-                st.markdown(f"- Your average healthcare spending is **{average_healthcare_pct:.1f}%**, which is below the national benchmark of 8%. Your current strategy appears efficient, but monitoring trends and preventive steps remains important.")
-        else:
-            st.markdown("- Healthcare spending ratio not available. Please review Step 5.")
+        # Insight texts come from the recommendation rule tables, scored once on this plan's features
+        insight_features = {
+            "average_healthcare_pct": average_healthcare_pct,
+            "retirement_gap_start_age": retirement_gap_start_age,
+        }
+        for message in HEALTH_INSIGHTS.messages(insight_features):
+            st.markdown(message)
 
         st.markdown("**Financial Insights:**")
-        if retirement_gap_start_age:
-            st.markdown(f"- Based on your projections, a retirement funding gap begins at **age {retirement_gap_start_age}**. Explore care optimization and digital-first plans to reduce long-term pressure.")
-        else:
-            st.markdown("- Your retirement capital is currently on track based on the simulated assumptions.")
+        for message in FINANCIAL_INSIGHTS.messages(insight_features):
+            st.markdown(message)
 
         profile = st.session_state.get("profile", {})
         user_age = profile.get("age", st.session_state.get("user_age", 45))
         user_chronic_count = st.session_state.get("user_chronic_count", "None").lower().replace(" ", "_")
         chronic_multiplier = get_chronic_multiplier(user_age, user_chronic_count)
         health_status = profile.get("health_status", "")
-        family_history = profile.get("family_history", [])
+        family_history = profile.get("family_history_user", profile.get("family_history", []))
         insurance_type = profile.get("insurance_type", "")
         available_cash = st.session_state.get("available_cash", 0)
         savings_balance = st.session_state.get("savings_start", 0)
@@ -58,10 +80,8 @@ def run_step_6(tab7):
             st.image("Tuku_Concerned.png", width=60)
         with col_text:
             st.markdown("## Tuku’s Recommendations")
-        if health_status in ["chronic", "high_risk"]:
-            st.markdown("_Tuku says: You’re managing multiple chronic risks — now is the time to safeguard your care pathway with financial protection._")
-        else:
-            st.markdown("_Tuku says: Prioritize preventive care and consider digital health solutions to optimize your health outcomes and financial stability._")
+        for message in TUKU_CALLOUTS.messages({"health_status": health_status}):
+            st.markdown(message)
 
         # Insert capital_invest_toggle logic before care platform comparisons (per spec)
         capital_invest_toggle = st.radio(
@@ -105,17 +125,13 @@ def run_step_6(tab7):
             st.markdown("- **Vision/Dental Add-On**: $50/mo")
             total_current_spending = monthly_premium + monthly_oop
 
-            total_estimate = 80 + 100 + 50  # Digital-first cost estimate
-            delta = total_current_spending - total_estimate
-
-            if monthly_premium == 0 and monthly_oop <= total_estimate:
-                st.info("Your current OOP costs are already below digital-first alternatives. However, consider planning ahead as costs may rise due to family risk. Explore upgrade options available to you through our partners' network.")
-            elif delta > 5:
-                st.success(f"Estimated monthly savings from reallocation: ${delta:.0f}")
-            elif -5 <= delta <= 5:
-                st.info("Your current spending is roughly equivalent to digital-first alternatives.")
-            else:
-                st.warning("Digital-first care may not currently offer cost savings based on your current healthcare spending.")
+            delta = total_current_spending - DIGITAL_FIRST_MONTHLY_COST
+
+            comparison_features = {
+                "monthly_premium": monthly_premium, "monthly_oop": monthly_oop, "digital_first_delta": delta,
+            }
+            for rule, message in DIGITAL_FIRST_COMPARISON.matches(comparison_features):
+                MESSAGE_DISPLAY[rule.kind](message)
             # --- Insurance Reallocation Trigger (Annual Savings) ---
             if delta > 0:
                 annual_savings_option2 = delta * 12
@@ -130,6 +146,52 @@ def run_step_6(tab7):
 
         # Ensure capital fund sliders are visible and reactive with projected values
         available_cash = st.session_state.get("available_cash", 0)
+
+        # --- Optimization mode: search for the mix, then fill in the sliders below ---
+        with st.expander("✨ Find my best Capital Care Fund mix"):
+            optimize_goal = st.radio(
+                "What should the fund aim for?",
+                ["Cover as much healthcare cost as possible", "Maximize capital remaining at 85"],
+                key="capital_optimize_goal"
+            )
+            reserve_months = st.number_input("Emergency reserve to keep in savings (months of expenses):", 0, 24,
+                                             DEFAULT_RESERVE_MONTHS, key="capital_reserve_months")
+            if st.button("Optimize My Capital Care Fund", key="capital_optimize"):
+                optimized = optimize_capital_strategy(
+                    cost_df["Healthcare Cost"],
+                    available_cash,
+                    current_savings,
+                    min_reserve=reserve_months * st.session_state.get("monthly_expenses", 0),
+                    objective="min_unfunded" if optimize_goal.startswith("Cover") else "max_remaining",
+                    rates={
+                        "short_term": st.session_state.get("short_term_rate", 0.02),
+                        "mid_term": st.session_state.get("mid_term_rate", 0.05),
+                        "long_term": st.session_state.get("long_term_rate", 0.07),
+                    },
+                    start_capital=st.session_state.get("annual_savings_option2", 0),
+                )
+                st.session_state["optimized_capital_strategy"] = optimized
+                if available_cash > 0:
+                    st.session_state["capital_monthly_contrib"] = optimized["monthly_contribution"]
+                st.session_state["capital_savings_pct"] = optimized["savings_pct"]
+                st.session_state["short_term_allocation"] = optimized["allocation"]["short_term"]
+                st.session_state["mid_term_allocation"] = optimized["allocation"]["mid_term"]
+                st.session_state["long_term_allocation"] = optimized["allocation"]["long_term"]
+
+            optimized = st.session_state.get("optimized_capital_strategy")
+            if optimized:
+                allocation = optimized["allocation"]
+                st.success(
+                    f"Suggested mix: **{allocation['short_term']:.0f}% short-term / {allocation['mid_term']:.0f}% mid-term / "
+                    f"{allocation['long_term']:.0f}% long-term**, ${optimized['monthly_contribution']:,} per month and "
+                    f"{optimized['savings_pct']}% of savings."
+                )
+                if optimized["depletion_index"] < 0:
+                    st.markdown(f"- Covers projected healthcare costs through 85 with **${optimized['remaining']:,.0f}** remaining.")
+                else:
+                    st.markdown(f"- Leaves **${optimized['unfunded']:,.0f}** of healthcare costs unfunded through 85.")
+                st.caption(f"Compared {optimized['evaluated']:,} combinations within your available cash and emergency reserve.")
+
         st.markdown(f"Available Monthly Income: ${available_cash:,.0f}")
         if available_cash > 0:
             monthly_contribution = st.slider(
@@ -193,7 +255,6 @@ def run_step_6(tab7):
         st.caption("This is a simplified estimate for the freemium version. Actual investment returns and health costs may vary.")
 
         # --- Graph: Combined Capital Care Fund Over Time ---
-        import matplotlib.pyplot as plt
         import numpy as np
 
         years = np.arange(0, years_to_retirement + 1)
@@ -204,55 +265,56 @@ def run_step_6(tab7):
             (st.session_state["projected_oop"][i] if "projected_oop" in st.session_state else 7000 * (1.05 ** i)) * chronic_multiplier
             for i in range(len(years))
         ])
-        bar_width = 0.4
         ages = user_age + years
-        fig, ax = plt.subplots(figsize=(8, 4))
-        ax.bar(ages - bar_width/2, fund_values, width=bar_width, label="Capital Care Fund", color="#2a7cba")
-        ax.bar(ages + bar_width/2, projected_healthcare_costs, width=bar_width, label="Annual Healthcare Costs", color="#ba2a2a")
-        ax.set_title("Capital Fund vs. Annual Healthcare Costs")
-        ax.set_xlabel("Age")
-        ax.set_ylabel("Dollars ($)")
-        ax.legend()
-        ax.grid(alpha=0.3)
-        st.pyplot(fig)
+        show_chart("capital_fund_vs_costs", ages=ages, fund_values=fund_values, healthcare_costs=projected_healthcare_costs)
+
+        # --- Stress test: the fund against simulated health events (cancer, chronic onset, surgery) ---
+        with st.expander("🎲 Stress-test the fund against simulated health events"):
+            st.caption(f"Simulates {STRESS_TEST_LIVES:,} lives like yours through age 85, drawing cancer, chronic "
+                       "condition and surgery events by age and health status (and long-term care stays, if "
+                       "included in Step 1), and pays their out-of-pocket costs from your Capital Care Fund.")
+            if st.checkbox("Run stress test", key="run_event_stress_test"):
+                event_status = health_status if health_status in HEALTH_STATUSES else "healthy"
+                events = cached_call(
+                    simulate_health_events, user_age, event_status, max(0, 85 - user_age + 1),
+                    n_lives=STRESS_TEST_LIVES, cost_inflation=st.session_state.get("expense_inflation", 0.05), seed=0
+                )
+                oop_paths = events["oop"]
+                if st.session_state.get("ltc_enabled", False):
+                    # Long-term care stays drawn per life, paid only while the life is alive
+                    ltc = cached_call(
+                        simulate_ltc_paths, user_age, max(0, 85 - user_age + 1), st.session_state.get("ltc_type"),
+                        n_paths=STRESS_TEST_LIVES, monthly_costs=st.session_state.get("ltc_monthly_cost"),
+                        inflation=st.session_state.get("expense_inflation", 0.05), seed=1
+                    )
+                    oop_paths = oop_paths + ltc["cost"] * events["alive"]
+                stress = stress_test_capital_fund(
+                    oop_paths, annual_contribution, short_term_growth_rate, start_value=combined_fund
+                )
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Lives the fund fully covers", f"{1 - stress['depletion_probability']:.0%}")
+                col2.metric("Average unfunded OOP", f"${stress['mean']:,.0f}")
+                col3.metric("Unfunded OOP (1-in-100)", f"${stress['p99']:,.0f}")
+                oop_summary = summarize_oop(oop_paths, user_age)
+                oop_df = pd.DataFrame({
+                    "Age": oop_summary["ages"],
+                    "Mean OOP": oop_summary["mean"],
+                    "P90 OOP": oop_summary["p90"],
+                    "P99 OOP": oop_summary["p99"],
+                })
+                st.dataframe(oop_df.style.format("${:,.0f}", subset=["Mean OOP", "P90 OOP", "P99 OOP"]), hide_index=True)
 
         # --- Sliders for monthly_contribution and savings_pct remain above; values dynamically update cash_contribution ---
 
         st.image("https://tuku.ai/images/tuku_thumbs_up.png", width=60)
         st.markdown("You’re combining healthcare savings and cash reserves to build a stronger foundation for your future health expenses. This strategy gives you flexibility, especially as costs rise in later life.")
 
-        recommendation_text = ""
-        drawdown_option = ""
-
-        if health_status in ["chronic", "high_risk"]:
-            if available_cash > 0 and savings_balance > 0:
-                recommendation_text = "🧱 **Recommendation:** You are at risk and already in a treatment window. Focus on building a **Capital Care Fund** using available savings or income. (Option 1)"
-                drawdown_option = "Option 1"
-            elif savings_balance > 0:
-                recommendation_text = "💰 **Recommendation:** Use existing savings to begin a **Capital Care Fund**. (Option 1)"
-                drawdown_option = "Option 1"
-            elif available_cash > 0:
-                recommendation_text = "💡 **Recommendation:** Contribute from income to a **Capital Care Fund** for future treatment needs. (Option 1)"
-                drawdown_option = "Option 1"
-            else:
-                st.image("https://tuku.ai/images/tuku_encourage.png", width=60)
-                st.markdown("You may not yet be ready for financial care strategies. Instead, start your **health readiness journey** with small lifestyle changes — like improving diet, sleep, movement, and stress management. These steps will help you qualify for financial options in the future.\n\n_Consider exploring resources from patient advocacy groups, digital wellness platforms, or community support services._")
-                drawdown_option = ""
-        else:
-            if family_history:
-                if available_cash > 0:
-                    recommendation_text = "🔁 **Recommendation:** You’re healthy with family risk. Begin **Capital + Insurance Optimization** (**Option 1 + 2**)."
-                    drawdown_option = "Option 1 + Option 2"
-                else:
-                    recommendation_text = "📉 **Recommendation:** Healthy with family risk. Consider **insurance review** (**Option 2**)."
-                    drawdown_option = "Option 2"
-            else:
-                if available_cash >  0:
-                    recommendation_text = "✅ **Recommendation:** Ideal profile for a **Capital Health Fund** (**Option 1 + 2**)."
-                    drawdown_option = "Option 1 + Option 2"
-                else:
-                    recommendation_text = "🛡️ **Recommendation:** Overinsured. Start with **Option 2** and allocate surplus later."
-                    drawdown_option = "Option 2"
+        recommendation_text, drawdown_option, recommendation_code = recommend_capital_strategy(
+            health_status, family_history, available_cash, savings_balance
+        )
+        if recommendation_code == "lifestyle_guidance":
+            st.image("https://tuku.ai/images/tuku_encourage.png", width=60)
+            st.markdown("You may not yet be ready for financial care strategies. Instead, start your **health readiness journey** with small lifestyle changes — like improving diet, sleep, movement, and stress management. These steps will help you qualify for financial options in the future.\n\n_Consider exploring resources from patient advocacy groups, digital wellness platforms, or community support services._")
 
 
         st.success("This concludes the AI-guided retirement and care funding recommendation.")
@@ -286,13 +348,35 @@ def run_step_6(tab7):
         upgrade_choice = st.radio("Ready to plan with advanced AI guidance and multi-scenario comparison?", ["Not now", "Upgrade"])
         st.session_state["upgrade_choice"] = upgrade_choice
 
+        # --- Multi-Scenario Comparison ---
+        if upgrade_choice == "Upgrade":
+            st.subheader("🔀 Multi-Scenario Comparison")
+            scenario_profile, scenario_financials, scenario_strategy = plan_inputs_from_session(st.session_state)
+            scenarios = compare_scenarios(
+                scenario_profile, scenario_financials, scenario_strategy, DEFAULT_OVERRIDES,
+                ltc_setting=st.session_state.get("ltc_type") or "None"
+            )
+            st.caption(f"{len(scenarios):,} scenarios across insurance type, inflation, retirement age, capital allocation, "
+                       "monthly contribution and long-term care, ranked by lifetime healthcare cost, then capital shift, "
+                       "then how long retirement capital lasts.")
+            st.dataframe(scenarios.head(20).style.format({
+                "allocation": lambda split: "/".join(f"{pct:.0f}" for pct in split),
+                "inflation_rate": "{:.0%}",
+                "monthly_contribution": "${:,.0f}",
+                "lifetime_cost": "${:,.0f}",
+                "capital_shift": "${:,.0f}",
+                "depletion_age": lambda age: "Never" if age != age else f"{age:.0f}",
+                "retirement_shortfall": "${:,.0f}",
+                "capital_left": "${:,.0f}",
+                "available_cash": "${:,.0f}",
+            }))
+
         # --- Download Plan Option ---
         st.markdown("---")
         st.subheader("📁 Manage Your Plan")
         download_option = st.radio("Would you like to download your health plan?", ["Download My Plan", "Skip for Now"], key="download_plan_step6")
 
         if download_option == "Download My Plan":
-            import json
             export_data = {
                 "profile": st.session_state.get("profile", {}),
                 "insurance": {
@@ -316,8 +400,8 @@ def run_step_6(tab7):
                     "pension_partner": st.session_state.get("pension_partner")
                 }
             }
-            download_str = json.dumps(export_data, indent=2)
-            st.download_button("📥 Download Your Plan", data=download_str, file_name="my_health_plan.json", mime="application/json", key="download_button_step6")
+            plan_bytes = dumps_plan(session_plan(st.session_state, export_data))
+            st.download_button("📥 Download Your Plan", data=plan_bytes, file_name=f"my_health_plan.{PLAN_FILE_EXTENSION}", mime="application/octet-stream", key="download_button_step6")
 
         # --- Reset/Restart Plan Option ---
         st.markdown("---")
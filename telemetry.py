@@ -0,0 +1,255 @@
+# telemetry.py
+#
+# Lightweight instrumentation: timed spans for the Streamlit steps and the model
+# functions, plus debug messages, kept in an in-memory ring buffer and exportable
+# as JSON or Prometheus text.
+#
+# Disabled by default. When a span's level is off, `span()` returns a shared
+# no-op context and `@instrument` calls straight through, so the only cost is one
+# integer comparison. Configure in code with `configure(...)` or with environment
+# variables read at import:
+#
+#     HSS_TELEMETRY=off|info|debug     info = step and pipeline spans, debug = also model functions
+#                                      and debug messages
+#     HSS_TELEMETRY_SAMPLE_RATE=0.1    fraction of spans that are timed (calls are always counted)
+#     HSS_TELEMETRY_MEMORY=1           record net allocated bytes per span (tracemalloc)
+#     HSS_TELEMETRY_BUFFER=2000        ring buffer size (events)
+#     HSS_TELEMETRY_ECHO=1             also print debug messages to stdout
+#     HSS_TELEMETRY_EXPORT=path        write an export (.json, otherwise Prometheus text) at exit
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+OFF = 0
+INFO = 1
+DEBUG = 2
+LEVELS = {"off": OFF, "info": INFO, "debug": DEBUG}
+
+DEFAULT_BUFFER_SIZE = 2000
+MAX_FIELD_CHARS = 200
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Config:
+    level = OFF
+    sample_rate = 1.0
+    trace_memory = False
+    echo = False
+
+
+_config = _Config()
+_lock = threading.Lock()
+_events = deque(maxlen=DEFAULT_BUFFER_SIZE)
+_spans = {}
+
+
+def configure(level=None, sample_rate=None, trace_memory=None, buffer_size=None, echo=None):
+    """
+    Updates the telemetry settings; arguments left as None keep their current value.
+
+    Parameters:
+    - level: OFF, INFO or DEBUG (or "off" / "info" / "debug")
+    - sample_rate: fraction of enabled spans that are timed, 0 to 1
+    - trace_memory: record net allocated bytes per span (starts tracemalloc)
+    - buffer_size: number of events kept in the ring buffer
+    - echo: also print debug messages to stdout
+    """
+    global _events
+    if level is not None:
+        _config.level = LEVELS[level.lower()] if isinstance(level, str) else int(level)
+    if sample_rate is not None:
+        _config.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+    if trace_memory is not None:
+        _config.trace_memory = bool(trace_memory)
+        if _config.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+    if buffer_size is not None:
+        with _lock:
+            _events = deque(_events, maxlen=int(buffer_size))
+    if echo is not None:
+        _config.echo = bool(echo)
+
+
+def enabled(level=INFO):
+    return _config.level >= level
+
+
+def reset():
+    """
+    Clears the ring buffer and the per-span aggregates.
+    """
+    with _lock:
+        _events.clear()
+        _spans.clear()
+
+
+def _stats_for(name):
+    stats = _spans.get(name)
+    if stats is None:
+        stats = _spans[name] = {"calls": 0, "sampled": 0, "seconds_total": 0.0, "seconds_max": 0.0,
+                                "alloc_bytes_total": 0}
+    return stats
+
+
+class _Span:
+    __slots__ = ("name", "start", "memory_start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.memory_start = tracemalloc.get_traced_memory()[0] if _config.trace_memory else 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        alloc = tracemalloc.get_traced_memory()[0] - self.memory_start if _config.trace_memory else 0
+        event = {"type": "span", "name": self.name, "time": time.time(), "seconds": seconds}
+        if _config.trace_memory:
+            event["alloc_bytes"] = alloc
+        if exc_type is not None:
+            event["error"] = exc_type.__name__
+        with _lock:
+            stats = _stats_for(self.name)
+            stats["calls"] += 1
+            stats["sampled"] += 1
+            stats["seconds_total"] += seconds
+            stats["seconds_max"] = max(stats["seconds_max"], seconds)
+            stats["alloc_bytes_total"] += alloc
+            _events.append(event)
+        return False
+
+
+def span(name, level=INFO):
+    """
+    Context manager timing one stage. Returns a no-op context when `level` is disabled;
+    spans skipped by sampling are counted but not timed.
+    """
+    if _config.level < level:
+        return _NULL_SPAN
+    if _config.sample_rate < 1.0 and random.random() >= _config.sample_rate:
+        with _lock:
+            _stats_for(name)["calls"] += 1
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def instrument(name=None, level=DEBUG):
+    """
+    Decorator that wraps every call of a model function in a span named after the function.
+    """
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _config.level < level:
+                return func(*args, **kwargs)
+            with span(span_name, level):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _summarize(value):
+    text = repr(value)
+    return text if len(text) <= MAX_FIELD_CHARS else text[:MAX_FIELD_CHARS - 3] + "..."
+
+
+def debug(message, **fields):
+    """
+    Records a debug message (replaces ad-hoc print("DEBUG: ...") calls). Values are only
+    formatted when DEBUG is enabled.
+    """
+    if _config.level < DEBUG:
+        return
+    event = {"type": "debug", "name": message, "time": time.time(),
+             "fields": {key: _summarize(value) for key, value in fields.items()}}
+    with _lock:
+        _events.append(event)
+    if _config.echo:
+        print("DEBUG:", message, " ".join(f"{k}={v}" for k, v in event["fields"].items()))
+
+
+def recent_events(limit=None):
+    with _lock:
+        events = list(_events)
+    return events[-limit:] if limit else events
+
+
+def span_stats():
+    """
+    Per-span aggregates: calls, sampled calls, total/mean/max seconds and net allocated bytes.
+    """
+    with _lock:
+        stats = {name: dict(values) for name, values in _spans.items()}
+    for values in stats.values():
+        values["seconds_mean"] = values["seconds_total"] / values["sampled"] if values["sampled"] else 0.0
+    return stats
+
+
+def to_prometheus():
+    """
+    Span aggregates in the Prometheus text exposition format.
+    """
+    stats = span_stats()
+    metrics = [
+        ("hss_span_calls_total", "counter", "Calls per span, including unsampled calls", "calls"),
+        ("hss_span_sampled_total", "counter", "Timed calls per span", "sampled"),
+        ("hss_span_seconds_total", "counter", "Wall time of timed calls in seconds", "seconds_total"),
+        ("hss_span_seconds_max", "gauge", "Slowest timed call in seconds", "seconds_max"),
+        ("hss_span_alloc_bytes_total", "counter", "Net bytes allocated by timed calls", "alloc_bytes_total"),
+    ]
+    lines = []
+    for metric, kind, help_text, key in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name in sorted(stats):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{metric}{{span="{label}"}} {stats[name][key]}')
+    return "\n".join(lines) + "\n"
+
+
+def export(path):
+    """
+    Writes span aggregates and the ring buffer to `path`: JSON for .json files,
+    Prometheus text otherwise.
+    """
+    if path.lower().endswith(".json"):
+        payload = {
+            "config": {"level": _config.level, "sample_rate": _config.sample_rate,
+                       "trace_memory": _config.trace_memory},
+            "spans": span_stats(),
+            "events": recent_events(),
+        }
+        content = json.dumps(payload, indent=2)
+    else:
+        content = to_prometheus()
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _configure_from_env():
+    env = os.environ
+    configure(
+        level=env.get("HSS_TELEMETRY", "off"),
+        sample_rate=env.get("HSS_TELEMETRY_SAMPLE_RATE", 1.0),
+        trace_memory=env.get("HSS_TELEMETRY_MEMORY", "0") not in ("", "0", "false"),
+        buffer_size=env.get("HSS_TELEMETRY_BUFFER", DEFAULT_BUFFER_SIZE),
+        echo=env.get("HSS_TELEMETRY_ECHO", "0") not in ("", "0", "false"),
+    )
+    if env.get("HSS_TELEMETRY_EXPORT"):
+        atexit.register(export, env["HSS_TELEMETRY_EXPORT"])
+
+
+_configure_from_env()